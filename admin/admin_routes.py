@@ -18,12 +18,36 @@ from flask import (
     request,
     send_from_directory,
     session,
+    stream_with_context,
     url_for,
 )
 from sqlalchemy.exc import OperationalError
 from werkzeug.security import check_password_hash, generate_password_hash
 
+from change_feed import dataset_version, lock_dataset
+from codec import dumpb, dumps, loads
+from dataset_cache import (
+    get_dataset_entries,
+    get_dataset_entry,
+    is_weak_etag,
+    parse_version_etag,
+    version_etag,
+)
+from hot_offers import remove_hot_offers
+from json_patch import JsonPatchConflict, JsonPatchError, UnsupportedPatchFormat, apply_patch
+from live_events import (
+    SSE_RETRY_AFTER_SECONDS,
+    SubscriberLimitReached,
+    format_event,
+    heartbeat,
+    moderation_snapshot,
+    notify_moderation_changed,
+    subscribe_moderation,
+    unsubscribe,
+)
+from metrics import backend_call
 from models import Dataset, Moderator, ModeratorActionLog, db
+from profiling import PROFILING_ENABLED, clear_profiles, folded_stacks, list_profiles, load_profile
 
 
 def _ensure_moderator_tables():
@@ -37,6 +61,7 @@ admin_bp = Blueprint("admin", __name__)
 ADMIN_PASSWORD = os.getenv("ADMIN_PASSWORD", "admin123")
 BACKEND_API_URL = os.getenv("BACKEND_API_URL", "http://127.0.0.1:3001")
 BACKEND_ADMIN_API_KEY = os.getenv("BACKEND_ADMIN_API_KEY", os.getenv("ADMIN_API_KEY", ""))
+TELEGRAM_API_BASE_URL = os.getenv("TELEGRAM_API_BASE_URL", "https://api.telegram.org")
 EXCHANGE_CATEGORIES = [
     "ads",
     "buyAds",
@@ -104,7 +129,7 @@ def _log_moderator_action(action_type, request_id, details=None):
         return
     details_str = None
     if details is not None:
-        details_str = json.dumps(details, ensure_ascii=False) if isinstance(details, dict) else str(details)
+        details_str = dumps(details) if isinstance(details, dict) else str(details)
     entry = ModeratorActionLog(
         moderator_id=mod_id,
         action_type=action_type,
@@ -116,7 +141,20 @@ def _log_moderator_action(action_type, request_id, details=None):
 
 
 def _dataset_payload(dataset):
-    return json.loads(dataset.payload)
+    return loads(dataset.payload)
+
+
+def _entry_payload(entry):
+    if entry["invalid"]:
+        raise ValueError(f'Dataset "{entry["name"]}" has invalid JSON in DB')
+    return entry["payload"]
+
+
+def _cached_dataset(name, default=None):
+    entry = get_dataset_entry(name)
+    if not entry:
+        return default, 0
+    return _entry_payload(entry), entry["version"]
 
 
 def _extract_items(payload):
@@ -131,7 +169,7 @@ def _extract_items(payload):
 def _save_dataset_items(dataset, list_key, items):
     payload = _dataset_payload(dataset)
     payload[list_key] = items
-    dataset.payload = json.dumps(payload, ensure_ascii=False)
+    dataset.payload = dumps(payload)
     db.session.commit()
 
 
@@ -153,8 +191,8 @@ def _get_users_count():
     try:
         url = f"{BACKEND_API_URL.rstrip('/')}/stats/users-count"
         req = Request(url, headers=_backend_headers())
-        with urlopen(req, timeout=5) as response:
-            data = json.loads(response.read().decode("utf-8"))
+        with backend_call("backend", "GET", "/stats/users-count"), urlopen(req, timeout=5) as response:
+            data = loads(response.read())
             return int(data.get("usersCount", 0))
     except HTTPError as e:
         if e.code == 401:
@@ -171,42 +209,111 @@ def _backend_get_json(path, query_params=None):
     if query_params:
         url = f"{url}?{urlencode(query_params)}"
     req = Request(url, headers=_backend_headers())
-    with urlopen(req, timeout=5) as response:
-        return json.loads(response.read().decode("utf-8"))
+    with backend_call("backend", "GET", path), urlopen(req, timeout=5) as response:
+        return loads(response.read())
 
 
 def _backend_json(path, method, payload):
     url = f"{BACKEND_API_URL.rstrip('/')}/{path.lstrip('/')}"
-    data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+    data = dumpb(payload)
     headers = {"Content-Type": "application/json", **_backend_headers()}
     req = Request(url, data=data, method=method, headers=headers)
-    with urlopen(req, timeout=5) as response:
-        return json.loads(response.read().decode("utf-8"))
+    with backend_call("backend", method, path), urlopen(req, timeout=5) as response:
+        return loads(response.read())
 
 
 def _get_active_ads_total():
     total = 0
-    for category in EXCHANGE_CATEGORIES:
-        row = Dataset.query.filter_by(name=category).first()
-        if not row:
-            continue
-        payload = _dataset_payload(row)
+    for entry in get_dataset_entries(EXCHANGE_CATEGORIES):
+        payload = _entry_payload(entry)
         _, items = _extract_items_safe(payload)
         total += len(items)
     return total
 
 
-def _upsert_dataset(name, payload):
-    row = Dataset.query.filter_by(name=name).first()
+def _upsert_dataset(name, payload, row=None):
+    row = row or Dataset.query.filter_by(name=name).first()
     if row:
-        row.payload = json.dumps(payload, ensure_ascii=False)
+        row.payload = dumps(payload)
     else:
-        row = Dataset(name=name, payload=json.dumps(payload, ensure_ascii=False))
+        row = Dataset(name=name, payload=dumps(payload))
         db.session.add(row)
     db.session.commit()
     return row
 
 
+def _config_response(name, payload, version):
+    response = jsonify({"name": name, "payload": payload, "version": version})
+    response.headers["ETag"] = version_etag(version)
+    return response
+
+
+def _config_saved(row):
+    version = dataset_version(row.name)
+    response = jsonify({
+        "ok": True,
+        "updatedAt": row.updated_at.isoformat() if row.updated_at else None,
+        "version": version,
+    })
+    response.headers["ETag"] = version_etag(version)
+    return response
+
+
+def _put_config(name, validate=None):
+    body = request.get_json(silent=True) or {}
+    payload = body.get("payload")
+    if not isinstance(payload, dict):
+        return jsonify({"error": "Body must contain object field 'payload'"}), 400
+    error = validate(payload) if validate else None
+    if error:
+        return jsonify({"error": error}), 400
+    # If-Match is optional here; when sent, it is checked under the same lock as the write.
+    if is_weak_etag(request.headers.get("If-Match")):
+        return jsonify({"error": "If-Match needs the strong ETag of the config"}), 412
+    expected_version = parse_version_etag(request.headers.get("If-Match"))
+    row = lock_dataset(name)
+    if expected_version is not None:
+        version = dataset_version(name)
+        if version != expected_version:
+            return jsonify({"error": "Config version mismatch", "version": version}), 412
+    return _config_saved(_upsert_dataset(name, payload, row))
+
+
+def _patch_config(name, default, validate=None):
+    if is_weak_etag(request.headers.get("If-Match")):
+        return jsonify({"error": "If-Match needs the strong ETag of the config"}), 412
+    expected_version = parse_version_etag(request.headers.get("If-Match"))
+    if expected_version is None:
+        return jsonify({"error": "If-Match header with the current config version is required"}), 428
+    patch = request.get_json(silent=True)
+    if patch is None:
+        return jsonify({"error": "Body must be a JSON patch document"}), 400
+
+    row = lock_dataset(name)
+    version = dataset_version(name)
+    if version != expected_version:
+        return jsonify({"error": "Config version mismatch", "version": version}), 412
+    try:
+        payload = _dataset_payload(row) if row else loads(dumpb(default))
+    except json.JSONDecodeError:
+        return jsonify({"error": f'Dataset "{name}" has invalid JSON in DB'}), 500
+
+    try:
+        payload = apply_patch(payload, patch, request.mimetype)
+    except UnsupportedPatchFormat as exc:
+        return jsonify({"error": str(exc)}), 415
+    except JsonPatchConflict as exc:
+        return jsonify({"error": str(exc)}), 409
+    except JsonPatchError as exc:
+        return jsonify({"error": str(exc)}), 400
+    if not isinstance(payload, dict):
+        return jsonify({"error": "Patched payload must be an object"}), 400
+    error = validate(payload) if validate else None
+    if error:
+        return jsonify({"error": error}), 400
+    return _config_saved(_upsert_dataset(name, payload, row))
+
+
 def _uploads_dir():
     db_path = current_app.config.get("SQLALCHEMY_DATABASE_URI", "")
     if db_path.startswith("sqlite:///"):
@@ -454,23 +561,18 @@ def admin_panel():
 @require_login
 @require_admin
 def categories():
-    rows = (
-        Dataset.query.filter(Dataset.name.in_(EXCHANGE_CATEGORIES))
-        .order_by(Dataset.name.asc())
-        .all()
-    )
     result = []
-    for row in rows:
-        payload = _dataset_payload(row)
+    for entry in get_dataset_entries(EXCHANGE_CATEGORIES):
+        payload = _entry_payload(entry)
         list_key, items = _extract_items_safe(payload)
         if not list_key:
             continue
         result.append(
             {
-                "name": row.name,
+                "name": entry["name"],
                 "listKey": list_key,
                 "count": len(items),
-                "updatedAt": row.updated_at.isoformat() if row.updated_at else None,
+                "updatedAt": entry["updatedAt"].isoformat() if entry["updatedAt"] else None,
             }
         )
     return jsonify({"categories": result})
@@ -480,10 +582,10 @@ def categories():
 @require_login
 @require_admin
 def category_items(category):
-    row = Dataset.query.filter_by(name=category).first()
-    if not row:
+    entry = get_dataset_entry(category)
+    if not entry:
         return jsonify({"error": "Category not found"}), 404
-    payload = _dataset_payload(row)
+    payload = _entry_payload(entry)
     list_key, items = _extract_items(payload)
     return jsonify({"category": category, "listKey": list_key, "items": items})
 
@@ -555,33 +657,8 @@ def delete_item(category, item_id):
     _save_dataset_items(row, list_key, filtered)
 
     frontend_section = BACKEND_TO_FRONTEND_SECTION.get(category)
-    if frontend_section:
-        main_row = Dataset.query.filter_by(name="mainPage").first()
-        if main_row:
-            try:
-                main_payload = _dataset_payload(main_row)
-            except ValueError:
-                main_payload = {}
-            hot = main_payload.get("hotOffers")
-            if isinstance(hot, dict):
-                offers = hot.get("offers")
-                if isinstance(offers, list):
-                    item_id_str = str(item_id).strip()
-                    new_offers = []
-                    for offer in offers:
-                        if (
-                            isinstance(offer, dict)
-                            and offer.get("type") == "ad"
-                            and str(offer.get("category") or "").strip() == frontend_section
-                            and str(offer.get("itemId") or "").strip() == item_id_str
-                        ):
-                            continue
-                        new_offers.append(offer)
-                    if len(new_offers) != len(offers):
-                        hot["offers"] = new_offers
-                        main_payload["hotOffers"] = hot
-                        main_row.payload = json.dumps(main_payload, ensure_ascii=False)
-                        db.session.commit()
+    if frontend_section and remove_hot_offers(frontend_section, item_id):
+        db.session.commit()
 
     return jsonify({"ok": True})
 
@@ -594,10 +671,9 @@ def search_users():
     if len(q) < 2:
         return jsonify({"results": []})
 
-    rows = Dataset.query.order_by(Dataset.name.asc()).all()
     results = []
-    for row in rows:
-        payload = _dataset_payload(row)
+    for entry in get_dataset_entries():
+        payload = _entry_payload(entry)
         _, items = _extract_items_safe(payload)
         for item in items:
             if not isinstance(item, dict):
@@ -607,7 +683,7 @@ def search_users():
             if q in username.lower() or q in username_link.lower():
                 results.append(
                     {
-                        "category": row.name,
+                        "category": entry["name"],
                         "id": item.get("id"),
                         "username": username,
                         "usernameLink": username_link,
@@ -635,21 +711,22 @@ def dashboard_main():
 @require_login
 @require_admin
 def get_main_page_config():
-    row = Dataset.query.filter_by(name="mainPage").first()
-    payload = _dataset_payload(row) if row else {}
-    return jsonify({"name": "mainPage", "payload": payload})
+    payload, version = _cached_dataset("mainPage", {})
+    return _config_response("mainPage", payload, version)
 
 
 @admin_bp.route("/admin/api/config/main-page", methods=["PUT"])
 @require_login
 @require_admin
 def put_main_page_config():
-    body = request.get_json(silent=True) or {}
-    payload = body.get("payload")
-    if not isinstance(payload, dict):
-        return jsonify({"error": "Body must contain object field 'payload'"}), 400
-    row = _upsert_dataset("mainPage", payload)
-    return jsonify({"ok": True, "updatedAt": row.updated_at.isoformat() if row.updated_at else None})
+    return _put_config("mainPage")
+
+
+@admin_bp.route("/admin/api/config/main-page", methods=["PATCH"])
+@require_login
+@require_admin
+def patch_main_page_config():
+    return _patch_config("mainPage", {})
 
 
 DEFAULT_BANNERS_PAYLOAD = {"banners": [{"id": "default-1", "imageUrl": "/1.png", "order": 0}]}
@@ -659,28 +736,33 @@ DEFAULT_BANNERS_PAYLOAD = {"banners": [{"id": "default-1", "imageUrl": "/1.png",
 @require_login
 @require_admin
 def get_banners_config():
-    row = Dataset.query.filter_by(name="banners").first()
-    if not row:
-        return jsonify({"name": "banners", "payload": DEFAULT_BANNERS_PAYLOAD})
-    payload = _dataset_payload(row)
+    payload, version = _cached_dataset("banners")
+    if payload is None:
+        return _config_response("banners", DEFAULT_BANNERS_PAYLOAD, version)
     banners = payload.get("banners")
     if not isinstance(banners, list):
         payload = DEFAULT_BANNERS_PAYLOAD
-    return jsonify({"name": "banners", "payload": payload})
+    return _config_response("banners", payload, version)
+
+
+def _validate_banners_config(payload):
+    if not isinstance(payload.get("banners"), list):
+        return "payload.banners must be an array"
+    return None
 
 
 @admin_bp.route("/admin/api/config/banners", methods=["PUT"])
 @require_login
 @require_admin
 def put_banners_config():
-    body = request.get_json(silent=True) or {}
-    payload = body.get("payload")
-    if not isinstance(payload, dict):
-        return jsonify({"error": "Body must contain object field 'payload'"}), 400
-    if not isinstance(payload.get("banners"), list):
-        return jsonify({"error": "payload.banners must be an array"}), 400
-    row = _upsert_dataset("banners", payload)
-    return jsonify({"ok": True, "updatedAt": row.updated_at.isoformat() if row.updated_at else None})
+    return _put_config("banners", _validate_banners_config)
+
+
+@admin_bp.route("/admin/api/config/banners", methods=["PATCH"])
+@require_login
+@require_admin
+def patch_banners_config():
+    return _patch_config("banners", DEFAULT_BANNERS_PAYLOAD, _validate_banners_config)
 
 
 @admin_bp.route("/admin/api/banner-preview")
@@ -746,77 +828,91 @@ def upload_banner():
 @require_login
 @require_admin
 def get_guarant_config():
-    row = Dataset.query.filter_by(name="guarantConfig").first()
-    payload = _dataset_payload(row) if row else {}
-    return jsonify({"name": "guarantConfig", "payload": payload})
+    payload, version = _cached_dataset("guarantConfig", {})
+    return _config_response("guarantConfig", payload, version)
 
 
 @admin_bp.route("/admin/api/config/guarant", methods=["PUT"])
 @require_login
 @require_admin
 def put_guarant_config():
-    body = request.get_json(silent=True) or {}
-    payload = body.get("payload")
-    if not isinstance(payload, dict):
-        return jsonify({"error": "Body must contain object field 'payload'"}), 400
-    row = _upsert_dataset("guarantConfig", payload)
-    return jsonify({"ok": True, "updatedAt": row.updated_at.isoformat() if row.updated_at else None})
+    return _put_config("guarantConfig")
+
+
+@admin_bp.route("/admin/api/config/guarant", methods=["PATCH"])
+@require_login
+@require_admin
+def patch_guarant_config():
+    return _patch_config("guarantConfig", {})
 
 
 @admin_bp.route("/admin/api/config/faq", methods=["GET"])
 @require_login
 @require_admin
 def get_faq_config():
-    row = Dataset.query.filter_by(name="faq").first()
-    payload = _dataset_payload(row) if row else {"items": []}
-    return jsonify({"name": "faq", "payload": payload})
+    payload, version = _cached_dataset("faq", {"items": []})
+    return _config_response("faq", payload, version)
+
+
+def _validate_faq_config(payload):
+    if not isinstance(payload.get("items"), list):
+        return "payload.items must be an array"
+    return None
 
 
 @admin_bp.route("/admin/api/config/faq", methods=["PUT"])
 @require_login
 @require_admin
 def put_faq_config():
-    body = request.get_json(silent=True) or {}
-    payload = body.get("payload")
-    if not isinstance(payload, dict):
-        return jsonify({"error": "Body must contain object field 'payload'"}), 400
-    if not isinstance(payload.get("items"), list):
-        return jsonify({"error": "payload.items must be an array"}), 400
-    row = _upsert_dataset("faq", payload)
-    return jsonify({"ok": True, "updatedAt": row.updated_at.isoformat() if row.updated_at else None})
+    return _put_config("faq", _validate_faq_config)
 
 
-@admin_bp.route("/admin/api/config/bot", methods=["GET"])
+@admin_bp.route("/admin/api/config/faq", methods=["PATCH"])
 @require_login
 @require_admin
-def get_bot_config():
-    row = Dataset.query.filter_by(name="botConfig").first()
-    payload = _dataset_payload(row) if row else {
-        "welcomeMessage": "",
-        "welcomePhotoUrl": None,
-        "supportLink": "https://t.me/miniapp_admin_example",
-    }
-    return jsonify({"name": "botConfig", "payload": payload})
+def patch_faq_config():
+    return _patch_config("faq", {"items": []}, _validate_faq_config)
 
 
-@admin_bp.route("/admin/api/config/bot", methods=["PUT"])
+DEFAULT_BOT_CONFIG = {
+    "welcomeMessage": "",
+    "welcomePhotoUrl": None,
+    "supportLink": "https://t.me/miniapp_admin_example",
+}
+
+
+@admin_bp.route("/admin/api/config/bot", methods=["GET"])
 @require_login
 @require_admin
-def put_bot_config():
-    body = request.get_json(silent=True) or {}
-    payload = body.get("payload")
-    if not isinstance(payload, dict):
-        return jsonify({"error": "Body must contain object field 'payload'"}), 400
+def get_bot_config():
+    payload, version = _cached_dataset("botConfig", DEFAULT_BOT_CONFIG)
+    return _config_response("botConfig", payload, version)
+
+
+def _validate_bot_config(payload):
     if not isinstance(payload.get("welcomeMessage"), str):
-        return jsonify({"error": "payload.welcomeMessage must be a string"}), 400
+        return "payload.welcomeMessage must be a string"
     if payload.get("welcomePhotoUrl") is not None and not isinstance(payload.get("welcomePhotoUrl"), str):
-        return jsonify({"error": "payload.welcomePhotoUrl must be null or string"}), 400
+        return "payload.welcomePhotoUrl must be null or string"
     if payload.get("supportLink") is not None and not isinstance(payload.get("supportLink"), str):
-        return jsonify({"error": "payload.supportLink must be null or string"}), 400
+        return "payload.supportLink must be null or string"
     if payload.get("webAppUrl") is not None and not isinstance(payload.get("webAppUrl"), str):
-        return jsonify({"error": "payload.webAppUrl must be null or string"}), 400
-    row = _upsert_dataset("botConfig", payload)
-    return jsonify({"ok": True, "updatedAt": row.updated_at.isoformat() if row.updated_at else None})
+        return "payload.webAppUrl must be null or string"
+    return None
+
+
+@admin_bp.route("/admin/api/config/bot", methods=["PUT"])
+@require_login
+@require_admin
+def put_bot_config():
+    return _put_config("botConfig", _validate_bot_config)
+
+
+@admin_bp.route("/admin/api/config/bot", methods=["PATCH"])
+@require_login
+@require_admin
+def patch_bot_config():
+    return _patch_config("botConfig", DEFAULT_BOT_CONFIG, _validate_bot_config)
 
 
 DEFAULT_EXCHANGE_OPTIONS = {
@@ -839,37 +935,42 @@ DEFAULT_EXCHANGE_OPTIONS = {
 @require_login
 @require_admin
 def get_exchange_options_config():
-    row = Dataset.query.filter_by(name="exchangeOptions").first()
-    payload = _dataset_payload(row) if row else DEFAULT_EXCHANGE_OPTIONS
+    payload, version = _cached_dataset("exchangeOptions", DEFAULT_EXCHANGE_OPTIONS)
     if not isinstance(payload.get("jobTypes"), list):
         payload = dict(payload) if isinstance(payload, dict) else {}
         payload["jobTypes"] = DEFAULT_EXCHANGE_OPTIONS["jobTypes"]
     if not isinstance(payload.get("currencies"), list):
         payload = dict(payload) if isinstance(payload, dict) else {}
         payload["currencies"] = DEFAULT_EXCHANGE_OPTIONS["currencies"]
-    return jsonify({"name": "exchangeOptions", "payload": payload})
+    return _config_response("exchangeOptions", payload, version)
 
 
-@admin_bp.route("/admin/api/config/exchange-options", methods=["PUT"])
-@require_login
-@require_admin
-def put_exchange_options_config():
-    body = request.get_json(silent=True) or {}
-    payload = body.get("payload")
-    if not isinstance(payload, dict):
-        return jsonify({"error": "Body must contain object field 'payload'"}), 400
+def _validate_exchange_options_config(payload):
     if not isinstance(payload.get("jobTypes"), list):
-        return jsonify({"error": "payload.jobTypes must be an array"}), 400
+        return "payload.jobTypes must be an array"
     if not isinstance(payload.get("currencies"), list):
-        return jsonify({"error": "payload.currencies must be an array"}), 400
+        return "payload.currencies must be an array"
     for i, item in enumerate(payload["jobTypes"]):
         if not isinstance(item, dict) or not isinstance(item.get("value"), str) or not isinstance(item.get("label"), str):
-            return jsonify({"error": f"payload.jobTypes[{i}] must be {{value, label}}"}), 400
+            return f"payload.jobTypes[{i}] must be {{value, label}}"
     for i, item in enumerate(payload["currencies"]):
         if not isinstance(item, dict) or not isinstance(item.get("value"), str) or not isinstance(item.get("label"), str):
-            return jsonify({"error": f"payload.currencies[{i}] must be {{value, label}}"}), 400
-    row = _upsert_dataset("exchangeOptions", payload)
-    return jsonify({"ok": True, "updatedAt": row.updated_at.isoformat() if row.updated_at else None})
+            return f"payload.currencies[{i}] must be {{value, label}}"
+    return None
+
+
+@admin_bp.route("/admin/api/config/exchange-options", methods=["PUT"])
+@require_login
+@require_admin
+def put_exchange_options_config():
+    return _put_config("exchangeOptions", _validate_exchange_options_config)
+
+
+@admin_bp.route("/admin/api/config/exchange-options", methods=["PATCH"])
+@require_login
+@require_admin
+def patch_exchange_options_config():
+    return _patch_config("exchangeOptions", DEFAULT_EXCHANGE_OPTIONS, _validate_exchange_options_config)
 
 
 @admin_bp.route("/admin/api/config/bot/upload-photo", methods=["POST"])
@@ -979,30 +1080,33 @@ def send_bot_message():
     for chat_id in sorted(set(targets)):
         try:
             if photo_file and photo_data:
+                bot_method = "sendPhoto"
                 fields = {"chat_id": chat_id}
                 if message:
                     fields["caption"] = message
                 files = {"photo": (photo_filename, photo_data, photo_content_type)}
                 boundary, body_data = _create_multipart_form_data(fields, files)
                 req = Request(
-                    f"https://api.telegram.org/bot{token}/sendPhoto",
+                    f"{TELEGRAM_API_BASE_URL.rstrip('/')}/bot{token}/sendPhoto",
                     data=body_data,
                     method="POST",
                     headers={"Content-Type": f"multipart/form-data; boundary={boundary}"},
                 )
             else:
-                payload = json.dumps({"chat_id": chat_id, "text": message}, ensure_ascii=False).encode("utf-8")
+                bot_method = "sendMessage"
+                payload = dumpb({"chat_id": chat_id, "text": message})
                 req = Request(
-                    f"https://api.telegram.org/bot{token}/sendMessage",
+                    f"{TELEGRAM_API_BASE_URL.rstrip('/')}/bot{token}/sendMessage",
                     data=payload,
                     method="POST",
                     headers={"Content-Type": "application/json"},
                 )
-            with urlopen(req, timeout=10) as response:
-                response_data = json.loads(response.read().decode("utf-8"))
+            with backend_call("telegram", "POST", f"/{bot_method}") as call, urlopen(req, timeout=10) as response:
+                response_data = loads(response.read())
                 if response_data.get("ok"):
                     sent += 1
                 else:
+                    call.fail(response_data.get("error_code") or "not_ok")
                     failed.append({"telegramId": chat_id, "error": response_data})
         except Exception as exc:
             failed.append({"telegramId": chat_id, "error": str(exc)})
@@ -1446,6 +1550,32 @@ def admin_system_logs():
         return jsonify({"error": str(exc)}), 502
 
 
+@admin_bp.route("/admin/api/profiles", methods=["GET"])
+@require_login
+@require_admin
+def admin_profiles_list():
+    return jsonify({"enabled": PROFILING_ENABLED, "profiles": list_profiles()})
+
+
+@admin_bp.route("/admin/api/profiles/<profile_id>", methods=["GET"])
+@require_login
+@require_admin
+def admin_profile_get(profile_id):
+    profile = load_profile(profile_id)
+    if profile is None:
+        return jsonify({"error": "Profile not found"}), 404
+    if request.args.get("format") == "folded":
+        return Response(folded_stacks(profile), mimetype="text/plain")
+    return jsonify(profile)
+
+
+@admin_bp.route("/admin/api/profiles", methods=["DELETE"])
+@require_login
+@require_admin
+def admin_profiles_clear():
+    return jsonify({"ok": True, "removed": clear_profiles()})
+
+
 @admin_bp.route("/admin/api/moderation/requests", methods=["GET"])
 @require_login
 def admin_moderation_list():
@@ -1458,6 +1588,57 @@ def admin_moderation_list():
         return jsonify({"error": f"Failed to load moderation requests: {exc}"}), 502
 
 
+def _fetch_pending_moderation():
+    data = _backend_get_json("/moderation/requests", {"status": "pending"})
+    pending = [r for r in data.get("requests", []) if isinstance(r, dict)]
+    return {
+        "pendingCount": len(pending),
+        "pending": [
+            {"id": r.get("id"), "status": r.get("status"), "updatedAt": r.get("updatedAt")}
+            for r in pending
+        ],
+    }
+
+
+@admin_bp.route("/admin/api/moderation/events", methods=["GET"])
+@require_login
+def admin_moderation_events():
+    last_event_id = request.headers.get("Last-Event-ID") or request.args.get("lastEventId")
+    try:
+        sub = subscribe_moderation(_fetch_pending_moderation, current_app._get_current_object())
+    except SubscriberLimitReached:
+        return (
+            jsonify({"error": "Too many open event streams, retry later"}),
+            503,
+            {"Retry-After": str(SSE_RETRY_AFTER_SECONDS)},
+        )
+
+    def stream():
+        sent_digest = last_event_id
+        try:
+            yield "retry: 3000\n\n"
+            while True:
+                if sub.overflowed:
+                    yield format_event({"reset": True}, "reset")
+                    return
+                digest, snapshot = moderation_snapshot()
+                if digest and digest != sent_digest:
+                    sent_digest = digest
+                    yield format_event(snapshot, "moderation", digest)
+                if sub.wait() is None:
+                    yield heartbeat()
+        finally:
+            unsubscribe(sub)
+
+    # Release the request's pooled connection before the stream starts idling.
+    db.session.close()
+    return Response(
+        stream_with_context(stream()),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @admin_bp.route("/admin/api/moderation/requests/<request_id>", methods=["GET"])
 @require_login
 def admin_moderation_get(request_id):
@@ -1488,6 +1669,7 @@ def admin_moderation_update(request_id):
     try:
         data = _backend_json(f"/moderation/requests/{request_id}", "PATCH", payload)
         _log_moderator_action("edit", request_id)
+        notify_moderation_changed()
         return jsonify(data)
     except HTTPError as exc:
         status = exc.code if exc.code else 502
@@ -1504,6 +1686,7 @@ def admin_moderation_reject(request_id):
     try:
         data = _backend_json(f"/moderation/requests/{request_id}/reject", "PATCH", payload)
         _log_moderator_action("reject", request_id)
+        notify_moderation_changed()
         return jsonify(data)
     except HTTPError as exc:
         status = exc.code if exc.code else 502
@@ -1604,6 +1787,7 @@ def admin_moderation_approve(request_id):
             {"publishedItemId": new_item.get("id"), "adminNote": admin_note},
         )
         _log_moderator_action("approve", request_id)
+        notify_moderation_changed()
         return jsonify({"ok": True, "publishedItem": new_item, "request": approved.get("request")})
     except HTTPError as exc:
         status = exc.code if exc.code else 502
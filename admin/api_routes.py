@@ -1,13 +1,49 @@
+import hashlib
+import heapq
+import itertools
 import json
 import os
-from datetime import datetime, timezone
 import time
 from typing import Any, Dict, Iterable, List, Optional, Tuple
 
 import requests
-from flask import Blueprint, jsonify, request, Response
-
-from models import DATASET_FILES, DEFAULT_DATASETS, Dataset, db
+from flask import Blueprint, current_app, jsonify, request, Response, stream_with_context
+
+from bitmaps import from_positions, iter_positions, value_bitmaps
+from change_feed import dataset_version, lock_dataset
+from codec import dumpb, dumps, loads
+from compression import cache_representation
+from dataset_cache import (
+    derived,
+    get_dataset_entries,
+    get_dataset_entry,
+    is_weak_etag,
+    parse_version_etag,
+    version_etag,
+)
+from hot_offers import MAIN_PAGE_DATASET, hot_offer_refs, remove_hot_offers, resolve_hot_offers
+from json_patch import JsonPatchConflict, JsonPatchError, UnsupportedPatchFormat, apply_patch
+from listing_dates import item_expires_epoch, item_published_epoch, parse_epoch
+from live_events import (
+    SSE_RETRY_AFTER_SECONDS,
+    SubscriberLimitReached,
+    format_event,
+    heartbeat,
+    subscribe,
+    unsubscribe,
+)
+from metrics import backend_call, stage
+from models import (
+    DATASET_FILES,
+    DEFAULT_DATASETS,
+    Dataset,
+    DatasetItemChange,
+    db,
+    get_item_change_log_start,
+)
+from projections import CARD_FIELDS, encode_listing, encoded_items, project_item, resolve_fields
+from range_index import build_bound_index, parse_bound
+from records import intern_lower, record_type
 
 api_bp = Blueprint('api', __name__, url_prefix='/api')
 
@@ -37,6 +73,9 @@ SECTION_TO_DATASET = {
     v: k for (k, v) in DATASET_TO_SECTION.items()
 }
 
+_DELTA_CACHE: Dict[Tuple[str, int, int], Dict[str, Any]] = {}
+_DELTA_CACHE_SIZE = 128
+
 _GUARANTOR_AVATAR_CACHE: Dict[str, Dict[str, Any]] = {}
 _GUARANTOR_AVATAR_TTL_SECONDS = 3600
 
@@ -67,42 +106,42 @@ def _get_list_from_payload(payload, dataset_name):
     return payload.get(dataset_name, payload.get("items", [])) if isinstance(payload.get(dataset_name), list) else []
 
 
+def _items_by_id(entry, dataset_name):
+    def build(e):
+        index = {}
+        for it in _get_list_from_payload(e['payload'], dataset_name):
+            if isinstance(it, dict):
+                index.setdefault(str(it.get("id", "")).strip(), it)
+        return index
+
+    return derived(entry, 'itemsById', build)
+
+
+_SNIPPET_TITLE_FIELDS = {
+    "services": ("title", "theme", "description"),
+    "sellChannels": ("name", "theme", "description"),
+}
+_DEFAULT_SNIPPET_TITLE_FIELDS = ("theme", "description")
+
+
 def _listing_snippet(dataset_name, item):
-    section = DATASET_TO_SECTION.get(dataset_name, dataset_name)
-    item_id = item.get("id")
-    published_at = item.get("publishedAt") or item.get("createdAt") or ""
     title = ""
-    if dataset_name == "ads":
-        title = (item.get("theme") or item.get("description") or "")[:200]
-    elif dataset_name == "buyAds":
-        title = (item.get("theme") or item.get("description") or "")[:200]
-    elif dataset_name == "jobs":
-        title = (item.get("theme") or item.get("description") or "")[:200]
-    elif dataset_name == "services":
-        title = (item.get("title") or item.get("theme") or item.get("description") or "")[:200]
-    elif dataset_name == "currency":
-        title = (item.get("theme") or item.get("description") or "")[:200]
-    elif dataset_name == "sellChannels":
-        title = (item.get("name") or item.get("theme") or item.get("description") or "")[:200]
-    elif dataset_name == "buyChannels":
-        title = (item.get("theme") or item.get("description") or "")[:200]
-    elif dataset_name == "other":
-        title = (item.get("theme") or item.get("description") or "")[:200]
+    for field in _SNIPPET_TITLE_FIELDS.get(dataset_name, _DEFAULT_SNIPPET_TITLE_FIELDS):
+        title = item.get(field)
+        if title:
+            break
+    title = (title or "")[:200]
+    published_at = item.get("publishedAt") or item.get("createdAt") or ""
     return {
-        "section": section,
-        "id": item_id,
+        "section": DATASET_TO_SECTION.get(dataset_name, dataset_name),
+        "id": item.get("id"),
         "title": (title or "").strip() or None,
         "publishedAt": published_at or None,
         "username": item.get("username"),
     }
 
 
-def _item_username_match(item, username_arg):
-    if not username_arg or not isinstance(item, dict):
-        return True
-    q = str(username_arg).strip().lstrip("@").lower()
-    if not q:
-        return True
+def _item_username_keys(item):
     uname = str(item.get("username") or "").strip().lstrip("@").lower()
     ulink = str(item.get("usernameLink") or "").lower()
     uname_from_link = ""
@@ -110,134 +149,294 @@ def _item_username_match(item, username_arg):
         parts = ulink.rstrip("/").split("t.me/")
         if len(parts) > 1:
             uname_from_link = (parts[-1] or "").split("/")[0].split("?")[0].lower()
-    return q == uname or q in ulink or q == uname_from_link
+    return uname, ulink, uname_from_link
+
+
+def _user_listings_index(entry, dataset_name):
+    # Per dataset version: exact username keys -> positions, the lowercased links for the
+    # substring part of the username filter, and the materialized snippet of every item.
+    def build(e):
+        items = []
+        snippets = []
+        dates = []
+        by_username: Dict[str, List[int]] = {}
+        links = []
+        for it in _get_list_from_payload(e['payload'], dataset_name):
+            if not isinstance(it, dict):
+                continue
+            pos = len(items)
+            items.append(it)
+            snippets.append(_listing_snippet(dataset_name, it))
+            dates.append(_listing_date(it))
+            uname, ulink, uname_from_link = _item_username_keys(it)
+            for key in {uname, uname_from_link} - {""}:
+                by_username.setdefault(key, []).append(pos)
+            if ulink:
+                links.append((pos, ulink))
+        # Newest first, ties in stored order: each category is one pre-sorted run to merge.
+        order = sorted(range(len(items)), key=dates.__getitem__, reverse=True)
+        rank = [0] * len(order)
+        for r, pos in enumerate(order):
+            rank[pos] = r
+        return {
+            'items': items,
+            'snippets': snippets,
+            'dates': dates,
+            'byUsername': by_username,
+            'links': links,
+            'order': order,
+            'rank': rank,
+        }
+
+    return derived(entry, 'userListings', build)
+
+
+def _user_listing_snippets(entry, dataset_name, username, now):
+    index = _user_listings_index(entry, dataset_name)
+    items = index['items']
+    if username:
+        positions = set(index['byUsername'].get(username, ()))
+        positions.update(pos for pos, link in index['links'] if username in link)
+        positions = sorted(positions, key=index['rank'].__getitem__)
+    else:
+        positions = index['order']
+    snippets = index['snippets']
+    dates = index['dates']
+    return [
+        (dates[pos], snippets[pos])
+        for pos in positions
+        if not _item_expired(dataset_name, items[pos], now)
+    ]
 
 
-def _filter_exchange_items(dataset_name, items, args):
-    if not items:
-        return items
-    result = []
-    now = datetime.now(timezone.utc)
-    for item in items:
-        if not isinstance(item, dict):
-            result.append(item)
+# Sort value for listings without a usable date: below every real one.
+_NO_DATE = float("-inf")
+
+
+def _listing_date(item):
+    published = item_published_epoch(item)
+    return _NO_DATE if published is None else published
+
+
+def _item_expires_at(dataset_name, item):
+    # Epoch seconds, or None for listings that never expire.
+    if dataset_name == "currency":
+        return None
+    return item_expires_epoch(item)
+
+
+def _item_expired(dataset_name, item, now):
+    expires_at = _item_expires_at(dataset_name, item)
+    return expires_at is not None and now > expires_at
+
+
+# Range filters answered from per-version sorted indexes: (query param, indexed field, op).
+# Min/max datasets match on interval overlap: "from" bounds the max, "to" bounds the min.
+_RANGE_FILTERS = {
+    "ads": (("priceFrom", "price", ">="), ("priceTo", "price", "<=")),
+    "buyAds": (
+        ("priceFrom", "priceMax", ">="), ("priceTo", "priceMin", "<="),
+        ("viewsFrom", "viewsMax", ">="), ("viewsTo", "viewsMin", "<="),
+    ),
+    "buyChannels": (
+        ("priceFrom", "priceMax", ">="), ("priceTo", "priceMin", "<="),
+        ("reachFrom", "reachMax", ">="), ("reachTo", "reachMin", "<="),
+        ("subscribersFrom", "subscribersMax", ">="), ("subscribersTo", "subscribersMin", "<="),
+    ),
+}
+
+
+def _ads_price(item):
+    try:
+        return float(item.get("price") or 0)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def _interval_bounds(item, base):
+    lo, hi = item.get(base + "Min"), item.get(base + "Max")
+    try:
+        return (float(lo) if lo is not None else None, float(hi) if hi is not None else None)
+    except (TypeError, ValueError):
+        return None, None
+
+
+def _range_value(field):
+    if field == "price":
+        return _ads_price
+    side = 0 if field.endswith("Min") else 1
+    return lambda it: _interval_bounds(it, field[:-3])[side]
+
+
+def _range_index(entry, dataset_name, field):
+    return derived(entry, ("range", field), lambda e: build_bound_index(
+        _get_list_from_payload(e['payload'], dataset_name), _range_value(field)
+    ))
+
+
+def _range_candidates(entry, dataset_name, args):
+    # Positions in the stored list matching every range param, or None without range params.
+    candidates = None
+    for param, field, op in _RANGE_FILTERS.get(dataset_name, ()):
+        bound = parse_bound(args.get(param))
+        if bound is None:
             continue
-        if dataset_name != "currency":
-            expires_at_str = item.get("expiresAt")
-            if expires_at_str:
-                try:
-                    s = str(expires_at_str).replace("Z", "+00:00")
-                    expires_at = datetime.fromisoformat(s)
-                    if now > expires_at:
-                        continue
-                except (TypeError, ValueError):
-                    pass
-        if dataset_name == "ads":
-            try:
-                price = float(item.get("price") or 0)
-            except (TypeError, ValueError):
-                price = 0
-            p_from = args.get("priceFrom", "").strip()
-            p_to = args.get("priceTo", "").strip()
-            if p_from and float(p_from) > price:
-                continue
-            if p_to and float(p_to) < price:
-                continue
-            theme = (item.get("theme") or "").lower()
-            if args.get("theme", "").strip() and args.get("theme", "").strip().lower() not in theme:
-                continue
-        elif dataset_name == "buyAds":
-            p_min = item.get("priceMin")
-            p_max = item.get("priceMax")
-            try:
-                p_min = float(p_min) if p_min is not None else None
-                p_max = float(p_max) if p_max is not None else None
-            except (TypeError, ValueError):
-                p_min = p_max = None
-            p_from = args.get("priceFrom", "").strip()
-            p_to = args.get("priceTo", "").strip()
-            if p_from:
-                try:
-                    if p_max is not None and float(p_from) > p_max:
-                        continue
-                except (TypeError, ValueError):
-                    pass
-            if p_to:
-                try:
-                    if p_min is not None and float(p_to) < p_min:
-                        continue
-                except (TypeError, ValueError):
-                    pass
-            theme = (item.get("theme") or "").lower()
-            if args.get("theme", "").strip() and args.get("theme", "").strip().lower() not in theme:
-                continue
-        elif dataset_name == "jobs":
-            if args.get("offerType", "").strip() and item.get("offerType") != args.get("offerType"):
-                continue
-            if args.get("work", "").strip() and item.get("work") != args.get("work"):
-                continue
-            if args.get("employmentType", "").strip() and item.get("employmentType") != args.get("employmentType"):
-                continue
-            if args.get("paymentCurrency", "").strip() and item.get("paymentCurrency") != args.get("paymentCurrency"):
-                continue
-            if args.get("hasPortfolio") == "yes" and not item.get("portfolioUrl"):
-                continue
-            if args.get("hasPortfolio") == "no" and item.get("portfolioUrl"):
-                continue
-            theme = (item.get("theme") or "").lower()
-            if args.get("themeSearch", "").strip() and args.get("themeSearch", "").strip().lower() not in theme:
-                continue
-            desc = (item.get("description") or "").lower()
-            if args.get("descriptionSearch", "").strip() and args.get("descriptionSearch", "").strip().lower() not in desc:
-                continue
-        elif dataset_name == "services":
-            theme = (item.get("theme") or "").lower()
-            if args.get("theme", "").strip() and args.get("theme", "").strip().lower() not in theme:
-                continue
-        elif dataset_name == "other":
-            theme = (item.get("theme") or "").lower()
-            if args.get("theme", "").strip() and args.get("theme", "").strip().lower() not in theme:
-                continue
-            date_from = args.get("dateFrom", "").strip()
-            date_to = args.get("dateTo", "").strip()
-            if date_from or date_to:
-                pub = item.get("publishedAt") or item.get("createdAt") or ""
-                if date_to and pub > date_to:
-                    continue
-                if date_from and pub < date_from:
-                    continue
-        elif dataset_name in ("currency", "sellChannels", "buyChannels"):
-            theme = (item.get("theme") or item.get("description") or "").lower()
-            if args.get("theme", "").strip() and args.get("theme", "").strip().lower() not in theme:
+        index = _range_index(entry, dataset_name, field)
+        matched = index.at_least(bound) if op == ">=" else index.at_most(bound)
+        candidates = matched if candidates is None else candidates & matched
+    return candidates
+
+
+# Exact-match filters answered from per-value bitmaps over list positions.
+_FACET_FIELDS = {
+    "jobs": ("offerType", "work", "employmentType", "paymentCurrency", "hasPortfolio"),
+}
+
+
+def _facet_value(field):
+    if field == "hasPortfolio":
+        return lambda it: "yes" if it.get("portfolioUrl") else "no"
+    return lambda it: it.get(field)
+
+
+def _facet_bitmaps(entry, dataset_name, field):
+    return derived(entry, ("facet", field), lambda e: value_bitmaps(
+        _get_list_from_payload(e['payload'], dataset_name), _facet_value(field)
+    ))
+
+
+def _loose_items(entry, dataset_name):
+    # Non-object entries pass every filter, as they always did in the linear scan.
+    return derived(entry, "looseItems", lambda e: from_positions(
+        pos for pos, it in enumerate(_get_list_from_payload(e['payload'], dataset_name))
+        if not isinstance(it, dict)
+    ))
+
+
+def _selected_facets(entry, dataset_name, args):
+    selected = {}
+    for field in _FACET_FIELDS.get(dataset_name, ()):
+        value = args.get(field) or ''
+        if field == "hasPortfolio" and value not in ("yes", "no"):
+            continue
+        if value.strip():
+            bitmap = _facet_bitmaps(entry, dataset_name, field).get(value, 0)
+            selected[field] = bitmap | _loose_items(entry, dataset_name)
+    return selected
+
+
+def _indexed_positions(entry, dataset_name, args):
+    # Positions (in stored order) matching every indexed filter; the linear pass in
+    # _filter_exchange_items only handles what is left.
+    bitmap = None
+    candidates = _range_candidates(entry, dataset_name, args)
+    if candidates is not None:
+        bitmap = from_positions(candidates)
+    for selected in _selected_facets(entry, dataset_name, args).values():
+        bitmap = selected if bitmap is None else bitmap & selected
+    if bitmap is None:
+        return range(len(_get_list_from_payload(entry['payload'], dataset_name)))
+    return list(iter_positions(bitmap))
+
+
+_THEME_OR_DESCRIPTION_DATASETS = ("currency", "sellChannels", "buyChannels")
+_VERIFIED_DATASETS = ("ads", "buyAds", "other", "services", "currency", "sellChannels", "buyChannels")
+
+
+def _listing_records(entry, dataset_name):
+    # One slots record per stored item (same positions), rebuilt once per dataset version.
+    def build(e):
+        cls = record_type(dataset_name)
+        records = []
+        for pos, it in enumerate(_get_list_from_payload(e['payload'], dataset_name)):
+            if not isinstance(it, dict):
+                records.append(cls(raw=it, position=pos, loose=True))
                 continue
-        if args.get("username", "").strip() and not _item_username_match(item, args.get("username")):
+            search = it.get("theme")
+            if dataset_name in _THEME_OR_DESCRIPTION_DATASETS:
+                search = search or it.get("description")
+            records.append(cls(
+                raw=it,
+                position=pos,
+                loose=False,
+                id=str(it.get("id") or ""),
+                pinned=bool(it.get("pinned")),
+                verified=bool(it.get("verified")),
+                date=_listing_date(it),
+                expires_at=_item_expires_at(dataset_name, it),
+                search=intern_lower(str(search or "")),
+                username=intern_lower(_extract_username_from_item(it)),
+                username_keys=tuple(intern_lower(key) for key in _item_username_keys(it)),
+            ))
+        return records
+
+    return derived(entry, "records", build)
+
+
+def _date_bound(raw, end_of_day=False):
+    # A bare "%Y-%m-%d" upper bound covers that whole day, as the string comparison did.
+    raw = raw.strip()
+    bound = parse_epoch(raw)
+    if bound is not None and end_of_day and len(raw) == 10:
+        bound += 86399
+    return bound
+
+
+def _filter_exchange_items(dataset_name, records, args):
+    if not records:
+        return records
+    now = time.time()
+    search = args.get("themeSearch" if dataset_name == "jobs" else "theme", "").strip().lower()
+    description = args.get("descriptionSearch", "").strip().lower() if dataset_name == "jobs" else ""
+    date_from = _date_bound(args.get("dateFrom", "")) if dataset_name == "other" else None
+    date_to = _date_bound(args.get("dateTo", ""), end_of_day=True) if dataset_name == "other" else None
+    username = args.get("username", "").strip().lstrip("@").lower()
+    result = []
+    for record in records:
+        if record.loose:
+            result.append(record)
+            continue
+        if record.expires_at is not None and now > record.expires_at:
+            continue
+        if search and search not in record.search:
+            continue
+        if description and description not in str(record.raw.get("description") or "").lower():
+            continue
+        if date_to is not None and record.date > date_to:
+            continue
+        if date_from is not None and record.date < date_from:
             continue
-        result.append(item)
+        if username:
+            uname, ulink, uname_from_link = record.username_keys
+            if not (username == uname or username in ulink or username == uname_from_link):
+                continue
+        result.append(record)
     return result
 
 
-def _sort_key_date(item):
-    return (item.get("publishedAt") or item.get("createdAt") or "") if isinstance(item, dict) else ""
+# Pages ending within this fraction of the result are selected with a heap instead of a
+# full sort; heapq.nlargest returns exactly the head of the stable descending sort.
+_TOP_K_MAX_FRACTION = 0.1
 
 
-def _sort_exchange_items(dataset_name, items):
-    if not items:
-        return items
+def _sort_exchange_items(dataset_name, records, verified_overlay=None, count=None):
+    if not records:
+        return records
     pinned_verified_datasets = ("ads",)
-    verified_only_datasets = ("buyAds", "other", "services", "currency", "sellChannels", "buyChannels")
     has_pinned = dataset_name in pinned_verified_datasets
-    has_verified = dataset_name in pinned_verified_datasets or dataset_name in verified_only_datasets
+    has_verified = dataset_name in pinned_verified_datasets or dataset_name in _VERIFIED_DATASETS
+    overlay = verified_overlay or {}
 
-    def key_func(it):
-        if not isinstance(it, dict):
-            return (False, False, "", "")
-        pinned = bool(it.get("pinned")) if has_pinned else False
-        verified = bool(it.get("verified")) if has_verified else False
-        date_str = _sort_key_date(it)
-        item_id = str(it.get("id") or "")
-        return (pinned, verified, date_str, item_id)
+    def key_func(record):
+        if record.loose:
+            return (False, False, _NO_DATE, "")
+        pinned = record.pinned if has_pinned else False
+        verified = overlay.get(record.username, record.verified) if has_verified else False
+        return (pinned, verified, record.date, record.id)
 
-    return sorted(items, key=key_func, reverse=True)
+    if count is not None and 0 <= count <= len(records) * _TOP_K_MAX_FRACTION:
+        return heapq.nlargest(count, records, key=key_func)
+    return sorted(records, key=key_func, reverse=True)
 
 
 def _extract_username_from_item(it: Dict[str, Any]) -> str:
@@ -264,13 +463,16 @@ def _get_verified_from_backend(username: str) -> Optional[bool]:
     if admin_key:
         headers["X-Admin-Key"] = admin_key
     try:
-        resp = requests.get(url, headers=headers, timeout=3)
+        with backend_call("backend", "GET", "/users/by-username") as call:
+            resp = requests.get(url, headers=headers, timeout=3)
+            if not resp.ok:
+                call.fail(resp.status_code)
     except requests.RequestException:
         return None
     if not resp.ok:
         return None
     try:
-        data = resp.json()
+        data = loads(resp.content)
     except ValueError:
         return None
     profile = data.get("profile") or {}
@@ -281,25 +483,38 @@ def _get_verified_from_backend(username: str) -> Optional[bool]:
     return bool(profile.get("verified"))
 
 
-def _refresh_verified_from_backend(dataset_name: str, items: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
-    if dataset_name not in ("ads", "buyAds", "other", "services", "currency", "sellChannels", "buyChannels"):
-        return list(items)
-    username_cache: Dict[str, Optional[bool]] = {}
-    result: List[Dict[str, Any]] = []
-    for raw in items:
-        if not isinstance(raw, dict):
-            result.append(raw)
+def _verified_overlay(dataset_name: str, usernames: Iterable[str]) -> Dict[str, bool]:
+    # Lowercased username -> verified as the backend reports it, looked up once per username.
+    # Stored items are never modified; the overlay feeds the sort key and the returned page.
+    if dataset_name not in _VERIFIED_DATASETS:
+        return {}
+    overlay: Dict[str, bool] = {}
+    seen = set()
+    for username in usernames:
+        if not username or username in seen:
             continue
-        it = dict(raw)
-        username = _extract_username_from_item(it).lower()
-        if username:
-            if username not in username_cache:
-                username_cache[username] = _get_verified_from_backend(username)
-            verified = username_cache[username]
-            if verified is not None:
-                it["verified"] = bool(verified)
-        result.append(it)
-    return result
+        seen.add(username)
+        verified = _get_verified_from_backend(username)
+        if verified is not None:
+            overlay[username] = verified
+    return overlay
+
+
+def _with_verified(item: Dict[str, Any], overlay: Dict[str, bool], username: str) -> Dict[str, Any]:
+    verified = overlay.get(username)
+    if verified is None or item.get("verified") is verified:
+        return item
+    return dict(item, verified=verified)
+
+
+def _refresh_verified_from_backend(dataset_name: str, items: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    items = list(items)
+    usernames = [_extract_username_from_item(it).lower() if isinstance(it, dict) else "" for it in items]
+    overlay = _verified_overlay(dataset_name, usernames)
+    return [
+        _with_verified(it, overlay, username) if isinstance(it, dict) else it
+        for it, username in zip(items, usernames)
+    ]
 
 
 @api_bp.route('/health', methods=['GET'])
@@ -325,9 +540,13 @@ def guarantor_avatar(username):
                 headers={"Cache-Control": f"public, max-age={_GUARANTOR_AVATAR_TTL_SECONDS}"},
             )
 
-    tg_url = f"https://t.me/i/userpic/320/{username_clean}.jpg"
+    base_url = os.getenv("TELEGRAM_WEB_BASE_URL", "https://t.me").rstrip("/")
+    tg_url = f"{base_url}/i/userpic/320/{username_clean}.jpg"
     try:
-        resp = requests.get(tg_url, timeout=3)
+        with backend_call("telegram", "GET", "/i/userpic") as call:
+            resp = requests.get(tg_url, timeout=3)
+            if not resp.ok:
+                call.fail(resp.status_code)
     except requests.RequestException:
         return jsonify({"error": "avatar_unavailable"}), 404
 
@@ -350,43 +569,80 @@ def guarantor_avatar(username):
 
 @api_bp.route('/datasets', methods=['GET'])
 def list_datasets():
-    items = Dataset.query.order_by(Dataset.name.asc()).all()
+    items = db.session.query(Dataset.name, Dataset.updated_at).order_by(Dataset.name.asc()).all()
     return jsonify({
         'datasets': [
             {
-                'name': item.name,
-                'updatedAt': item.updated_at.isoformat() if item.updated_at else None,
+                'name': name,
+                'updatedAt': updated_at.isoformat() if updated_at else None,
             }
-            for item in items
+            for name, updated_at in items
         ]
     })
 
 
+def _resolve_main_page(payload, entries=None):
+    # Returns the resolved payload and the earliest expiry among the offers it kept.
+    if entries is None:
+        entries = {entry['name']: entry for entry in get_dataset_entries(EXCHANGE_DATASETS)}
+    now = time.time()
+    valid_until = []
+
+    def lookup(section, item_id):
+        dataset_name = SECTION_TO_DATASET.get(section)
+        entry = entries.get(dataset_name)
+        if entry is None or entry['invalid']:
+            return None
+        item = _items_by_id(entry, dataset_name).get(item_id)
+        if item is None:
+            return None
+        expires_at = _item_expires_at(dataset_name, item)
+        if expires_at is not None:
+            if now > expires_at:
+                return None
+            valid_until.append(expires_at)
+        return dataset_name, item
+
+    return resolve_hot_offers(payload, lookup), min(valid_until, default=None)
+
+
+def _default_dataset_body(dataset_name):
+    if dataset_name == 'exchangeOptions':
+        payload = DEFAULT_DATASETS.get('exchangeOptions', {'jobTypes': [], 'currencies': []})
+        return {'name': 'exchangeOptions', 'payload': payload, 'updatedAt': None}
+    if dataset_name == 'banners':
+        payload = {'banners': [{'id': 'default-1', 'imageUrl': '/1.png', 'order': 0}]}
+        return {'name': 'banners', 'payload': payload, 'updatedAt': None}
+    return None
+
+
 @api_bp.route('/datasets/<dataset_name>', methods=['GET'])
 def get_dataset(dataset_name):
-    item = Dataset.query.filter_by(name=dataset_name).first()
+    item = get_dataset_entry(dataset_name)
     if not item:
-        if dataset_name == 'exchangeOptions':
-            payload = DEFAULT_DATASETS.get('exchangeOptions', {'jobTypes': [], 'currencies': []})
-            return jsonify({'name': 'exchangeOptions', 'payload': payload, 'updatedAt': None})
-        if dataset_name == 'banners':
-            payload = {'banners': [{'id': 'default-1', 'imageUrl': '/1.png', 'order': 0}]}
-            return jsonify({'name': 'banners', 'payload': payload, 'updatedAt': None})
+        default_body = _default_dataset_body(dataset_name)
+        if default_body is not None:
+            return jsonify(default_body)
         return jsonify({'error': f'Dataset "{dataset_name}" not found'}), 404
 
-    try:
-        payload = json.loads(item.payload)
-    except json.JSONDecodeError:
+    if item['invalid']:
         return jsonify({'error': f'Dataset "{dataset_name}" has invalid JSON in DB'}), 500
+    payload = item['payload']
+    if dataset_name == MAIN_PAGE_DATASET:
+        payload, _ = _resolve_main_page(payload)
+    try:
+        fields = resolve_fields(dataset_name, request.args) if dataset_name in EXCHANGE_DATASETS else None
+    except ValueError as exc:
+        return jsonify({'error': str(exc)}), 400
 
     use_pagination = dataset_name in EXCHANGE_DATASETS and (
         request.args.get('cursor') is not None or request.args.get('limit') is not None
     )
     if use_pagination:
-        raw_list = _get_list_from_payload(payload, dataset_name)
-        filtered = _filter_exchange_items(dataset_name, raw_list, request.args)
-        filtered = _refresh_verified_from_backend(dataset_name, filtered)
-        filtered = _sort_exchange_items(dataset_name, filtered)
+        with stage("filter"):
+            records = _filtered_records(item, dataset_name, request.args)
+        with stage("verify"):
+            overlay = _verified_overlay(dataset_name, (record.username for record in records if not record.loose))
         try:
             offset = int(request.args.get('cursor') or 0)
         except (TypeError, ValueError):
@@ -394,43 +650,341 @@ def get_dataset(dataset_name):
         limit = min(int(request.args.get('limit') or 20), 100)
         if limit < 1:
             limit = 20
-        slice_list = filtered[offset:offset + limit]
+        total = len(records)
+        page_end = offset + limit if offset >= 0 else None
+        with stage("sort"):
+            records = _sort_exchange_items(dataset_name, records, overlay, count=page_end)
+        slice_list = [
+            record.raw if record.loose else _with_verified(record.raw, overlay, record.username)
+            for record in records[offset:offset + limit]
+        ]
         next_offset = offset + len(slice_list)
-        next_cursor = str(next_offset) if next_offset < len(filtered) else None
-        out_payload = {dataset_name: slice_list}
-        return jsonify({
-            'name': item.name,
-            'payload': out_payload,
-            'updatedAt': item.updated_at.isoformat() if item.updated_at else None,
-            'nextCursor': next_cursor,
+        next_cursor = str(next_offset) if next_offset < total else None
+        with stage("serialize"):
+            body = encode_listing({
+                'name': item['name'],
+                'payload': None,
+                'updatedAt': item['updatedAt'].isoformat() if item['updatedAt'] else None,
+                'version': item['version'],
+                'nextCursor': next_cursor,
+            }, dataset_name, encoded_items(item, slice_list, fields))
+        return Response(body, mimetype='application/json')
+
+    if fields is not None:
+        raw_list = _get_list_from_payload(payload, dataset_name)
+        with stage("serialize"):
+            body = encode_listing({
+                'name': item['name'],
+                'payload': None,
+                'updatedAt': item['updatedAt'].isoformat() if item['updatedAt'] else None,
+                'version': item['version'],
+            }, dataset_name, encoded_items(item, raw_list, fields))
+        response = Response(body, mimetype='application/json')
+        response.headers['ETag'] = version_etag(item['version'])
+        if fields == CARD_FIELDS.get(dataset_name):
+            cache_representation('card')
+        return response
+
+    with stage("serialize"):
+        response = jsonify({
+            'name': item['name'],
+            'payload': payload,
+            'updatedAt': item['updatedAt'].isoformat() if item['updatedAt'] else None,
+            'version': item['version'],
         })
+    # The version identifies the body only while hot offer resolution left the payload as stored.
+    if payload is item['payload']:
+        response.headers['ETag'] = version_etag(item['version'])
+        cache_representation('full')
+    return response
 
-    return jsonify({
-        'name': item.name,
-        'payload': payload,
-        'updatedAt': item.updated_at.isoformat() if item.updated_at else None,
-    })
+
+@api_bp.route('/datasets/<dataset_name>/payload', methods=['GET'])
+def get_dataset_payload(dataset_name):
+    item = get_dataset_entry(dataset_name)
+    if not item:
+        default_body = _default_dataset_body(dataset_name)
+        if default_body is not None:
+            return jsonify(default_body['payload'])
+        return jsonify({'error': f'Dataset "{dataset_name}" not found'}), 404
+    if item['invalid']:
+        return jsonify({'error': f'Dataset "{dataset_name}" has invalid JSON in DB'}), 500
+
+    payload = item['payload']
+    if dataset_name == MAIN_PAGE_DATASET:
+        payload, _ = _resolve_main_page(payload)
+    if payload is item['payload'] and item['gzip'] is not None and 'gzip' in request.accept_encodings:
+        response = Response(item['gzip'], mimetype='application/json')
+        response.headers['Content-Encoding'] = 'gzip'
+        # Not byte-identical to the identity body, so the validator must not be strong.
+        response.set_etag(str(item['version']), weak=True)
+    else:
+        response = jsonify(payload)
+        if payload is item['payload']:
+            response.headers['ETag'] = version_etag(item['version'])
+            cache_representation('payload')
+    response.headers['Vary'] = 'Accept-Encoding'
+    return response
+
+
+def _filtered_records(entry, dataset_name, args):
+    records = _listing_records(entry, dataset_name)
+    positions = _indexed_positions(entry, dataset_name, args)
+    if len(positions) != len(records):
+        records = [records[pos] for pos in positions]
+    return _filter_exchange_items(dataset_name, records, args)
+
+
+# Facet counts leave out the facet's own filter, so each option shows what selecting it
+# would return.
+_PRICE_FACET_DATASETS = ("ads", "buyAds")
+DEFAULT_PRICE_BUCKETS = (0, 500, 1000, 2000, 5000, 10000)
+_MAX_PRICE_BUCKETS = 20
+_MAX_PRICE_EDGE = 10 ** 12
+
+
+def _parse_price_buckets(raw):
+    if not (raw or '').strip():
+        return DEFAULT_PRICE_BUCKETS
+    try:
+        edges = sorted({float(part) for part in raw.split(',') if part.strip()})
+    except ValueError:
+        edges = []
+    if not edges or len(edges) > _MAX_PRICE_BUCKETS or not all(0 <= edge <= _MAX_PRICE_EDGE for edge in edges):
+        raise ValueError(f'priceBuckets must list 1 to {_MAX_PRICE_BUCKETS} numbers from 0 to {_MAX_PRICE_EDGE}')
+    return tuple(edges)
+
+
+def _price_bucket_bitmaps(entry, dataset_name, edges):
+    # Bucket [from, to) holds the items a priceFrom=from filter keeps and a strict priceTo=to
+    # filter keeps; for min/max datasets that is every range overlapping the bucket.
+    def build(e):
+        fields = {param: field for param, field, _ in _RANGE_FILTERS[dataset_name]}
+        lower = _range_index(e, dataset_name, fields["priceFrom"])
+        upper = _range_index(e, dataset_name, fields["priceTo"])
+        bounds = list(zip(edges, list(edges[1:]) + [None]))
+        return [
+            (lo, hi, from_positions(lower.at_least(lo) & upper.below(hi) if hi is not None else lower.at_least(lo)))
+            for lo, hi in bounds
+        ]
+
+    # Only the default edges are cached with the version; client-chosen edges would add a
+    # set of bitmaps per distinct query.
+    if edges == DEFAULT_PRICE_BUCKETS:
+        return derived(entry, ("priceBuckets", DEFAULT_PRICE_BUCKETS), build)
+    return build(entry)
+
+
+def _dataset_facets(entry, dataset_name, args, edges):
+    fields = _FACET_FIELDS.get(dataset_name, ())
+    excluded = set(fields)
+    if dataset_name in _PRICE_FACET_DATASETS:
+        excluded.update(("priceFrom", "priceTo"))
+    base_args = {key: value for key, value in args.items() if key not in excluded}
+    base = from_positions(record.position for record in _filtered_records(entry, dataset_name, base_args))
+
+    selected = _selected_facets(entry, dataset_name, args)
+
+    facets = {}
+    for field in fields:
+        mask = base
+        for other, bitmap in selected.items():
+            if other != field:
+                mask &= bitmap
+        facets[field] = {
+            value: (mask & bitmap).bit_count()
+            for value, bitmap in _facet_bitmaps(entry, dataset_name, field).items()
+            if isinstance(value, str) and value
+        }
+
+    matched = base
+    for bitmap in selected.values():
+        matched &= bitmap
+    result = {'facets': facets}
+    if dataset_name in _PRICE_FACET_DATASETS:
+        buckets = _price_bucket_bitmaps(entry, dataset_name, edges)
+        result['priceBuckets'] = [
+            {'from': lo, 'to': hi, 'count': (base & bitmap).bit_count()} for lo, hi, bitmap in buckets
+        ]
+        candidates = _range_candidates(entry, dataset_name, args)
+        if candidates is not None:
+            matched &= from_positions(candidates)
+    result['total'] = matched.bit_count()
+    return result
+
+
+@api_bp.route('/datasets/<dataset_name>/facets', methods=['GET'])
+def get_dataset_facets(dataset_name):
+    if dataset_name not in EXCHANGE_DATASETS:
+        return jsonify({'error': f'Dataset "{dataset_name}" not found'}), 404
+    entry = get_dataset_entry(dataset_name)
+    if not entry:
+        return jsonify({'error': f'Dataset "{dataset_name}" not found'}), 404
+    if entry['invalid']:
+        return jsonify({'error': 'Invalid dataset payload'}), 500
+    try:
+        edges = _parse_price_buckets(request.args.get('priceBuckets'))
+    except ValueError as exc:
+        return jsonify({'error': str(exc)}), 400
+    body = _dataset_facets(entry, dataset_name, request.args, edges)
+    body.update({'name': dataset_name, 'version': entry['version']})
+    return jsonify(body)
 
 
 @api_bp.route('/datasets/<dataset_name>/items/<item_id>', methods=['GET'])
 def get_dataset_item(dataset_name, item_id):
     if dataset_name not in EXCHANGE_DATASETS:
         return jsonify({'error': f'Dataset "{dataset_name}" not found'}), 404
-    row = Dataset.query.filter_by(name=dataset_name).first()
-    if not row:
+    entry = get_dataset_entry(dataset_name)
+    if not entry:
         return jsonify({'error': f'Dataset "{dataset_name}" not found'}), 404
+    if entry['invalid']:
+        return jsonify({'error': 'Invalid dataset payload'}), 500
+    it = _items_by_id(entry, dataset_name).get(str(item_id).strip())
+    if it is None:
+        return jsonify({'error': 'Item not found'}), 404
     try:
-        payload = json.loads(row.payload)
-    except json.JSONDecodeError:
+        fields = resolve_fields(dataset_name, request.args)
+    except ValueError as exc:
+        return jsonify({'error': str(exc)}), 400
+    items_with_single = _refresh_verified_from_backend(dataset_name, [it])
+    item_out = items_with_single[0] if items_with_single else it
+    return jsonify({'item': project_item(item_out, fields), 'name': dataset_name})
+
+
+def _dataset_delta(entry, dataset_name, since):
+    version = entry['version']
+    key = (dataset_name, since, version)
+    cached = _DELTA_CACHE.get(key)
+    if cached is not None:
+        return cached
+
+    result = {
+        'name': dataset_name,
+        'since': since,
+        'version': version,
+        'reset': False,
+        'inserted': [],
+        'updated': [],
+        'removed': [],
+    }
+    if since == version:
+        return result
+    # The client is ahead of us or older than the retained log: it has to refetch.
+    if since > version or since < get_item_change_log_start():
+        result['reset'] = True
+        return result
+
+    rows = (
+        db.session.query(DatasetItemChange.item_id, DatasetItemChange.op)
+        .filter(
+            DatasetItemChange.dataset_name == dataset_name,
+            DatasetItemChange.change_id > since,
+            DatasetItemChange.change_id <= version,
+        )
+        .order_by(DatasetItemChange.id.asc())
+        .all()
+    )
+    existed_before = {}
+    for changed_id, op in rows:
+        if op == 'reset':
+            result['reset'] = True
+            break
+        existed_before.setdefault(changed_id, op != 'insert')
+
+    if not result['reset']:
+        items_by_id = _items_by_id(entry, dataset_name)
+        for changed_id, existed in existed_before.items():
+            it = items_by_id.get(changed_id)
+            if it is None:
+                if existed:
+                    result['removed'].append(changed_id)
+            elif existed:
+                result['updated'].append(it)
+            else:
+                result['inserted'].append(it)
+
+    if len(_DELTA_CACHE) >= _DELTA_CACHE_SIZE:
+        _DELTA_CACHE.clear()
+    _DELTA_CACHE[key] = result
+    return result
+
+
+@api_bp.route('/datasets/<dataset_name>/changes', methods=['GET'])
+def get_dataset_changes(dataset_name):
+    if dataset_name not in EXCHANGE_DATASETS:
+        return jsonify({'error': f'Dataset "{dataset_name}" not found'}), 404
+    try:
+        since = int(request.args.get('since', ''))
+    except ValueError:
+        return jsonify({'error': 'since must be an integer version'}), 400
+    entry = get_dataset_entry(dataset_name)
+    if not entry:
+        return jsonify({'error': f'Dataset "{dataset_name}" not found'}), 404
+    if entry['invalid']:
         return jsonify({'error': 'Invalid dataset payload'}), 500
-    raw_list = _get_list_from_payload(payload, dataset_name)
-    item_id_str = str(item_id).strip()
-    for it in raw_list:
-        if isinstance(it, dict) and str(it.get("id", "")).strip() == item_id_str:
-            items_with_single = _refresh_verified_from_backend(dataset_name, [it])
-            item_out = items_with_single[0] if items_with_single else it
-            return jsonify({'item': item_out, 'name': dataset_name})
-    return jsonify({'error': 'Item not found'}), 404
+    return jsonify(_dataset_delta(entry, dataset_name, since))
+
+
+@api_bp.route('/datasets/<dataset_name>/events', methods=['GET'])
+def dataset_events(dataset_name):
+    if dataset_name not in EXCHANGE_DATASETS:
+        return jsonify({'error': f'Dataset "{dataset_name}" not found'}), 404
+    entry = get_dataset_entry(dataset_name)
+    if not entry:
+        return jsonify({'error': f'Dataset "{dataset_name}" not found'}), 404
+    try:
+        resume_from = int(request.headers.get('Last-Event-ID') or request.args.get('lastEventId') or '')
+    except ValueError:
+        resume_from = None
+    try:
+        sub = subscribe(f'dataset:{dataset_name}', current_app._get_current_object())
+    except SubscriberLimitReached:
+        return (
+            jsonify({'error': 'Too many open event streams, retry later'}),
+            503,
+            {'Retry-After': str(SSE_RETRY_AFTER_SECONDS)},
+        )
+
+    def stream():
+        version = entry['version'] if resume_from is None else resume_from
+        pending = resume_from is not None and resume_from != entry['version']
+        try:
+            yield 'retry: 3000\n\n'
+            if not pending:
+                yield format_event({'name': dataset_name, 'version': version}, 'ready', version)
+            while True:
+                if not pending:
+                    if sub.wait() is None:
+                        yield heartbeat()
+                        continue
+                pending = False
+                if sub.overflowed:
+                    yield format_event({'name': dataset_name, 'version': version, 'reset': True}, 'reset')
+                    return
+                try:
+                    current = get_dataset_entry(dataset_name)
+                    if not current or current['invalid']:
+                        delta = {'name': dataset_name, 'version': version, 'reset': True}
+                    else:
+                        delta = _dataset_delta(current, dataset_name, version)
+                finally:
+                    # Idle streams must not hold a pooled connection between wakes.
+                    db.session.close()
+                if delta['version'] == version and not delta['reset']:
+                    continue
+                version = delta['version']
+                yield format_event(delta, 'reset' if delta['reset'] else 'changes', version)
+        finally:
+            unsubscribe(sub)
+
+    # The lookups above checked out a connection; release it before the stream starts idling.
+    db.session.close()
+    return Response(
+        stream_with_context(stream()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'},
+    )
 
 
 @api_bp.route('/users/<username>/listings', methods=['GET'])
@@ -439,27 +993,16 @@ def get_user_listings(username):
     if not username_clean:
         return jsonify({'items': [], 'nextCursor': None})
 
-    rows = Dataset.query.filter(Dataset.name.in_(EXCHANGE_DATASETS)).all()
-    datasets_by_name = {r.name: r for r in rows}
+    entries_by_name = {e['name']: e for e in get_dataset_entries(EXCHANGE_DATASETS)}
 
-    merged = []
-    args_username = {"username": username_clean}
+    runs = []
+    query = username_clean.strip().lstrip("@").lower()
+    now = time.time()
     for dataset_name in EXCHANGE_DATASETS:
-        row = datasets_by_name.get(dataset_name)
-        if not row:
-            continue
-        try:
-            payload = json.loads(row.payload)
-        except json.JSONDecodeError:
+        entry = entries_by_name.get(dataset_name)
+        if not entry or entry['invalid']:
             continue
-        raw_list = _get_list_from_payload(payload, dataset_name)
-        filtered = _filter_exchange_items(dataset_name, raw_list, args_username)
-        filtered = _refresh_verified_from_backend(dataset_name, filtered)
-        for it in filtered:
-            if isinstance(it, dict):
-                merged.append(_listing_snippet(dataset_name, it))
-
-    merged.sort(key=lambda x: (x.get("publishedAt") or ""), reverse=True)
+        runs.append(_user_listing_snippets(entry, dataset_name, query, now))
 
     try:
         offset = int(request.args.get("cursor") or 0)
@@ -468,9 +1011,19 @@ def get_user_listings(username):
     limit = min(int(request.args.get("limit") or 20), 100)
     if limit < 1:
         limit = 20
-    slice_list = merged[offset:offset + limit]
+    # Runs are newest first already; the merge keeps category order for equal dates, as the
+    # stable sort over the concatenation did. One extra item tells whether a next page exists.
+    merged = (snippet for _, snippet in heapq.merge(*runs, key=lambda run_item: run_item[0], reverse=True))
+    if offset >= 0:
+        head = list(itertools.islice(merged, offset + limit + 1))
+        slice_list = head[offset:offset + limit]
+        has_more = len(head) > offset + limit
+    else:
+        merged = list(merged)
+        slice_list = merged[offset:offset + limit]
+        has_more = offset + len(slice_list) < len(merged)
     next_offset = offset + len(slice_list)
-    next_cursor = str(next_offset) if next_offset < len(merged) else None
+    next_cursor = str(next_offset) if has_more else None
 
     return jsonify({"items": slice_list, "nextCursor": next_cursor})
 
@@ -488,7 +1041,7 @@ def upsert_dataset(dataset_name):
         return jsonify({'error': 'Body must contain "payload"'}), 400
 
     payload = body['payload']
-    payload_json = json.dumps(payload, ensure_ascii=False)
+    payload_json = dumps(payload)
 
     item = Dataset.query.filter_by(name=dataset_name).first()
     if item:
@@ -503,7 +1056,62 @@ def upsert_dataset(dataset_name):
         'ok': True,
         'name': item.name,
         'updatedAt': item.updated_at.isoformat() if item.updated_at else None,
+        'version': dataset_version(item.name),
+    })
+
+
+@api_bp.route('/datasets/<dataset_name>', methods=['PATCH'])
+def patch_dataset(dataset_name):
+    admin_token = os.getenv('ADMIN_API_TOKEN', '')
+    if admin_token:
+        incoming_token = request.headers.get('X-Admin-Token', '')
+        if incoming_token != admin_token:
+            return jsonify({'error': 'Forbidden'}), 403
+
+    if is_weak_etag(request.headers.get('If-Match')):
+        return jsonify({'error': 'If-Match needs the strong ETag of the dataset'}), 412
+    expected_version = parse_version_etag(request.headers.get('If-Match'))
+    if expected_version is None:
+        return jsonify({'error': 'If-Match header with the current dataset version is required'}), 428
+
+    patch = request.get_json(silent=True)
+    if patch is None:
+        return jsonify({'error': 'Body must be a JSON patch document'}), 400
+
+    item = lock_dataset(dataset_name)
+    if not item:
+        return jsonify({'error': f'Dataset "{dataset_name}" not found'}), 404
+
+    version = dataset_version(dataset_name)
+    if version != expected_version:
+        return jsonify({'error': 'Dataset version mismatch', 'version': version}), 412
+
+    try:
+        payload = loads(item.payload)
+    except json.JSONDecodeError:
+        return jsonify({'error': f'Dataset "{dataset_name}" has invalid JSON in DB'}), 500
+
+    try:
+        payload = apply_patch(payload, patch, request.mimetype)
+    except UnsupportedPatchFormat as exc:
+        return jsonify({'error': str(exc)}), 415
+    except JsonPatchConflict as exc:
+        return jsonify({'error': str(exc)}), 409
+    except JsonPatchError as exc:
+        return jsonify({'error': str(exc)}), 400
+
+    item.payload = dumps(payload)
+    db.session.commit()
+
+    version = dataset_version(item.name)
+    response = jsonify({
+        'ok': True,
+        'name': item.name,
+        'updatedAt': item.updated_at.isoformat() if item.updated_at else None,
+        'version': version,
     })
+    response.headers['ETag'] = version_etag(version)
+    return response
 
 
 @api_bp.route('/exchange/hide-item', methods=['POST'])
@@ -540,7 +1148,7 @@ def hide_exchange_item():
     row = Dataset.query.filter_by(name=dataset_name).first()
     if row:
         try:
-            payload = json.loads(row.payload)
+            payload = loads(row.payload)
         except json.JSONDecodeError:
             return jsonify({'error': f'Dataset "{dataset_name}" has invalid JSON in DB'}), 500
         raw_list = _get_list_from_payload(payload, dataset_name)
@@ -559,33 +1167,12 @@ def hide_exchange_item():
                     payload[dataset_name] = filtered
                 elif isinstance(payload.get('items'), list):
                     payload['items'] = filtered
-                row.payload = json.dumps(payload, ensure_ascii=False)
+                row.payload = dumps(payload)
                 db.session.commit()
 
-    main_row = Dataset.query.filter_by(name='mainPage').first()
-    if main_row:
-        try:
-            main_payload = json.loads(main_row.payload)
-        except json.JSONDecodeError:
-            main_payload = {}
-        hot = main_payload.get('hotOffers')
-        if isinstance(hot, dict):
-            offers = hot.get('offers')
-            if isinstance(offers, list):
-                new_offers = []
-                for offer in offers:
-                    if isinstance(offer, dict) and offer.get('type') == 'ad':
-                        offer_category = str(offer.get('category') or '').strip()
-                        offer_item_id = str(offer.get('itemId') or '').strip()
-                        if offer_category == section and offer_item_id == item_id:
-                            removed_from_hot_offers = True
-                            continue
-                    new_offers.append(offer)
-                if removed_from_hot_offers:
-                    hot['offers'] = new_offers
-                    main_payload['hotOffers'] = hot
-                    main_row.payload = json.dumps(main_payload, ensure_ascii=False)
-                    db.session.commit()
+    if remove_hot_offers(section, item_id):
+        removed_from_hot_offers = True
+        db.session.commit()
 
     return jsonify({
         'ok': True,
@@ -602,21 +1189,20 @@ def seed_defaults_info():
 
 @api_bp.route('/stats/active-ads-total', methods=['GET'])
 def active_ads_total():
+    entries_by_name = {e['name']: e for e in get_dataset_entries(EXCHANGE_DATASETS)}
+    return jsonify(_active_ads_counts(entries_by_name))
+
+
+def _active_ads_counts(entries_by_name):
     total = 0
     per_category = {}
-
     for dataset_name in EXCHANGE_DATASETS:
-        row = Dataset.query.filter_by(name=dataset_name).first()
-        if not row:
-            per_category[dataset_name] = 0
-            continue
-
-        try:
-            payload = json.loads(row.payload)
-        except json.JSONDecodeError:
+        entry = entries_by_name.get(dataset_name)
+        if not entry or entry['invalid']:
             per_category[dataset_name] = 0
             continue
 
+        payload = entry['payload']
         items_count = 0
         if isinstance(payload, dict):
             for value in payload.values():
@@ -627,4 +1213,91 @@ def active_ads_total():
         per_category[dataset_name] = items_count
         total += items_count
 
-    return jsonify({'activeAdsTotal': total, 'perCategory': per_category})
+    return {'activeAdsTotal': total, 'perCategory': per_category}
+
+
+MAIN_PAGE_BUNDLE_DATASETS = [MAIN_PAGE_DATASET, 'banners', 'faq', 'exchangeOptions', 'guarantConfig']
+
+# Encoded bundle for the dataset versions it was built from; rebuilt on the first request
+# after any of them changes (or after a kept hot offer expires).
+_MAIN_PAGE_BUNDLE: Dict[str, Any] = {'current': None}
+
+
+def _dataset_body(entry):
+    return {
+        'name': entry['name'],
+        'payload': entry['payload'],
+        'updatedAt': entry['updatedAt'].isoformat() if entry['updatedAt'] else None,
+        'version': entry['version'],
+    }
+
+
+def warm_derived_structures():
+    # Builds the per-version indexes requests would otherwise build lazily. Under
+    # GUNICORN_PRELOAD this runs in the master before gc.freeze(), so the workers share them.
+    for entry in get_dataset_entries(EXCHANGE_DATASETS + [MAIN_PAGE_DATASET]):
+        dataset_name = entry['name']
+        if entry['invalid']:
+            continue
+        if dataset_name == MAIN_PAGE_DATASET:
+            hot_offer_refs(entry)
+            continue
+        _listing_records(entry, dataset_name)
+        _items_by_id(entry, dataset_name)
+        _user_listings_index(entry, dataset_name)
+        _loose_items(entry, dataset_name)
+        for _, field, _ in _RANGE_FILTERS.get(dataset_name, ()):
+            _range_index(entry, dataset_name, field)
+        for field in _FACET_FIELDS.get(dataset_name, ()):
+            _facet_bitmaps(entry, dataset_name, field)
+        if dataset_name in _PRICE_FACET_DATASETS:
+            _price_bucket_bitmaps(entry, dataset_name, DEFAULT_PRICE_BUCKETS)
+
+
+def build_main_page_bundle():
+    entries = {e['name']: e for e in get_dataset_entries(MAIN_PAGE_BUNDLE_DATASETS + EXCHANGE_DATASETS)}
+    key = tuple(sorted((name, e['version'], e['invalid']) for name, e in entries.items()))
+    cached = _MAIN_PAGE_BUNDLE['current']
+    if cached and cached['key'] == key and (
+        cached['validUntil'] is None or time.time() <= cached['validUntil']
+    ):
+        return cached
+
+    version = max((e['version'] for e in entries.values()), default=0)
+    datasets = {}
+    valid_until = None
+    for name in MAIN_PAGE_BUNDLE_DATASETS:
+        entry = entries.get(name)
+        if entry is None:
+            datasets[name] = _default_dataset_body(name)
+        elif entry['invalid']:
+            datasets[name] = None
+        else:
+            datasets[name] = _dataset_body(entry)
+            if name == MAIN_PAGE_DATASET:
+                datasets[name]['payload'], valid_until = _resolve_main_page(entry['payload'], entries)
+    body = dumpb({
+        'version': version,
+        'datasets': datasets,
+        'stats': _active_ads_counts(entries),
+    })
+    bundle = {
+        'key': key,
+        'validUntil': valid_until,
+        'body': body,
+        'etag': hashlib.sha1(body).hexdigest()[:20],
+    }
+    _MAIN_PAGE_BUNDLE['current'] = bundle
+    return bundle
+
+
+@api_bp.route('/bundles/main-page', methods=['GET'])
+def main_page_bundle():
+    bundle = build_main_page_bundle()
+    if request.if_none_match.contains_weak(bundle['etag']):
+        response = Response(status=304)
+    else:
+        response = Response(bundle['body'], mimetype='application/json')
+        cache_representation('bundle')
+    response.set_etag(bundle['etag'])
+    return response
@@ -4,8 +4,14 @@ from werkzeug.middleware.proxy_fix import ProxyFix
 from dotenv import load_dotenv
 import os
 
+from codec import CodecJSONProvider
+from compression import init_compression
+from metrics import init_metrics
+from profiling import init_profiling
+from query_stats import init_query_stats
 from models import db, init_all_models, Moderator, ModeratorActionLog
-from api_routes import api_bp
+from dataset_cache import CONFIG_DATASETS, warm_dataset_cache
+from api_routes import EXCHANGE_DATASETS, api_bp, build_main_page_bundle, warm_derived_structures
 from admin_routes import admin_bp
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -17,6 +23,7 @@ load_dotenv(env_path)
 load_dotenv(admin_env_path)
 
 app = Flask(__name__, template_folder="views")
+app.json = CodecJSONProvider(app)
 
 app.wsgi_app = ProxyFix(app.wsgi_app, x_for=1, x_proto=1, x_host=1)
 
@@ -32,7 +39,9 @@ else:
 
 os.makedirs(data_dir, exist_ok=True)
 
-app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{os.path.join(data_dir, "app.db")}'
+app.config['SQLALCHEMY_DATABASE_URI'] = (
+    os.getenv('SQLALCHEMY_DATABASE_URI') or f'sqlite:///{os.path.join(data_dir, "app.db")}'
+)
 app.config['SQLALCHEMY_TRACK_MODIFICATIONS'] = False
 
 db.init_app(app)
@@ -40,6 +49,10 @@ db.init_app(app)
 app.register_blueprint(api_bp)
 app.register_blueprint(admin_bp)
 
+init_profiling(app, os.path.join(data_dir, 'profiles'))
+init_metrics(app)
+init_compression(app)
+
 _db_initialized = False
 
 def init_db():
@@ -49,10 +62,23 @@ def init_db():
             init_all_models(PROJECT_ROOT)
         _db_initialized = True
 
+def warm_up():
+    init_db()
+    if os.getenv('DATASET_WARMUP', 'False') != 'True':
+        return []
+    with app.app_context():
+        warmed = warm_dataset_cache(EXCHANGE_DATASETS + CONFIG_DATASETS)
+        warm_derived_structures()
+        build_main_page_bundle()
+        return warmed
+
 @app.before_request
 def before_first_request():
     init_db()
 
+# After the hook above, so one-time seeding is not counted against the first request.
+init_query_stats(app)
+
 @app.route('/', methods=['GET'])
 def index():
     return jsonify({
@@ -63,6 +89,9 @@ def index():
             'listDatasets': '/api/datasets',
             'getDataset': '/api/datasets/<name>',
             'upsertDataset': 'PUT /api/datasets/<name>',
+            'datasetFacets': '/api/datasets/<name>/facets',
+            'mainPageBundle': '/api/bundles/main-page',
+            'metrics': '/metrics',
         },
     })
 
@@ -0,0 +1,180 @@
+"""Benchmarks for the content API.
+
+Run from the admin directory:
+
+    python -m bench run --sizes 1000,5000 --out bench-report.json
+    python -m bench compare base.json head.json
+    python -m bench stub --port 3001 --users 500 --pending 50 --telegram-rate-limit 30
+
+Each run uses a throwaway SQLite database filled with synthetic listings and a stub
+backend/Telegram API, so reports from different commits are comparable. "stub" serves the
+same stub on its own for manual runs: start the admin service with BACKEND_API_URL,
+TELEGRAM_API_BASE_URL and TELEGRAM_WEB_BASE_URL pointing at it.
+"""
+import argparse
+import os
+import sys
+import tempfile
+
+
+def _configure_environment(workdir: str, backend_url: str):
+    # Must happen before the app modules are imported: some read their settings at import.
+    os.environ["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    os.environ["BACKEND_API_URL"] = backend_url
+    os.environ["TELEGRAM_API_BASE_URL"] = backend_url
+    os.environ["TELEGRAM_WEB_BASE_URL"] = backend_url
+    os.environ["BOT_TOKEN"] = "bench-token"
+    os.environ.setdefault("DATASET_CHANGE_RETENTION_DAYS", "0")
+
+
+def _seed(app, size: int, seed: int):
+    from bench.synthetic import generate_payloads
+    from codec import dumps
+    from models import Dataset, db
+
+    with app.app_context():
+        for name, payload in generate_payloads(size, seed).items():
+            row = Dataset.query.filter_by(name=name).first()
+            if row is None:
+                db.session.add(Dataset(name=name, payload=dumps(payload)))
+            else:
+                row.payload = dumps(payload)
+        db.session.commit()
+
+
+def _add_fault_arguments(parser):
+    from bench.stub_backend import GROUPS, Faults
+
+    for group in GROUPS:
+        for field in Faults.FIELDS:
+            parser.add_argument(f"--{group}-{field.replace('_', '-')}", type=float, default=None)
+
+
+def _start_stub(args):
+    from bench.stub_backend import GROUPS, Faults, StubBackend
+
+    stub = StubBackend(host=getattr(args, "host", "127.0.0.1"), port=getattr(args, "port", 0), seed=args.seed)
+    for group in GROUPS:
+        values = {field: getattr(args, f"{group}_{field}") for field in Faults.FIELDS}
+        stub.configure(group, **{field: value for field, value in values.items() if value is not None})
+    return stub.start()
+
+
+def cmd_run(args):
+    backend = _start_stub(args)
+    with tempfile.TemporaryDirectory(prefix="admin-bench-") as workdir:
+        _configure_environment(workdir, backend.url)
+        from admin_routes import ADMIN_PASSWORD
+        from app import app, init_db
+        from bench.admin_flows import run_admin
+        from bench.load import AppServer, run_load
+        from bench.synthetic import usernames
+
+        backend.add_users(usernames(args.broadcast_users))
+        from bench.micro import run_micro
+        from bench.report import report_meta, write_report
+
+        init_db()
+        sizes = [int(size) for size in args.sizes.split(",") if size.strip()]
+        report = {
+            "meta": report_meta({
+                "sizes": sizes,
+                "seed": args.seed,
+                "iterations": args.iterations,
+                "requests": args.requests,
+                "concurrency": args.concurrency,
+                "broadcasts": args.broadcasts,
+                "broadcastUsers": args.broadcast_users,
+                "approvals": args.approvals,
+                "faults": {group: faults.as_dict() for group, faults in backend.faults.items()},
+            }),
+            "micro": {},
+            "http": {},
+            "admin": {},
+        }
+        server = None if args.skip_http and args.skip_admin else AppServer(app).start()
+        try:
+            for size in sizes:
+                print(f"size {size}: seeding", file=sys.stderr)
+                _seed(app, size, args.seed)
+                if not args.skip_micro:
+                    print(f"size {size}: micro-benchmarks", file=sys.stderr)
+                    report["micro"][str(size)] = run_micro(app, size, args.iterations)
+                if not args.skip_http:
+                    print(f"size {size}: http scenarios", file=sys.stderr)
+                    report["http"][str(size)] = run_load(server.url, size, args.requests, args.concurrency)
+                if not args.skip_admin:
+                    # Approvals append listings, so this goes last for each size.
+                    print(f"size {size}: admin flows", file=sys.stderr)
+                    report["admin"][str(size)] = run_admin(
+                        server.url, backend, ADMIN_PASSWORD, args.broadcasts, args.approvals, args.seed
+                    )
+        finally:
+            if server is not None:
+                server.stop()
+            backend.stop()
+    write_report(args.out, report)
+    print(f"Report written to {args.out}", file=sys.stderr)
+
+
+def cmd_stub(args):
+    from bench.admin_flows import add_pending_requests
+    from bench.synthetic import usernames
+
+    stub = _start_stub(args)
+    stub.add_users(usernames(args.users))
+    add_pending_requests(stub, args.pending, args.seed)
+    print(f"Stub backend and Telegram API listening on {stub.url}", file=sys.stderr)
+    try:
+        stub.thread.join()
+    except KeyboardInterrupt:
+        stub.stop()
+
+
+def cmd_compare(args):
+    from bench.report import compare_reports, load_report
+
+    for line in compare_reports(load_report(args.base), load_report(args.head)):
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(prog="python -m bench", description=__doc__.splitlines()[0])
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    run = sub.add_parser("run", help="Run micro-benchmarks and HTTP scenarios, write a JSON report.")
+    run.add_argument("--sizes", default="1000,5000", help="Comma-separated listings per category.")
+    run.add_argument("--seed", type=int, default=1)
+    run.add_argument("--iterations", type=int, default=200, help="Micro-benchmark iterations per scenario.")
+    run.add_argument("--requests", type=int, default=100, help="HTTP requests per scenario.")
+    run.add_argument("--concurrency", type=int, default=8)
+    run.add_argument("--broadcasts", type=int, default=3, help="sendToAll broadcasts per size.")
+    run.add_argument("--broadcast-users", type=int, default=200, help="Users the stub backend returns.")
+    run.add_argument("--approvals", type=int, default=20, help="Moderation requests approved per size.")
+    run.add_argument("--skip-micro", action="store_true")
+    run.add_argument("--skip-http", action="store_true")
+    run.add_argument("--skip-admin", action="store_true")
+    run.add_argument("--out", default="bench-report.json")
+    _add_fault_arguments(run)
+    run.set_defaults(func=cmd_run)
+
+    stub = sub.add_parser("stub", help="Serve the stub backend and Telegram API until interrupted.")
+    stub.add_argument("--host", default="127.0.0.1")
+    stub.add_argument("--port", type=int, default=3001)
+    stub.add_argument("--seed", type=int, default=1)
+    stub.add_argument("--users", type=int, default=200)
+    stub.add_argument("--pending", type=int, default=20, help="Pending moderation requests to create.")
+    _add_fault_arguments(stub)
+    stub.set_defaults(func=cmd_stub)
+
+    compare = sub.add_parser("compare", help="Show per-metric changes between two reports.")
+    compare.add_argument("base")
+    compare.add_argument("head")
+    compare.set_defaults(func=cmd_compare)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
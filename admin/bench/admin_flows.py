@@ -0,0 +1,82 @@
+import random
+import time
+from typing import Any, Dict, List
+
+import requests
+
+from admin_routes import MODERATION_SECTION_TO_DATASET
+from bench.report import summarize
+from bench.synthetic import form_data
+
+
+def login(base_url: str, password: str) -> requests.Session:
+    session = requests.Session()
+    response = session.post(f"{base_url}/admin/login", data={"password": password}, allow_redirects=False, timeout=30)
+    if response.status_code != 302 or "/admin/login" in response.headers.get("Location", ""):
+        raise RuntimeError(f"Admin login failed with status {response.status_code}")
+    return session
+
+
+def run_broadcasts(session: requests.Session, base_url: str, rounds: int) -> Dict[str, Any]:
+    # sendToAll: one backend /users call, then one Telegram sendMessage per recipient.
+    latencies: List[float] = []
+    sent = failed = errors = 0
+    for i in range(rounds):
+        start = time.perf_counter()
+        response = session.post(
+            f"{base_url}/admin/api/bot/send-message",
+            json={"message": f"Benchmark broadcast #{i}", "sendToAll": True},
+            timeout=600,
+        )
+        latencies.append(time.perf_counter() - start)
+        if not response.ok:
+            errors += 1
+            continue
+        data = response.json()
+        sent += int(data.get("sent") or 0)
+        failed += len(data.get("failed") or [])
+    summary = summarize(latencies)
+    elapsed = sum(latencies)
+    summary["errors"] = errors
+    summary["sent"] = sent
+    summary["failed"] = failed
+    summary["messages_per_second"] = round(sent / elapsed, 1) if elapsed else 0.0
+    return summary
+
+
+def add_pending_requests(stub, count: int, seed: int) -> List[str]:
+    rng = random.Random(f"{seed}:moderation:{len(stub.moderation)}")
+    sections = sorted(MODERATION_SECTION_TO_DATASET)
+    users = stub.users
+    request_ids = []
+    for i in range(count):
+        section = sections[i % len(sections)]
+        user = users[i % len(users)] if users else None
+        username = user["username"] if user else f"bench_user_{i}"
+        request_ids.append(stub.add_moderation_request(section, form_data(section, rng, username), user))
+    return request_ids
+
+
+def run_approvals(session: requests.Session, base_url: str, stub, count: int, seed: int) -> Dict[str, Any]:
+    # Each approve reads the request (and its author) from the backend, appends the listing
+    # to its dataset and marks the request approved.
+    request_ids = add_pending_requests(stub, count, seed)
+    latencies: List[float] = []
+    errors = 0
+    for request_id in request_ids:
+        start = time.perf_counter()
+        response = session.patch(f"{base_url}/admin/api/moderation/requests/{request_id}/approve", json={}, timeout=60)
+        latencies.append(time.perf_counter() - start)
+        if not response.ok:
+            errors += 1
+    summary = summarize(latencies)
+    summary["errors"] = errors
+    return summary
+
+
+def run_admin(base_url: str, stub, password: str, broadcasts: int, approvals: int, seed: int) -> Dict[str, Any]:
+    session = login(base_url, password)
+    return {
+        "broadcast": run_broadcasts(session, base_url, broadcasts),
+        "moderation-approve": run_approvals(session, base_url, stub, approvals, seed),
+    }
@@ -0,0 +1,86 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List
+
+import requests
+from werkzeug.serving import WSGIRequestHandler, make_server
+
+from bench.report import summarize
+
+
+def http_scenarios(size: int) -> Dict[str, str]:
+    return {
+        "ads-page1": "/api/datasets/ads?limit=20",
+        "ads-deep": f"/api/datasets/ads?limit=20&cursor={size // 2}",
+        "ads-price": "/api/datasets/ads?limit=20&priceFrom=1000&priceTo=20000",
+        "ads-card": "/api/datasets/ads?limit=20&projection=card",
+        "ads-full": "/api/datasets/ads",
+        "buyAds-page1": "/api/datasets/buyAds?limit=20",
+        "jobs-categorical": "/api/datasets/jobs?limit=20&offerType=seeking&work=editor",
+        "jobs-facets": "/api/datasets/jobs/facets?offerType=seeking",
+        "other-page1": "/api/datasets/other?limit=20",
+        "item": "/api/datasets/ads/items/ads-1",
+        "user-listings": "/api/users/bench_user_1/listings?limit=20",
+        "main-page-bundle": "/api/bundles/main-page",
+    }
+
+
+class _QuietRequestHandler(WSGIRequestHandler):
+    def log_request(self, code="-", size="-"):
+        pass
+
+
+class AppServer:
+    def __init__(self, app, host: str = "127.0.0.1"):
+        self.server = make_server(host, 0, app, threaded=True, request_handler=_QuietRequestHandler)
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.server.host}:{self.server.port}"
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+
+
+def _worker(base_url: str, path: str, count: int, latencies: List[float], errors: List[int]):
+    session = requests.Session()
+    for _ in range(count):
+        start = time.perf_counter()
+        try:
+            response = session.get(base_url + path, timeout=30)
+            response.content
+            failed = response.status_code >= 400
+        except requests.RequestException:
+            failed = True
+        latencies.append(time.perf_counter() - start)
+        if failed:
+            errors.append(1)
+
+
+def run_scenario(base_url: str, path: str, total: int, concurrency: int, warmup: int) -> Dict[str, Any]:
+    _worker(base_url, path, warmup, [], [])
+    latencies: List[float] = []
+    errors: List[int] = []
+    per_worker = [total // concurrency + (1 if i < total % concurrency else 0) for i in range(concurrency)]
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for count in per_worker:
+            pool.submit(_worker, base_url, path, count, latencies, errors)
+    elapsed = time.perf_counter() - started
+    summary = summarize(latencies)
+    summary["errors"] = len(errors)
+    summary["rps"] = round(len(latencies) / elapsed, 1) if elapsed else 0.0
+    return summary
+
+
+def run_load(base_url: str, size: int, total: int, concurrency: int, warmup: int = 5) -> Dict[str, Any]:
+    return {
+        name: run_scenario(base_url, path, total, concurrency, warmup)
+        for name, path in http_scenarios(size).items()
+    }
@@ -0,0 +1,99 @@
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from typing import Any, Dict
+
+import api_routes
+from bench.report import summarize
+from bench.stub_backend import is_verified
+from dataset_cache import get_dataset_entry
+from projections import encode_listing, encoded_items
+
+
+def scenarios(size: int) -> Dict[str, Dict[str, Dict[str, str]]]:
+    month_ago = (datetime.utcnow() - timedelta(days=30)).strftime("%Y-%m-%d")
+    deep = {"cursor": str(size // 2)}
+    return {
+        "ads": {
+            "page1": {},
+            "deep": deep,
+            "price": {"priceFrom": "1000", "priceTo": "20000"},
+            "theme": {"theme": "крипто"},
+            "card": {"projection": "card"},
+        },
+        "buyAds": {"page1": {}, "price": {"priceFrom": "5000"}, "views": {"viewsFrom": "20000", "viewsTo": "60000"}},
+        "jobs": {
+            "page1": {},
+            "categorical": {"offerType": "seeking", "work": "editor", "paymentCurrency": "usd"},
+            "search": {"descriptionSearch": "удаленно"},
+        },
+        "services": {"page1": {}, "theme": {"theme": "дизайн"}},
+        "currency": {"page1": {}},
+        "sellChannels": {"page1": {}, "deep": deep},
+        "buyChannels": {"page1": {}, "reach": {"reachFrom": "10000", "priceTo": "500000"}},
+        "other": {"page1": {}, "dates": {"dateFrom": month_ago}, "username": {"username": "bench_user_1"}},
+    }
+
+
+@contextmanager
+def _stubbed_verified_lookup():
+    # Micro-benchmarks time our own pipeline: verified lookups answer from the stub's rule
+    # in-process instead of over HTTP.
+    original = api_routes._get_verified_from_backend
+    api_routes._get_verified_from_backend = is_verified
+    try:
+        yield
+    finally:
+        api_routes._get_verified_from_backend = original
+
+
+def _run_pipeline(entry, dataset_name, args, timings):
+    # The stages of the paginated branch of get_dataset, timed one by one.
+    t0 = time.perf_counter()
+    records = api_routes._filtered_records(entry, dataset_name, args)
+    t1 = time.perf_counter()
+    overlay = api_routes._verified_overlay(dataset_name, (r.username for r in records if not r.loose))
+    t2 = time.perf_counter()
+    offset = int(args.get("cursor") or 0)
+    limit = 20
+    total = len(records)
+    records = api_routes._sort_exchange_items(dataset_name, records, overlay, count=offset + limit)
+    t3 = time.perf_counter()
+    page = [
+        r.raw if r.loose else api_routes._with_verified(r.raw, overlay, r.username)
+        for r in records[offset:offset + limit]
+    ]
+    fields = api_routes.resolve_fields(dataset_name, args)
+    encode_listing({
+        "name": dataset_name,
+        "payload": None,
+        "version": entry["version"],
+        "nextCursor": str(offset + len(page)) if offset + len(page) < total else None,
+    }, dataset_name, encoded_items(entry, page, fields))
+    t4 = time.perf_counter()
+    for stage, duration in (("filter", t1 - t0), ("verify", t2 - t1), ("sort", t3 - t2), ("encode", t4 - t3), ("total", t4 - t0)):
+        timings.setdefault(stage, []).append(duration)
+    return total
+
+
+def run_micro(app, size: int, iterations: int) -> Dict[str, Any]:
+    results: Dict[str, Any] = {}
+    with app.app_context(), _stubbed_verified_lookup():
+        for dataset_name, dataset_scenarios in scenarios(size).items():
+            entry = get_dataset_entry(dataset_name)
+            build_timings = []
+            for _ in range(max(iterations // 20, 3)):
+                entry["derived"].clear()
+                start = time.perf_counter()
+                api_routes._listing_records(entry, dataset_name)
+                build_timings.append(time.perf_counter() - start)
+            results[f"{dataset_name}/build_records"] = {"total": summarize(build_timings)}
+            for name, args in dataset_scenarios.items():
+                timings: Dict[str, list] = {}
+                matched = 0
+                for _ in range(iterations):
+                    matched = _run_pipeline(entry, dataset_name, args, timings)
+                summary = {stage: summarize(values) for stage, values in timings.items()}
+                summary["matched"] = matched
+                results[f"{dataset_name}/{name}"] = summary
+    return results
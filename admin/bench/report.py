@@ -0,0 +1,91 @@
+import importlib.util
+import json
+import math
+import os
+import platform
+import subprocess
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Sequence
+
+
+PERCENTILES = (50, 95, 99)
+
+
+def percentile(sorted_values: Sequence[float], pct: float) -> float:
+    # Nearest-rank, so every reported value is an observed one.
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(pct / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def summarize(durations: List[float]) -> Dict[str, Any]:
+    values = sorted(durations)
+    summary = {"count": len(values)}
+    if values:
+        summary["mean_ms"] = round(sum(values) / len(values) * 1000, 3)
+        summary["max_ms"] = round(values[-1] * 1000, 3)
+    for pct in PERCENTILES:
+        summary[f"p{pct}_ms"] = round(percentile(values, pct) * 1000, 3)
+    return summary
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            capture_output=True,
+            text=True,
+            timeout=5,
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def report_meta(params: Dict[str, Any]) -> Dict[str, Any]:
+    has_orjson = importlib.util.find_spec("orjson") is not None
+    return {
+        "commit": _git_commit(),
+        "createdAt": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "orjson": has_orjson,
+        "params": params,
+    }
+
+
+def write_report(path: str, report: Dict[str, Any]):
+    # Sorted keys and one value per line: two reports diff cleanly.
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, sort_keys=True, indent=2)
+        f.write("\n")
+
+
+def load_report(path: str) -> Dict[str, Any]:
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _flatten(node, prefix=""):
+    if isinstance(node, dict):
+        for key, value in node.items():
+            yield from _flatten(value, f"{prefix}/{key}" if prefix else key)
+    elif isinstance(node, (int, float)) and not isinstance(node, bool):
+        yield prefix, node
+
+
+def compare_reports(base: Dict[str, Any], head: Dict[str, Any], metric_suffix: str = "_ms") -> List[str]:
+    base_values = dict(_flatten({k: v for k, v in base.items() if k != "meta"}))
+    head_values = dict(_flatten({k: v for k, v in head.items() if k != "meta"}))
+    lines = [
+        f"base {base.get('meta', {}).get('commit')} -> head {head.get('meta', {}).get('commit')}",
+        f"{'metric':<70} {'base':>10} {'head':>10} {'delta':>8}",
+    ]
+    for key in sorted(base_values.keys() & head_values.keys()):
+        if not key.endswith(metric_suffix):
+            continue
+        old, new = base_values[key], head_values[key]
+        delta = f"{(new - old) / old * 100:+.1f}%" if old else "n/a"
+        lines.append(f"{key:<70} {old:>10.3f} {new:>10.3f} {delta:>8}")
+    return lines
@@ -0,0 +1,365 @@
+import random
+import re
+import threading
+import time
+import zlib
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Iterable, List, Optional
+from urllib.parse import parse_qs, urlparse
+
+from codec import dumpb, loads
+
+# Local stand-in for the NestJS backend and the Telegram Bot API / t.me, so the admin
+# service can be benchmarked offline. Point BACKEND_API_URL, TELEGRAM_API_BASE_URL and
+# TELEGRAM_WEB_BASE_URL at StubBackend.url; both sides share one server since their paths
+# do not overlap. Latency, 5xx errors and 429s are injected per group ("backend" or
+# "telegram") and can be changed while running, in-process via configure() or over HTTP
+# via POST /__stub/faults.
+
+GROUPS = ("backend", "telegram")
+
+# Smallest thing the avatar proxy accepts: an image/jpeg body.
+_USERPIC = b"\xff\xd8\xff\xe0\x00\x10JFIF\x00\x01\x01\x00\x00\x01\x00\x01\x00\x00\xff\xd9"
+
+
+def is_verified(username: str) -> bool:
+    # Stable per username, about a quarter verified, so runs are comparable.
+    return zlib.crc32(username.lower().encode("utf-8")) % 4 == 0
+
+
+def _now_iso() -> str:
+    return datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
+
+
+class Faults:
+    # latency_ms (+ uniform jitter_ms) is slept before every response; error_rate and
+    # throttle_rate are probabilities of answering 500 / 429; rate_limit caps requests per
+    # second with a token bucket, answering 429 with Retry-After once it is empty.
+    FIELDS = ("latency_ms", "jitter_ms", "error_rate", "throttle_rate", "rate_limit", "retry_after")
+
+    def __init__(self, **values):
+        self.latency_ms = 0.0
+        self.jitter_ms = 0.0
+        self.error_rate = 0.0
+        self.throttle_rate = 0.0
+        self.rate_limit = 0.0
+        self.retry_after = 1
+        self._tokens = 0.0
+        self._refilled = time.monotonic()
+        self.update(**values)
+
+    def update(self, **values):
+        for name, value in values.items():
+            if name not in self.FIELDS:
+                raise ValueError(f"Unknown fault setting: {name}")
+            setattr(self, name, int(value) if name == "retry_after" else float(value))
+        self._tokens = self.rate_limit
+        self._refilled = time.monotonic()
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {name: getattr(self, name) for name in self.FIELDS}
+
+    def take_token(self) -> bool:
+        if self.rate_limit <= 0:
+            return True
+        now = time.monotonic()
+        self._tokens = min(self.rate_limit, self._tokens + (now - self._refilled) * self.rate_limit)
+        self._refilled = now
+        if self._tokens < 1:
+            return False
+        self._tokens -= 1
+        return True
+
+
+class _Reply:
+    __slots__ = ("status", "body", "content_type", "headers")
+
+    def __init__(self, status: int, body: Any, content_type: str = "application/json", headers=None):
+        self.status = status
+        self.body = body
+        self.content_type = content_type
+        self.headers = headers or {}
+
+
+class StubBackend:
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, seed: int = 0):
+        self._lock = threading.Lock()
+        self._rng = random.Random(seed)
+        self.faults = {group: Faults() for group in GROUPS}
+        self.users: List[Dict[str, Any]] = []
+        self._users_by_id: Dict[str, Dict[str, Any]] = {}
+        self._users_by_telegram_id: Dict[str, Dict[str, Any]] = {}
+        self.moderation: Dict[str, Dict[str, Any]] = {}
+        self._next_request_id = 1
+        self._next_message_id = 1
+        self.stats: Dict[str, Dict[str, int]] = {}
+        self._routes = [
+            ("GET", re.compile(r"/__stub/stats"), None, self._get_stats),
+            ("POST", re.compile(r"/__stub/faults"), None, self._post_faults),
+            ("POST", re.compile(r"/__stub/reset"), None, self._post_reset),
+            ("GET", re.compile(r"/stats/users-count"), "backend", self._users_count),
+            ("GET", re.compile(r"/users"), "backend", self._list_users),
+            ("GET", re.compile(r"/users/top"), "backend", self._top_users),
+            ("GET", re.compile(r"/users/by-username"), "backend", self._user_by_username),
+            ("GET", re.compile(r"/users/me/profile"), "backend", self._user_profile),
+            ("POST", re.compile(r"/users/track"), "backend", self._track_user),
+            ("GET", re.compile(r"/users/(?P<user_id>[^/]+)"), "backend", self._get_user),
+            ("GET", re.compile(r"/moderation/requests"), "backend", self._list_moderation),
+            ("GET", re.compile(r"/moderation/requests/(?P<request_id>[^/]+)"), "backend", self._get_moderation),
+            ("PATCH", re.compile(r"/moderation/requests/(?P<request_id>[^/]+)"), "backend", self._update_moderation),
+            (
+                "PATCH",
+                re.compile(r"/moderation/requests/(?P<request_id>[^/]+)/(?P<action>approve|reject)"),
+                "backend",
+                self._decide_moderation,
+            ),
+            ("POST", re.compile(r"/bot(?P<token>[^/]+)/(?P<method>sendMessage|sendPhoto)"), "telegram", self._send),
+            ("GET", re.compile(r"/i/userpic/\d+/(?P<username>[^/]+)\.jpg"), "telegram", self._userpic),
+        ]
+        self.server = ThreadingHTTPServer((host, port), _make_handler(self))
+        self.server.daemon_threads = True
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def configure(self, group: str, **values):
+        with self._lock:
+            self.faults[group].update(**values)
+
+    def add_users(self, usernames: Iterable[str]) -> List[Dict[str, Any]]:
+        added = []
+        with self._lock:
+            for username in usernames:
+                index = len(self.users) + 1
+                user = {
+                    "id": str(index),
+                    "telegramId": str(100000000 + index),
+                    "username": username,
+                    "verified": is_verified(username),
+                    "createdAt": _now_iso(),
+                }
+                self.users.append(user)
+                self._users_by_id[user["id"]] = user
+                self._users_by_telegram_id[user["telegramId"]] = user
+                added.append(user)
+        return added
+
+    def add_moderation_request(self, section: str, form_data: Dict[str, Any], user: Optional[Dict[str, Any]] = None) -> str:
+        with self._lock:
+            request_id = str(self._next_request_id)
+            self._next_request_id += 1
+            now = _now_iso()
+            self.moderation[request_id] = {
+                "id": request_id,
+                "status": "pending",
+                "section": section,
+                "formData": form_data,
+                "userId": user["id"] if user else None,
+                "telegramId": user["telegramId"] if user else None,
+                "adminNote": None,
+                "publishedItemId": None,
+                "createdAt": now,
+                "updatedAt": now,
+            }
+        return request_id
+
+    def reset_stats(self):
+        with self._lock:
+            self.stats = {}
+
+    def handle(self, method: str, path: str, query: Dict[str, str], body: Any) -> _Reply:
+        for route_method, pattern, group, handler in self._routes:
+            if route_method != method:
+                continue
+            match = pattern.fullmatch(path)
+            if match is None:
+                continue
+            if group is None:
+                return handler(query=query, body=body, **match.groupdict())
+            return self._faulty(group, handler.__name__.lstrip("_"), handler, query, body, match.groupdict())
+        return _Reply(404, {"statusCode": 404, "message": f"Cannot {method} {path}"})
+
+    def _faulty(self, group, name, handler, query, body, params) -> _Reply:
+        with self._lock:
+            faults = self.faults[group]
+            delay = faults.latency_ms + self._rng.uniform(0, faults.jitter_ms)
+            roll = self._rng.random()
+            if not faults.take_token() or roll < faults.throttle_rate:
+                outcome = 429
+            elif roll < faults.throttle_rate + faults.error_rate:
+                outcome = 500
+            else:
+                outcome = 200
+            counters = self.stats.setdefault(name, {"calls": 0, "throttled": 0, "errors": 0})
+            counters["calls"] += 1
+            if outcome == 429:
+                counters["throttled"] += 1
+            elif outcome == 500:
+                counters["errors"] += 1
+            retry_after = faults.retry_after
+        if delay > 0:
+            time.sleep(delay / 1000)
+        if outcome == 429:
+            headers = {"Retry-After": str(retry_after)}
+            if group == "telegram":
+                return _Reply(429, {
+                    "ok": False,
+                    "error_code": 429,
+                    "description": f"Too Many Requests: retry after {retry_after}",
+                    "parameters": {"retry_after": retry_after},
+                }, headers=headers)
+            return _Reply(429, {"statusCode": 429, "message": "ThrottlerException: Too Many Requests"}, headers=headers)
+        if outcome == 500:
+            if group == "telegram":
+                return _Reply(500, {"ok": False, "error_code": 500, "description": "Internal Server Error"})
+            return _Reply(500, {"statusCode": 500, "message": "Internal server error"})
+        return handler(query=query, body=body, **params)
+
+    def _get_stats(self, query, body):
+        with self._lock:
+            return _Reply(200, {
+                "stats": {name: dict(counters) for name, counters in self.stats.items()},
+                "faults": {group: faults.as_dict() for group, faults in self.faults.items()},
+            })
+
+    def _post_faults(self, query, body):
+        if not isinstance(body, dict) or any(group not in GROUPS for group in body):
+            return _Reply(400, {"message": f"Expected an object keyed by {', '.join(GROUPS)}"})
+        try:
+            for group, values in body.items():
+                self.configure(group, **values)
+        except (TypeError, ValueError) as exc:
+            return _Reply(400, {"message": str(exc)})
+        return self._get_stats(query, body)
+
+    def _post_reset(self, query, body):
+        self.reset_stats()
+        return _Reply(200, {"ok": True})
+
+    def _users_count(self, query, body):
+        return _Reply(200, {"usersCount": len(self.users)})
+
+    def _list_users(self, query, body):
+        q = (query.get("q") or "").strip().lower().lstrip("@")
+        users = [user for user in self.users if not q or q in user["username"].lower() or q == user["telegramId"]]
+        return _Reply(200, {"users": users})
+
+    def _top_users(self, query, body):
+        try:
+            limit = int(query.get("limit") or 10)
+        except ValueError:
+            limit = 10
+        return _Reply(200, {"users": self.users[:max(limit, 0)]})
+
+    def _user_by_username(self, query, body):
+        username = (query.get("username") or "").strip().lstrip("@")
+        return _Reply(200, {"profile": {"username": username, "verified": is_verified(username)}})
+
+    def _user_profile(self, query, body):
+        user = self._users_by_telegram_id.get(query.get("telegramId") or "")
+        if user is None:
+            return _Reply(404, {"statusCode": 404, "message": "User not found"})
+        return _Reply(200, {"profile": user})
+
+    def _track_user(self, query, body):
+        return _Reply(201, {"ok": True})
+
+    def _get_user(self, query, body, user_id):
+        user = self._users_by_id.get(user_id)
+        if user is None:
+            return _Reply(404, {"statusCode": 404, "message": "User not found"})
+        return _Reply(200, {"user": user})
+
+    def _list_moderation(self, query, body):
+        status = (query.get("status") or "").strip()
+        with self._lock:
+            requests = [dict(r) for r in self.moderation.values() if not status or r["status"] == status]
+        return _Reply(200, {"requests": requests})
+
+    def _get_moderation(self, query, body, request_id):
+        with self._lock:
+            current = self.moderation.get(request_id)
+            current = dict(current) if current else None
+        if current is None:
+            return _Reply(404, {"statusCode": 404, "message": "Moderation request not found"})
+        return _Reply(200, {"request": current})
+
+    def _update_moderation(self, query, body, request_id, changes=None):
+        body = body if isinstance(body, dict) else {}
+        with self._lock:
+            current = self.moderation.get(request_id)
+            if current is None:
+                return _Reply(404, {"statusCode": 404, "message": "Moderation request not found"})
+            if isinstance(body.get("formData"), dict):
+                current["formData"] = body["formData"]
+            if "adminNote" in body:
+                current["adminNote"] = body["adminNote"]
+            current.update(changes or {})
+            current["updatedAt"] = _now_iso()
+            return _Reply(200, {"request": dict(current)})
+
+    def _decide_moderation(self, query, body, request_id, action):
+        body = body if isinstance(body, dict) else {}
+        if action == "approve":
+            changes = {"status": "approved", "publishedItemId": body.get("publishedItemId")}
+        else:
+            changes = {"status": "rejected"}
+        return self._update_moderation(query, {"adminNote": body.get("adminNote")}, request_id, changes)
+
+    def _send(self, query, body, token, method):
+        if method == "sendMessage" and (not isinstance(body, dict) or not body.get("chat_id")):
+            return _Reply(400, {"ok": False, "error_code": 400, "description": "Bad Request: chat_id is empty"})
+        with self._lock:
+            message_id = self._next_message_id
+            self._next_message_id += 1
+        return _Reply(200, {"ok": True, "result": {"message_id": message_id, "date": int(time.time())}})
+
+    def _userpic(self, query, body, username):
+        return _Reply(200, _USERPIC, content_type="image/jpeg")
+
+
+def _make_handler(stub: StubBackend):
+    class _Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        # Small JSON replies; without this, Nagle + delayed ACK adds ~40ms per keep-alive call.
+        disable_nagle_algorithm = True
+
+        def log_message(self, format, *args):
+            pass
+
+        def _dispatch(self):
+            url = urlparse(self.path)
+            query = {key: values[0] for key, values in parse_qs(url.query).items()}
+            length = int(self.headers.get("Content-Length") or 0)
+            raw = self.rfile.read(length) if length else b""
+            body: Any = None
+            if raw and (self.headers.get("Content-Type") or "").startswith("application/json"):
+                try:
+                    body = loads(raw)
+                except ValueError:
+                    body = None
+            reply = stub.handle(self.command, url.path.rstrip("/") or "/", query, body)
+            data = reply.body if isinstance(reply.body, bytes) else dumpb(reply.body)
+            self.send_response(reply.status)
+            self.send_header("Content-Type", reply.content_type)
+            self.send_header("Content-Length", str(len(data)))
+            for name, value in reply.headers.items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(data)
+
+        do_GET = do_POST = do_PATCH = do_PUT = do_DELETE = _dispatch
+
+    return _Handler
@@ -0,0 +1,164 @@
+import random
+from datetime import datetime, timedelta
+from typing import Any, Dict, List
+
+from admin_routes import _normalize_item_for_dataset
+from api_routes import DATASET_TO_SECTION, EXCHANGE_DATASETS
+
+THEMES = [
+    "криптовалюты, трейдинг", "маркетинг", "дизайн", "видео, монтаж", "новости", "юмор",
+    "образование", "игры", "технологии", "бизнес", "путешествия", "спорт", "музыка", "финансы",
+]
+WORDS = [
+    "канал", "реклама", "аудитория", "охват", "готов", "сотрудничество", "удаленно", "опыт",
+    "быстро", "качественно", "портфолио", "проект", "подписчики", "бюджет", "договор", "гарант",
+]
+JOB_OFFER_TYPES = ["seeking", "offering"]
+JOB_WORK = ["editor", "designer", "smm", "copywriter", "developer", "manager", "other"]
+EMPLOYMENT_TYPES = ["remote", "office", "project", "part_time"]
+CURRENCIES = ["rub", "usd", "ton", "usdt"]
+
+
+def _sentence(rng, words=12):
+    return " ".join(rng.choice(WORDS) for _ in range(words)).capitalize() + "."
+
+
+def _range(rng, low, high):
+    start = rng.randint(low, high)
+    return start, start + rng.randint(0, high - low)
+
+
+def form_data(section, rng, username):
+    theme = rng.choice(THEMES)
+    description = _sentence(rng, rng.randint(8, 40))
+    link = f"https://t.me/{username}"
+    if section == "sell-ads":
+        return {
+            "adType": rng.choice(["post_in_channel", "post_in_chat", "pin"]),
+            "channelOrChatLink": link,
+            "username": username,
+            "price": rng.randint(100, 100000),
+            "underGuarantee": rng.random() < 0.3,
+            "publishTime": rng.choice(["утро", "день", "вечер"]),
+            "postDuration": "24 часа в ленте",
+            "paymentMethod": rng.choice(["card", "crypto"]),
+            "theme": theme,
+            "description": description,
+        }
+    if section == "buy-ads":
+        price_min, price_max = _range(rng, 100, 50000)
+        views_min, views_max = _range(rng, 500, 100000)
+        return {
+            "username": username,
+            "priceRange": f"{price_min}-{price_max}",
+            "viewsRange": f"{views_min}-{views_max}",
+            "theme": theme,
+            "description": description,
+        }
+    if section == "jobs":
+        return {
+            "offerType": rng.choice(JOB_OFFER_TYPES),
+            "work": rng.choice(JOB_WORK),
+            "usernameLink": link,
+            "portfolioUrl": f"https://behance.net/{username}" if rng.random() < 0.5 else "",
+            "employmentType": rng.choice(EMPLOYMENT_TYPES),
+            "paymentCurrency": rng.choice(CURRENCIES),
+            "paymentAmount": str(rng.randint(100, 5000)),
+            "theme": theme,
+            "description": description,
+        }
+    if section == "designers":
+        return {
+            "title": _sentence(rng, 4),
+            "username": username,
+            "price": rng.randint(500, 50000),
+            "theme": theme,
+            "description": description,
+        }
+    if section == "sell-channel":
+        return {
+            "name": _sentence(rng, 3),
+            "username": username,
+            "usernameLink": link,
+            "subscribers": rng.randint(1000, 500000),
+            "reach": rng.randint(100, 200000),
+            "price": rng.randint(10000, 5000000),
+            "viaGuarantor": rng.random() < 0.5,
+            "theme": theme,
+            "description": description,
+        }
+    if section == "buy-channel":
+        price_min, price_max = _range(rng, 10000, 2000000)
+        reach_min, reach_max = _range(rng, 100, 100000)
+        subscribers_min, subscribers_max = _range(rng, 1000, 300000)
+        return {
+            "username": username,
+            "usernameLink": link,
+            "priceMin": price_min,
+            "priceMax": price_max,
+            "reachMin": reach_min,
+            "reachMax": reach_max,
+            "subscribersMin": subscribers_min,
+            "subscribersMax": subscribers_max,
+            "viaGuarantor": rng.random() < 0.5,
+            "theme": theme,
+            "description": description,
+        }
+    return {
+        "username": username,
+        "usernameLink": link,
+        "price": rng.randint(100, 50000),
+        "description": description,
+        "verified": rng.random() < 0.2,
+    }
+
+
+def _currency_item(rng, username):
+    # Currency offers are created from the admin panel, not through moderation.
+    return {
+        "title": rng.choice(["USDT → RUB (СБП)", "TON → RUB", "RUB → USDT", "BTC → USDT"]),
+        "rate": f"{rng.uniform(80, 110):.2f} ₽",
+        "subtitle": _sentence(rng, 4),
+        "description": _sentence(rng, rng.randint(8, 30)),
+        "username": username,
+        "usernameLink": f"https://t.me/{username}",
+        "verified": rng.random() < 0.3,
+    }
+
+
+def usernames(count: int) -> List[str]:
+    return [f"bench_user_{i}" for i in range(max(count, 1))]
+
+
+def generate_items(dataset_name: str, size: int, seed: int = 0) -> List[Dict[str, Any]]:
+    # Items shaped by _normalize_item_for_dataset (the moderation write path), with stable ids,
+    # spread publish dates, ~10% already expired, a few pinned ads and a skewed user
+    # distribution so that some users own many listings.
+    rng = random.Random(f"{seed}:{dataset_name}:{size}")
+    section = DATASET_TO_SECTION[dataset_name]
+    users = usernames(size // 5)
+    now = datetime.utcnow()
+    items = []
+    for i in range(size):
+        username = users[min(int(rng.paretovariate(1.2)) - 1, len(users) - 1)] if rng.random() < 0.3 else rng.choice(users)
+        verified = rng.random() < 0.25
+        if dataset_name == "currency":
+            item = _currency_item(rng, username)
+        else:
+            form = form_data(section, rng, username)
+            form["listingDuration"] = rng.choice([24, 72, 168, 336])
+            item = _normalize_item_for_dataset(section, form, user_verified=verified)
+        published = now - timedelta(days=rng.uniform(0, 120))
+        item["id"] = f"{dataset_name}-{i}"
+        item["publishedAt"] = published.strftime("%Y-%m-%d")
+        if dataset_name != "currency":
+            expires = published + timedelta(days=rng.uniform(1, 150))
+            item["expiresAt"] = expires.isoformat() + "Z"
+        if dataset_name == "ads":
+            item["pinned"] = rng.random() < 0.05
+        items.append(item)
+    return items
+
+
+def generate_payloads(size: int, seed: int = 0) -> Dict[str, Dict[str, Any]]:
+    return {name: {name: generate_items(name, size, seed)} for name in EXCHANGE_DATASETS}
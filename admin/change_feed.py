@@ -0,0 +1,242 @@
+import atexit
+import glob
+import os
+import socket
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import event, func, inspect
+from sqlalchemy.orm import Session
+
+from codec import loads
+from models import PAYLOAD_ERRORS, Dataset, DatasetChange, DatasetItemChange, db, decode_payload
+
+# Optional local pub-sub: every worker binds a datagram socket in this directory and
+# nudges its siblings after committing a dataset change, so they poll right away
+# instead of on every request.
+CHANGE_SOCKET_DIR = os.getenv("DATASET_CHANGE_SOCKET_DIR", "").strip()
+CHANGE_POLL_INTERVAL_SECONDS = float(
+    os.getenv("DATASET_CHANGE_POLL_MS", "1000" if CHANGE_SOCKET_DIR else "0")
+) / 1000
+
+_listeners: List[Callable[[List[Tuple[int, str]]], None]] = []
+_poll_lock = threading.Lock()
+_state = {
+    "lastId": None,
+    "checkedAt": 0.0,
+    "notified": False,
+    "localIds": set(),
+    "socketPid": None,
+}
+
+
+def add_listener(fn: Callable[[List[Tuple[int, str]]], None]):
+    _listeners.append(fn)
+
+
+def _dispatch(changes: List[Tuple[int, str]]):
+    if not changes:
+        return
+    for fn in _listeners:
+        fn(changes)
+
+
+def current_version() -> int:
+    return db.session.query(func.max(DatasetChange.id)).scalar() or 0
+
+
+def dataset_version(name: str) -> int:
+    return (
+        db.session.query(func.max(DatasetChange.id))
+        .filter(DatasetChange.dataset_name == name)
+        .scalar()
+        or 0
+    )
+
+
+def lock_dataset(name: str) -> Optional[Dataset]:
+    # Loads the row under the write lock, held until the session commits or rolls back, so a
+    # version checked afterwards cannot change before the caller's write lands. SQLite has
+    # no row locks: BEGIN IMMEDIATE takes its database write lock up front.
+    if db.engine.dialect.name != "sqlite":
+        return Dataset.query.filter_by(name=name).with_for_update().first()
+    connection = db.session.connection()
+    if not connection.connection.driver_connection.in_transaction:
+        connection.exec_driver_sql("BEGIN IMMEDIATE")
+    return Dataset.query.filter_by(name=name).first()
+
+
+def sync_changes():
+    _ensure_socket()
+    now = time.monotonic()
+    if _state["lastId"] is not None and not _state["notified"]:
+        if now - _state["checkedAt"] < CHANGE_POLL_INTERVAL_SECONDS:
+            return
+    with _poll_lock:
+        _state["notified"] = False
+        _state["checkedAt"] = now
+        if _state["lastId"] is None:
+            _state["lastId"] = current_version()
+            return
+        rows = (
+            db.session.query(DatasetChange.id, DatasetChange.dataset_name)
+            .filter(DatasetChange.id > _state["lastId"])
+            .order_by(DatasetChange.id.asc())
+            .all()
+        )
+        if not rows:
+            return
+        _state["lastId"] = rows[-1][0]
+        local_ids = _state["localIds"]
+        changes = [(change_id, name) for change_id, name in rows if change_id not in local_ids]
+        local_ids.difference_update(change_id for change_id, _ in rows)
+    _dispatch(changes)
+
+
+def _items_by_id(payload_json) -> Optional[Dict[str, Any]]:
+    try:
+        payload = loads(payload_json)
+    except (TypeError, ValueError):
+        return None
+    if not isinstance(payload, dict):
+        return None
+    items = next((value for value in payload.values() if isinstance(value, list)), None)
+    if items is None:
+        return None
+    by_id = {}
+    for item in items:
+        if not isinstance(item, dict) or item.get("id") in (None, ""):
+            return None
+        item_id = str(item["id"]).strip()
+        if item_id in by_id:
+            return None
+        by_id[item_id] = item
+    return by_id
+
+
+def _diff_items(old_json, new_json) -> Optional[List[Tuple[str, str]]]:
+    old_items = _items_by_id(old_json) if old_json is not None else None
+    new_items = _items_by_id(new_json)
+    if old_items is None or new_items is None:
+        return None
+    ops = []
+    for item_id, item in new_items.items():
+        if item_id not in old_items:
+            ops.append(("insert", item_id))
+        elif old_items[item_id] != item:
+            ops.append(("update", item_id))
+    ops.extend(("remove", item_id) for item_id in old_items if item_id not in new_items)
+    return ops
+
+
+_PAYLOAD_COLUMNS = ("payload_text", "payload_blob", "payload_format")
+
+
+def _previous_payload(state) -> Optional[str]:
+    previous = []
+    for attr in _PAYLOAD_COLUMNS:
+        history = state.attrs[attr].history
+        values = history.deleted or history.unchanged
+        previous.append(values[0] if values else None)
+    try:
+        return decode_payload(*previous)
+    except PAYLOAD_ERRORS:
+        return None
+
+
+@event.listens_for(Session, "before_flush")
+def _record_dataset_changes(session, flush_context, instances):
+    for obj in list(session.new) + list(session.dirty):
+        if not isinstance(obj, Dataset):
+            continue
+        state = inspect(obj)
+        if obj not in session.new and not any(
+            state.attrs[attr].history.has_changes() for attr in _PAYLOAD_COLUMNS
+        ):
+            continue
+        change = DatasetChange(dataset_name=obj.name)
+        session.add(change)
+        session.info.setdefault("dataset_change_rows", []).append(change)
+
+        old_json = _previous_payload(state) if obj not in session.new else None
+        ops = _diff_items(old_json, obj.payload) if obj not in session.new else None
+        for op, item_id in ops if ops is not None else [("reset", None)]:
+            session.add(DatasetItemChange(change=change, dataset_name=obj.name, item_id=item_id, op=op))
+
+
+@event.listens_for(Session, "after_flush_postexec")
+def _collect_dataset_changes(session, flush_context):
+    rows = session.info.pop("dataset_change_rows", None)
+    if rows:
+        pending = session.info.setdefault("dataset_changes", [])
+        pending.extend((row.id, row.dataset_name) for row in rows)
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_dataset_changes(session):
+    changes = session.info.pop("dataset_changes", None)
+    if not changes:
+        return
+    _state["localIds"].update(change_id for change_id, _ in changes)
+    _dispatch(changes)
+    _notify_siblings()
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_dataset_changes(session):
+    session.info.pop("dataset_change_rows", None)
+    session.info.pop("dataset_changes", None)
+
+
+def _ensure_socket():
+    if not CHANGE_SOCKET_DIR or _state["socketPid"] == os.getpid():
+        return
+    _state["socketPid"] = os.getpid()
+    os.makedirs(CHANGE_SOCKET_DIR, exist_ok=True)
+    path = _socket_path(os.getpid())
+    if os.path.exists(path):
+        os.unlink(path)
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+    sock.bind(path)
+    atexit.register(_remove_socket, path)
+    threading.Thread(target=_listen, args=(sock,), daemon=True).start()
+
+
+def _socket_path(pid):
+    return os.path.join(CHANGE_SOCKET_DIR, f"feed-{pid}.sock")
+
+
+def _listen(sock):
+    while True:
+        try:
+            sock.recv(64)
+        except OSError:
+            return
+        _state["notified"] = True
+
+
+def _remove_socket(path):
+    try:
+        os.unlink(path)
+    except OSError:
+        pass
+
+
+def _notify_siblings():
+    if not CHANGE_SOCKET_DIR:
+        return
+    own_path = _socket_path(os.getpid())
+    sender = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+    try:
+        for path in glob.glob(os.path.join(CHANGE_SOCKET_DIR, "feed-*.sock")):
+            if path == own_path:
+                continue
+            try:
+                sender.sendto(b"1", path)
+            except (ConnectionRefusedError, FileNotFoundError):
+                _remove_socket(path)
+            except OSError:
+                pass
+    finally:
+        sender.close()
@@ -0,0 +1,64 @@
+import json
+from typing import Any
+
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Dates, dataclasses and str keys go through the same fallbacks Flask's provider uses, so
+# responses look the same with or without orjson (apart from compact UTF-8 output).
+_ORJSON_BASE_OPTIONS = (
+    orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_PASSTHROUGH_DATACLASS
+    if orjson is not None
+    else 0
+)
+
+
+def dumps(obj: Any, sort_keys: bool = False, default=None) -> str:
+    return dumpb(obj, sort_keys=sort_keys, default=default).decode("utf-8")
+
+
+def dumpb(obj: Any, sort_keys: bool = False, default=None) -> bytes:
+    if orjson is not None:
+        option = _ORJSON_BASE_OPTIONS | (orjson.OPT_SORT_KEYS if sort_keys else 0)
+        try:
+            return orjson.dumps(obj, default=default, option=option)
+        except TypeError:
+            # Integers beyond 64 bits, unsupported types: let the stdlib decide.
+            pass
+    return json.dumps(obj, ensure_ascii=False, sort_keys=sort_keys, default=default).encode("utf-8")
+
+
+def loads(data) -> Any:
+    if orjson is not None:
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            # orjson rejects NaN/Infinity that the stdlib accepts; real errors re-raise below.
+            pass
+    if isinstance(data, (bytes, bytearray)):
+        data = data.decode("utf-8")
+    return json.loads(data)
+
+
+class CodecJSONProvider(DefaultJSONProvider):
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        if orjson is None or kwargs:
+            return super().dumps(obj, **kwargs)
+        return dumps(obj, sort_keys=self.sort_keys, default=self.default)
+
+    def loads(self, s, **kwargs: Any) -> Any:
+        if kwargs:
+            return super().loads(s, **kwargs)
+        return loads(s)
+
+    def response(self, *args: Any, **kwargs: Any):
+        pretty = (self.compact is None and self._app.debug) or self.compact is False
+        if orjson is None or pretty:
+            return super().response(*args, **kwargs)
+        obj = self._prepare_response_obj(args, kwargs)
+        body = dumpb(obj, sort_keys=self.sort_keys, default=self.default)
+        return self._app.response_class(body + b"\n", mimetype=self.mimetype)
@@ -0,0 +1,34 @@
+import argparse
+
+from app import app, init_db
+from models import PAYLOAD_FORMATS, convert_dataset_storage, db
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Rewrite stored dataset payloads in the given storage format."
+    )
+    parser.add_argument("--format", choices=PAYLOAD_FORMATS, default="gzip")
+    parser.add_argument(
+        "--vacuum",
+        action="store_true",
+        help="Run VACUUM afterwards to return the freed pages to the filesystem.",
+    )
+    args = parser.parse_args()
+
+    init_db()
+    with app.app_context():
+        converted = convert_dataset_storage(args.format)
+        if args.vacuum:
+            with db.engine.connect() as conn:
+                conn.exec_driver_sql("VACUUM")
+
+    print("Conversion finished.")
+    print(f"Format: {args.format}")
+    print(f"Converted datasets ({len(converted)}): {', '.join(converted) or '-'}")
+    if not args.vacuum:
+        print("Run with --vacuum to shrink the database file.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+import gzip
+import os
+import threading
+from typing import Dict, Tuple
+
+from flask import g, request
+
+from metrics import count_cache, stage
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+RESPONSE_COMPRESSION = os.getenv("RESPONSE_COMPRESSION", "True") == "True"
+COMPRESSION_MIN_BYTES = int(os.getenv("COMPRESSION_MIN_BYTES", "1024"))
+# Budget for cached compressed bodies per worker; the oldest go first when it is exceeded.
+COMPRESSION_CACHE_BYTES = int(os.getenv("COMPRESSION_CACHE_BYTES", str(32 * 1024 * 1024)))
+# Larger bodies are cached at the dynamic levels: the cached levels cost seconds on
+# multi-megabyte datasets and run inline in the request.
+COMPRESSION_CACHED_LEVEL_MAX_BYTES = int(os.getenv("COMPRESSION_CACHED_LEVEL_MAX_BYTES", str(1024 * 1024)))
+
+COMPRESSIBLE_MIMETYPES = {
+    "application/json",
+    "application/javascript",
+    "image/svg+xml",
+}
+
+# Dynamic bodies are compressed per request at a cheap level; bodies identified by an ETag
+# are compressed once at a somewhat higher level and reused until the ETag changes. Levels
+# above these buy a few percent at many times the CPU.
+_LEVELS = {
+    "dynamic": {"br": 4, "gzip": 5},
+    "cached": {"br": 5, "gzip": 6},
+}
+
+CacheKey = Tuple[str, str, str, str]
+
+# (path, representation, etag, encoding) -> compressed body, oldest first
+_COMPRESSED_CACHE: Dict[CacheKey, bytes] = {}
+_cache_state = {"bytes": 0}
+_cache_lock = threading.Lock()
+# key -> lock held by the one request compressing it; concurrent misses wait for its result.
+_KEY_LOCKS: Dict[CacheKey, threading.Lock] = {}
+_key_locks_lock = threading.Lock()
+
+
+def cache_representation(name: str):
+    # Marks the current response as fully determined by its path, `name` (e.g. the
+    # projection) and its strong ETag. Only marked responses are compressed once and cached,
+    # so query strings cannot multiply the entries.
+    g._compression_representation = name
+
+
+def _compress(data: bytes, encoding: str, mode: str) -> bytes:
+    level = _LEVELS[mode][encoding]
+    with stage("compress"):
+        if encoding == "br":
+            return brotli.compress(data, quality=level)
+        return gzip.compress(data, compresslevel=level, mtime=0)
+
+
+def _store(key: CacheKey, body: bytes):
+    with _cache_lock:
+        if len(body) > COMPRESSION_CACHE_BYTES or key in _COMPRESSED_CACHE:
+            return
+        while _COMPRESSED_CACHE and _cache_state["bytes"] + len(body) > COMPRESSION_CACHE_BYTES:
+            _cache_state["bytes"] -= len(_COMPRESSED_CACHE.pop(next(iter(_COMPRESSED_CACHE))))
+        _COMPRESSED_CACHE[key] = body
+        _cache_state["bytes"] += len(body)
+
+
+def _cached_compress(key: CacheKey, data: bytes, encoding: str) -> bytes:
+    body = _COMPRESSED_CACHE.get(key)
+    count_cache("compression", body is not None)
+    if body is not None:
+        return body
+    with _key_locks_lock:
+        lock = _KEY_LOCKS.setdefault(key, threading.Lock())
+    with lock:
+        body = _COMPRESSED_CACHE.get(key)
+        if body is None:
+            mode = "cached" if len(data) <= COMPRESSION_CACHED_LEVEL_MAX_BYTES else "dynamic"
+            body = _compress(data, encoding, mode)
+            _store(key, body)
+    with _key_locks_lock:
+        if _KEY_LOCKS.get(key) is lock:
+            del _KEY_LOCKS[key]
+    return body
+
+
+def _negotiate():
+    # Highest q-value wins, brotli on ties; q=0 (also via "*;q=0") means not acceptable.
+    accepted = request.accept_encodings
+    weights = {"gzip": accepted["gzip"]}
+    if brotli is not None:
+        weights["br"] = accepted["br"]
+    encoding = max(weights, key=lambda name: (weights[name], name == "br"))
+    return encoding if weights[encoding] > 0 else None
+
+
+def _compressible(response) -> bool:
+    if response.status_code != 200 or response.direct_passthrough or response.is_streamed:
+        return False
+    if "Content-Encoding" in response.headers:
+        return False
+    return response.mimetype in COMPRESSIBLE_MIMETYPES or response.mimetype.startswith("text/")
+
+
+def compress_response(response):
+    if not _compressible(response):
+        return response
+    response.vary.add("Accept-Encoding")
+    data = response.get_data()
+    if len(data) < COMPRESSION_MIN_BYTES:
+        return response
+    encoding = _negotiate()
+    if encoding is None:
+        return response
+
+    etag, weak = response.get_etag()
+    representation = g.get("_compression_representation")
+    if etag and not weak and representation is not None and request.method == "GET":
+        body = _cached_compress((request.path, representation, etag, encoding), data, encoding)
+        # The encoded body is a different representation; keep the version, mark it weak.
+        response.set_etag(etag, weak=True)
+    else:
+        body = _compress(data, encoding, "dynamic")
+
+    response.set_data(body)
+    response.headers["Content-Encoding"] = encoding
+    return response
+
+
+def init_compression(app):
+    if RESPONSE_COMPRESSION:
+        app.after_request(compress_response)
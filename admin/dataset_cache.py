@@ -0,0 +1,148 @@
+from typing import Any, Dict, Iterable, List, Optional
+
+from sqlalchemy import func
+
+from change_feed import add_listener, sync_changes
+from codec import loads
+from metrics import count_cache, stage
+from models import PAYLOAD_ERRORS, Dataset, DatasetChange, db
+
+CONFIG_DATASETS = [
+    "mainPage",
+    "banners",
+    "faq",
+    "botConfig",
+    "exchangeOptions",
+    "guarantConfig",
+]
+
+# name -> {"name", "payload", "invalid", "updatedAt", "version", "gzip", "derived"}; payloads are shared
+# between requests and must be treated as read-only (write paths decode their own copy).
+# Entries stay valid until the change feed reports a newer version of the dataset.
+_ENTRIES: Dict[str, Dict[str, Any]] = {}
+_MISSING = set()
+# name -> newest change id the feed has reported. A request that read the row before that
+# change must not cache what it built after the eviction ran.
+_LATEST: Dict[str, int] = {}
+
+
+def _evict(changes):
+    for change_id, name in changes:
+        if change_id > _LATEST.get(name, 0):
+            _LATEST[name] = change_id
+        _ENTRIES.pop(name, None)
+        _MISSING.discard(name)
+
+
+add_listener(_evict)
+
+
+def _rows_with_versions(query_filter):
+    version = (
+        db.session.query(func.max(DatasetChange.id))
+        .filter(DatasetChange.dataset_name == Dataset.name)
+        .correlate(Dataset)
+        .scalar_subquery()
+    )
+    return db.session.query(Dataset, version).filter(query_filter).all()
+
+
+def _build_entry(row, version) -> Dict[str, Any]:
+    try:
+        with stage("decode"):
+            payload = loads(row.payload)
+        invalid = False
+    except PAYLOAD_ERRORS:
+        payload = None
+        invalid = True
+    entry = {
+        "name": row.name,
+        "payload": payload,
+        "invalid": invalid,
+        "updatedAt": row.updated_at,
+        "version": version or 0,
+        # Stored gzip body of the payload, served as-is to clients that accept gzip.
+        "gzip": row.payload_blob if row.payload_format == "gzip" and not invalid else None,
+        "derived": {},
+    }
+    current = _ENTRIES.get(row.name)
+    newest = max(_LATEST.get(row.name, 0), current["version"] if current else 0)
+    if entry["version"] >= newest:
+        _ENTRIES[row.name] = entry
+        _MISSING.discard(row.name)
+    return entry
+
+
+def _mark_missing(names: Iterable[str], seen: Dict[str, int]):
+    # Skips names the feed reported a change for while they were being looked up.
+    _MISSING.update(name for name in names if name not in _ENTRIES and _LATEST.get(name) == seen.get(name))
+
+
+def get_dataset_entry(name: str) -> Optional[Dict[str, Any]]:
+    sync_changes()
+    entry = _ENTRIES.get(name)
+    if entry is not None or name in _MISSING:
+        count_cache("dataset", True)
+        return entry
+    count_cache("dataset", False)
+    seen = {name: _LATEST.get(name)}
+    with stage("db"):
+        rows = _rows_with_versions(Dataset.name == name)
+    if not rows:
+        _mark_missing([name], seen)
+        return None
+    return _build_entry(*rows[0])
+
+
+def get_dataset_entries(names: Optional[Iterable[str]] = None) -> List[Dict[str, Any]]:
+    sync_changes()
+    if names is None:
+        names = [name for (name,) in db.session.query(Dataset.name).all()]
+    names = sorted(set(names))
+    missing = [name for name in names if name not in _ENTRIES and name not in _MISSING]
+    for name in names:
+        count_cache("dataset", name not in missing)
+    built = {}
+    if missing:
+        seen = {name: _LATEST.get(name) for name in missing}
+        with stage("db"):
+            rows = _rows_with_versions(Dataset.name.in_(missing))
+        built = {row.name: _build_entry(row, version) for row, version in rows}
+        _mark_missing([name for name in missing if name not in built], seen)
+    # Entries that were too old to cache are still served to this request.
+    return [built.get(name) or _ENTRIES[name] for name in names if name in built or name in _ENTRIES]
+
+
+def derived(entry: Dict[str, Any], key: str, builder):
+    # Structures built from an entry's payload live exactly as long as that version.
+    cache = entry["derived"]
+    if key not in cache:
+        count_cache("derived", False)
+        cache[key] = builder(entry)
+    else:
+        count_cache("derived", True)
+    return cache[key]
+
+
+def version_etag(version: int) -> str:
+    return f'"{version}"'
+
+
+def is_weak_etag(value: Optional[str]) -> bool:
+    return bool(value) and value.strip().startswith("W/")
+
+
+def parse_version_etag(value: Optional[str]) -> Optional[int]:
+    # Write preconditions use the strong comparison: a weak validator names no version.
+    if not value or is_weak_etag(value):
+        return None
+    value = value.strip().strip('"')
+    return int(value) if value.isdigit() else None
+
+
+def warm_dataset_cache(names: Iterable[str]) -> List[str]:
+    sync_changes()
+    rows = _rows_with_versions(Dataset.name.in_(list(names)))
+    for row, version in rows:
+        _build_entry(row, version)
+    return sorted(row.name for row, _ in rows)
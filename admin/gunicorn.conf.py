@@ -0,0 +1,54 @@
+import gc
+import os
+import tempfile
+
+bind = os.getenv("GUNICORN_BIND", "0.0.0.0:5000")
+workers = int(os.getenv("GUNICORN_WORKERS", "2"))
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "60"))
+
+# Threaded workers keep long-lived SSE streams (/api/datasets/<name>/events,
+# /admin/api/moderation/events) from pinning a whole worker per connection. Each open
+# stream still holds one of these threads: live_events caps streams per worker at
+# SSE_MAX_SUBSCRIBERS (12) and answers 503 beyond that, so keep it below GUNICORN_THREADS
+# when changing either.
+worker_class = os.getenv("GUNICORN_WORKER_CLASS", "gthread")
+threads = int(os.getenv("GUNICORN_THREADS", "16"))
+
+# With GUNICORN_PRELOAD=True the app (and the dataset cache and its derived indexes warmed
+# by DATASET_WARMUP) is loaded once in the master and shared copy-on-write by the workers.
+preload_app = os.getenv("GUNICORN_PRELOAD", "False") == "True"
+
+# Workers share /metrics through snapshot files in this directory (see metrics.py); a fresh
+# one per master, so counters restart with the service.
+if not os.getenv("METRICS_DIR"):
+    os.environ["METRICS_DIR"] = tempfile.mkdtemp(prefix="admin-metrics-")
+
+
+def when_ready(server):
+    if not preload_app:
+        return
+    from app import app, warm_up
+    from models import db
+
+    warmed = warm_up()
+    with app.app_context():
+        # Workers must not inherit the master's SQLite connections.
+        db.engine.dispose()
+    # Keep the garbage collector from touching (and un-sharing) the warmed objects.
+    gc.freeze()
+    server.log.info("Preloaded datasets: %s", ", ".join(warmed) or "-")
+
+
+def post_worker_init(worker):
+    if preload_app:
+        return
+    from app import warm_up
+
+    warmed = warm_up()
+    worker.log.info("Warmed datasets: %s", ", ".join(warmed) or "-")
+
+
+def child_exit(server, worker):
+    from metrics import remove_snapshot
+
+    remove_snapshot(worker.pid)
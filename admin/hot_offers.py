@@ -0,0 +1,142 @@
+import json
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from codec import dumps, loads
+from dataset_cache import derived, get_dataset_entry
+from models import Dataset
+
+MAIN_PAGE_DATASET = "mainPage"
+
+
+def _offers(payload) -> Optional[List[Any]]:
+    hot = payload.get("hotOffers") if isinstance(payload, dict) else None
+    offers = hot.get("offers") if isinstance(hot, dict) else None
+    return offers if isinstance(offers, list) else None
+
+
+def hot_offer_key(offer) -> Optional[Tuple[str, str]]:
+    if not isinstance(offer, dict) or offer.get("type") != "ad":
+        return None
+    return str(offer.get("category") or "").strip(), str(offer.get("itemId") or "").strip()
+
+
+def hot_offer_refs(entry) -> Dict[Tuple[str, str], List[int]]:
+    # (section, itemId) -> positions in hotOffers.offers, rebuilt once per mainPage version.
+    def build(e):
+        refs: Dict[Tuple[str, str], List[int]] = {}
+        for pos, offer in enumerate(_offers(e["payload"]) or []):
+            key = hot_offer_key(offer)
+            if key is not None:
+                refs.setdefault(key, []).append(pos)
+        return refs
+
+    return derived(entry, "hotOfferRefs", build)
+
+
+def is_hot_offer(section: str, item_id: str) -> bool:
+    entry = get_dataset_entry(MAIN_PAGE_DATASET)
+    if not entry or entry["invalid"]:
+        return False
+    return (section, str(item_id).strip()) in hot_offer_refs(entry)
+
+
+def remove_hot_offers(section: str, item_id: str) -> bool:
+    # Only touches the mainPage row when the reverse index says the item is referenced.
+    # The caller commits.
+    if not is_hot_offer(section, item_id):
+        return False
+    row = Dataset.query.filter_by(name=MAIN_PAGE_DATASET).first()
+    if not row:
+        return False
+    try:
+        payload = loads(row.payload)
+    except json.JSONDecodeError:
+        return False
+    offers = _offers(payload)
+    if offers is None:
+        return False
+    key = (section, str(item_id).strip())
+    kept = [offer for offer in offers if hot_offer_key(offer) != key]
+    if len(kept) == len(offers):
+        return False
+    payload["hotOffers"]["offers"] = kept
+    row.payload = dumps(payload)
+    return True
+
+
+def _text(value) -> str:
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return str(value)
+
+
+def _rubles(value) -> str:
+    return f"{_text(value)} ₽" if value is not None else ""
+
+
+def hot_offer_fields(dataset_name: str, item: Dict[str, Any]) -> Dict[str, str]:
+    # The card text the admin panel writes when an ad is attached (buildHotOfferFieldsFromItem
+    # in admin-panel.js), recomputed from the live listing.
+    title = item.get("theme") or item.get("title") or item.get("name") or item.get("work") or item.get("username")
+    description = item.get("description") or ""
+    price, subtitle = "", ""
+    if dataset_name == "ads":
+        price, subtitle = _rubles(item.get("price")), item.get("username") or item.get("channelOrChatLink")
+    elif dataset_name == "buyAds":
+        low, high = item.get("priceMin"), item.get("priceMax")
+        if low is not None or high is not None:
+            price = f"{'?' if low is None else _text(low)} – {'?' if high is None else _text(high)} ₽"
+        subtitle = item.get("username")
+    elif dataset_name == "jobs":
+        price = " ".join(_text(v) for v in (item.get("paymentAmount"), item.get("paymentCurrency")) if v)
+        subtitle = item.get("theme") or description[:60]
+    elif dataset_name == "services":
+        price, subtitle = _rubles(item.get("price")), item.get("theme") or item.get("username")
+    elif dataset_name == "currency":
+        rate = item.get("rate")
+        if rate is not None and str(rate).strip():
+            price = str(rate).strip()
+        elif item.get("price") is not None:
+            price = _text(item["price"])
+        subtitle = item.get("subtitle") or description[:60]
+    elif dataset_name in ("sellChannels", "buyChannels"):
+        if dataset_name == "sellChannels" and item.get("subscribers") is not None:
+            price = _text(item["subscribers"])
+        subtitle = item.get("username")
+    elif dataset_name == "other":
+        price, subtitle = _rubles(item.get("price")), description[:60]
+    else:
+        price = _text(item["price"]) if item.get("price") is not None else ""
+        subtitle = item.get("username") or description
+    return {
+        "title": title or _text(item.get("id") or "") or "Объявление",
+        "price": price or "—",
+        "subtitle": subtitle or "",
+    }
+
+
+def resolve_hot_offers(payload, lookup: Callable[[str, str], Optional[Tuple[str, Dict[str, Any]]]]):
+    # Single pass over the offers: "ad" offers whose listing is gone are dropped and the rest
+    # get the listing's current card text and the listing itself under "item". lookup returns
+    # (dataset name, listing) or None. The cached payload is never mutated; a shallow copy is
+    # returned when anything changed.
+    offers = _offers(payload)
+    if not offers:
+        return payload
+    resolved = []
+    changed = False
+    for offer in offers:
+        key = hot_offer_key(offer)
+        if key is None or not all(key):
+            resolved.append(offer)
+            continue
+        found = lookup(*key)
+        changed = True
+        if found is not None:
+            dataset_name, item = found
+            resolved.append(dict(offer, **hot_offer_fields(dataset_name, item), item=item))
+    if not changed:
+        return payload
+    out = dict(payload)
+    out["hotOffers"] = dict(payload["hotOffers"], offers=resolved)
+    return out
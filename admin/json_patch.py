@@ -0,0 +1,158 @@
+import copy
+from typing import Any, List
+
+JSON_PATCH_MIMETYPE = "application/json-patch+json"
+MERGE_PATCH_MIMETYPE = "application/merge-patch+json"
+
+
+class JsonPatchError(ValueError):
+    pass
+
+
+class JsonPatchConflict(JsonPatchError):
+    pass
+
+
+class UnsupportedPatchFormat(JsonPatchError):
+    pass
+
+
+def _parse_pointer(pointer) -> List[str]:
+    if not isinstance(pointer, str):
+        raise JsonPatchError("JSON pointer must be a string")
+    if pointer == "":
+        return []
+    if not pointer.startswith("/"):
+        raise JsonPatchError(f"Invalid JSON pointer: {pointer}")
+    return [token.replace("~1", "/").replace("~0", "~") for token in pointer[1:].split("/")]
+
+
+def _index(token: str, length: int, allow_end=False) -> int:
+    if allow_end and token == "-":
+        return length
+    if not token.isdigit() or (len(token) > 1 and token.startswith("0")):
+        raise JsonPatchError(f"Invalid array index: {token}")
+    idx = int(token)
+    if idx > length or (idx == length and not allow_end):
+        raise JsonPatchError(f"Array index out of range: {token}")
+    return idx
+
+
+def _get(document, tokens: List[str]):
+    current = document
+    for token in tokens:
+        if isinstance(current, dict):
+            if token not in current:
+                raise JsonPatchError(f"Path not found: /{'/'.join(tokens)}")
+            current = current[token]
+        elif isinstance(current, list):
+            current = current[_index(token, len(current))]
+        else:
+            raise JsonPatchError(f"Path not found: /{'/'.join(tokens)}")
+    return current
+
+
+def _add(document, tokens: List[str], value):
+    if not tokens:
+        return value
+    parent = _get(document, tokens[:-1])
+    key = tokens[-1]
+    if isinstance(parent, dict):
+        parent[key] = value
+    elif isinstance(parent, list):
+        parent.insert(_index(key, len(parent), allow_end=True), value)
+    else:
+        raise JsonPatchError(f"Cannot add to non-container at /{'/'.join(tokens[:-1])}")
+    return document
+
+
+def _remove(document, tokens: List[str]):
+    if not tokens:
+        raise JsonPatchError("Cannot remove the document root")
+    parent = _get(document, tokens[:-1])
+    key = tokens[-1]
+    if isinstance(parent, dict):
+        if key not in parent:
+            raise JsonPatchError(f"Path not found: /{'/'.join(tokens)}")
+        return parent.pop(key)
+    if isinstance(parent, list):
+        return parent.pop(_index(key, len(parent)))
+    raise JsonPatchError(f"Path not found: /{'/'.join(tokens)}")
+
+
+def _json_equal(a, b) -> bool:
+    if isinstance(a, bool) or isinstance(b, bool):
+        return isinstance(a, bool) and isinstance(b, bool) and a == b
+    if isinstance(a, (int, float)) and isinstance(b, (int, float)):
+        return a == b
+    if type(a) is not type(b):
+        return False
+    if isinstance(a, dict):
+        return a.keys() == b.keys() and all(_json_equal(a[k], b[k]) for k in a)
+    if isinstance(a, list):
+        return len(a) == len(b) and all(_json_equal(x, y) for x, y in zip(a, b))
+    return a == b
+
+
+def _operand(operation):
+    if "value" not in operation:
+        raise JsonPatchError(f"Operation '{operation.get('op')}' requires 'value'")
+    return copy.deepcopy(operation["value"])
+
+
+# Both appliers work in place: callers pass their own decoded copy of the stored document.
+def apply_json_patch(document, operations) -> Any:
+    if not isinstance(operations, list):
+        raise JsonPatchError("JSON Patch document must be an array of operations")
+    for i, operation in enumerate(operations):
+        if not isinstance(operation, dict) or "op" not in operation or "path" not in operation:
+            raise JsonPatchError(f"Operation #{i} must be an object with 'op' and 'path'")
+        op = operation["op"]
+        path = _parse_pointer(operation["path"])
+        if op == "add":
+            document = _add(document, path, _operand(operation))
+        elif op == "remove":
+            _remove(document, path)
+        elif op == "replace":
+            _get(document, path)
+            if path:
+                _remove(document, path)
+            document = _add(document, path, _operand(operation))
+        elif op in ("move", "copy"):
+            source = _parse_pointer(operation.get("from"))
+            if op == "move":
+                if path[:len(source)] == source and path != source:
+                    raise JsonPatchError("Cannot move a value into one of its children")
+                value = _remove(document, source) if source else document
+            else:
+                value = copy.deepcopy(_get(document, source))
+            document = _add(document, path, value)
+        elif op == "test":
+            if not _json_equal(_get(document, path), operation.get("value")):
+                raise JsonPatchConflict(f"Test failed at {operation['path']}")
+        else:
+            raise JsonPatchError(f"Unsupported operation '{op}'")
+    return document
+
+
+def apply_merge_patch(target, patch) -> Any:
+    if not isinstance(patch, dict):
+        return copy.deepcopy(patch)
+    if not isinstance(target, dict):
+        target = {}
+    for key, value in patch.items():
+        if value is None:
+            target.pop(key, None)
+        else:
+            target[key] = apply_merge_patch(target.get(key), value)
+    return target
+
+
+def apply_patch(document, patch, mimetype) -> Any:
+    if mimetype == JSON_PATCH_MIMETYPE:
+        return apply_json_patch(document, patch)
+    if mimetype == MERGE_PATCH_MIMETYPE:
+        return apply_merge_patch(document, patch)
+    raise UnsupportedPatchFormat(
+        f"Content-Type must be {JSON_PATCH_MIMETYPE} or {MERGE_PATCH_MIMETYPE}"
+    )
@@ -0,0 +1,80 @@
+from datetime import datetime, timezone
+from typing import Any, Optional
+
+from codec import dumps, loads
+
+# Listings keep their display strings ("%Y-%m-%d" publishedAt, ISO expiresAt with "Z") and get
+# integer epoch seconds next to them on every write, so sorting and filtering never parse or
+# compare date strings.
+PUBLISHED_EPOCH_FIELD = "publishedAtEpoch"
+EXPIRES_EPOCH_FIELD = "expiresAtEpoch"
+
+
+def parse_epoch(value, naive_as_utc: bool = True) -> Optional[int]:
+    if not isinstance(value, str) or not value.strip():
+        return None
+    try:
+        parsed = datetime.fromisoformat(value.strip().replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if parsed.tzinfo is None:
+        if not naive_as_utc:
+            return None
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return int(parsed.timestamp())
+
+
+def published_epoch(item) -> Optional[int]:
+    return parse_epoch(item.get("publishedAt") or item.get("createdAt"))
+
+
+def expires_epoch(item) -> Optional[int]:
+    # Naive expiry timestamps were never comparable with the aware "now", so they never
+    # expire; they get no epoch field.
+    return parse_epoch(item.get("expiresAt"), naive_as_utc=False)
+
+
+def _stored_epoch(item, field, compute) -> Optional[int]:
+    value = item.get(field)
+    if isinstance(value, int) and not isinstance(value, bool):
+        return value
+    return compute(item)
+
+
+def item_published_epoch(item) -> Optional[int]:
+    return _stored_epoch(item, PUBLISHED_EPOCH_FIELD, published_epoch)
+
+
+def item_expires_epoch(item) -> Optional[int]:
+    return _stored_epoch(item, EXPIRES_EPOCH_FIELD, expires_epoch)
+
+
+def normalize_item_dates(item) -> bool:
+    changed = False
+    for field, compute in ((PUBLISHED_EPOCH_FIELD, published_epoch), (EXPIRES_EPOCH_FIELD, expires_epoch)):
+        value = compute(item)
+        if value is None:
+            if field in item:
+                del item[field]
+                changed = True
+        elif item.get(field) != value or isinstance(item.get(field), bool):
+            item[field] = value
+            changed = True
+    return changed
+
+
+def normalize_payload_dates(payload_json) -> Optional[str]:
+    # Returns the re-encoded payload when any listing changed, None otherwise.
+    try:
+        payload: Any = loads(payload_json)
+    except (TypeError, ValueError):
+        return None
+    if not isinstance(payload, dict):
+        return None
+    changed = False
+    for value in payload.values():
+        if isinstance(value, list):
+            for item in value:
+                if isinstance(item, dict) and normalize_item_dates(item):
+                    changed = True
+    return dumps(payload) if changed else None
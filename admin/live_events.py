@@ -0,0 +1,173 @@
+import hashlib
+import os
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, Optional, Set
+
+from change_feed import add_listener, sync_changes
+from codec import dumpb, dumps
+from models import db
+
+SSE_HEARTBEAT_SECONDS = float(os.getenv("SSE_HEARTBEAT_SECONDS", "15"))
+SSE_POLL_SECONDS = float(os.getenv("SSE_POLL_MS", "500")) / 1000
+SSE_BUFFER_SIZE = int(os.getenv("SSE_BUFFER_SIZE", "32"))
+SSE_MODERATION_POLL_SECONDS = float(os.getenv("SSE_MODERATION_POLL_SECONDS", "5"))
+# Every open stream holds one worker thread for as long as it stays open. Past this many per
+# worker new streams get 503 + Retry-After, leaving the rest of GUNICORN_THREADS (16 by
+# default) for ordinary requests.
+SSE_MAX_SUBSCRIBERS = int(os.getenv("SSE_MAX_SUBSCRIBERS", "12"))
+SSE_RETRY_AFTER_SECONDS = int(os.getenv("SSE_RETRY_AFTER_SECONDS", "10"))
+
+MODERATION_TOPIC = "moderation"
+
+
+class SubscriberLimitReached(Exception):
+    pass
+
+
+class Subscriber:
+    def __init__(self, topic: str):
+        self.topic = topic
+        self.queue: "queue.Queue[Any]" = queue.Queue(maxsize=SSE_BUFFER_SIZE)
+        self.overflowed = False
+
+    def push(self, event):
+        try:
+            self.queue.put_nowait(event)
+        except queue.Full:
+            self.overflowed = True
+
+    def wait(self):
+        try:
+            return self.queue.get(timeout=SSE_HEARTBEAT_SECONDS)
+        except queue.Empty:
+            return None
+
+
+# One hub per worker process: a single poller thread follows the dataset change feed and
+# the backend moderation queue and fans events out to every open stream in this worker.
+_subscribers: Dict[str, Set[Subscriber]] = {}
+_lock = threading.Lock()
+_poller = {"pid": None}
+_moderation: Dict[str, Any] = {
+    "fetch": None,
+    "digest": None,
+    "snapshot": None,
+    "refresh": False,
+    "checkedAt": 0.0,
+}
+
+
+def format_event(data, event: Optional[str] = None, event_id=None) -> str:
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    if event:
+        lines.append(f"event: {event}")
+    lines.append(f"data: {dumps(data)}")
+    return "\n".join(lines) + "\n\n"
+
+
+def heartbeat() -> str:
+    return ": ping\n\n"
+
+
+def subscribe(topic: str, app) -> Subscriber:
+    sub = Subscriber(topic)
+    with _lock:
+        if sum(len(subs) for subs in _subscribers.values()) >= SSE_MAX_SUBSCRIBERS:
+            raise SubscriberLimitReached()
+        _subscribers.setdefault(topic, set()).add(sub)
+    _ensure_poller(app)
+    return sub
+
+
+def subscribe_moderation(fetch: Callable[[], Any], app) -> Subscriber:
+    _moderation["fetch"] = fetch
+    if _moderation["snapshot"] is None:
+        _moderation["refresh"] = True
+    return subscribe(MODERATION_TOPIC, app)
+
+
+def unsubscribe(sub: Subscriber):
+    with _lock:
+        subs = _subscribers.get(sub.topic)
+        if subs:
+            subs.discard(sub)
+            if not subs:
+                _subscribers.pop(sub.topic, None)
+
+
+def publish(topic: str, event):
+    with _lock:
+        subs = list(_subscribers.get(topic, ()))
+    for sub in subs:
+        sub.push(event)
+
+
+def moderation_snapshot():
+    return _moderation["digest"], _moderation["snapshot"]
+
+
+def notify_moderation_changed():
+    _moderation["refresh"] = True
+
+
+def _on_dataset_changes(changes):
+    for change_id, name in changes:
+        publish(f"dataset:{name}", change_id)
+
+
+add_listener(_on_dataset_changes)
+
+
+def _refresh_moderation(app):
+    fetch = _moderation["fetch"]
+    _moderation["refresh"] = False
+    _moderation["checkedAt"] = time.monotonic()
+    if fetch is None:
+        return
+    try:
+        snapshot = fetch()
+    except Exception:
+        app.logger.exception("SSE moderation poll failed")
+        return
+    digest = hashlib.sha1(
+        dumpb(snapshot, sort_keys=True)
+    ).hexdigest()[:16]
+    if digest == _moderation["digest"]:
+        return
+    _moderation["digest"] = digest
+    _moderation["snapshot"] = snapshot
+    publish(MODERATION_TOPIC, digest)
+
+
+def _poll_loop(app):
+    while True:
+        time.sleep(SSE_POLL_SECONDS)
+        with _lock:
+            topics = set(_subscribers)
+        if any(topic.startswith("dataset:") for topic in topics):
+            with app.app_context():
+                try:
+                    sync_changes()
+                except Exception:
+                    app.logger.exception("SSE change feed poll failed")
+                finally:
+                    db.session.remove()
+        if MODERATION_TOPIC in topics and (
+            _moderation["refresh"]
+            or time.monotonic() - _moderation["checkedAt"] >= SSE_MODERATION_POLL_SECONDS
+        ):
+            _refresh_moderation(app)
+
+
+def _ensure_poller(app):
+    if _poller["pid"] == os.getpid():
+        return
+    with _lock:
+        if _poller["pid"] == os.getpid():
+            return
+        _poller["pid"] = os.getpid()
+    threading.Thread(target=_poll_loop, args=(app,), daemon=True).start()
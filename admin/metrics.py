@@ -0,0 +1,361 @@
+import atexit
+import bisect
+import glob
+import hmac
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+
+from flask import Response, g, has_request_context, request
+
+from codec import dumpb, loads
+
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "True") == "True"
+# Bearer token scrapers must send to /metrics. Without one configured the endpoint answers
+# 403 to everyone: latencies, routes and backend error counts are not for the public.
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "").strip()
+# Multi-worker aggregation: every worker writes a snapshot of its own metrics into this
+# directory (from a background thread every METRICS_FLUSH_MS, and at exit) and /metrics sums
+# those of the live workers, so a scrape that lands on any worker reports the whole service.
+# gunicorn.conf.py points it at a fresh temporary directory per master when unset.
+METRICS_DIR = os.getenv("METRICS_DIR", "").strip()
+METRICS_FLUSH_SECONDS = float(os.getenv("METRICS_FLUSH_MS", "1000")) / 1000
+# Per-response stage breakdown on /api responses, independent of METRICS_ENABLED. Browsers
+# only expose it to cross-origin pages listed in Timing-Allow-Origin, which is sent only when
+# SERVER_TIMING_ALLOW_ORIGIN names them (e.g. the mini app's origin).
+SERVER_TIMING = os.getenv("SERVER_TIMING", "True") == "True"
+SERVER_TIMING_ALLOW_ORIGIN = os.getenv("SERVER_TIMING_ALLOW_ORIGIN", "").strip()
+# Stages in pipeline order; Server-Timing lists them in this order.
+SERVER_TIMING_STAGES = ("db", "decode", "filter", "verify", "sort", "serialize", "compress")
+
+# Histogram bucket upper bounds, in seconds.
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+METRICS = {
+    "admin_http_request_duration_seconds": ("histogram", "HTTP request latency by route."),
+    "admin_stage_duration_seconds": ("histogram", "Time spent in request pipeline stages."),
+    "admin_backend_request_duration_seconds": ("histogram", "Outgoing backend and Telegram API calls by path."),
+    "admin_backend_errors_total": ("counter", "Failed backend and Telegram API calls."),
+    "admin_cache_requests_total": ("counter", "Cache lookups by cache and result."),
+    "admin_db_queries_total": ("counter", "SQL statements executed, by route."),
+    "admin_request_db_seconds": ("histogram", "Total SQL time per request by route."),
+}
+
+Labels = Tuple[Tuple[str, str], ...]
+
+# (metric, labels) -> per-bucket counts (the last one is +Inf) followed by the sum.
+_HISTOGRAMS: Dict[Tuple[str, Labels], List[float]] = {}
+# (metric, labels) -> value
+_COUNTERS: Dict[Tuple[str, Labels], float] = {}
+_lock = threading.Lock()
+_state = {"flusher": None}
+
+
+def _reset_after_fork():
+    # Forked workers start from zero; what the master recorded is not theirs to report.
+    global _lock
+    _lock = threading.Lock()
+    _HISTOGRAMS.clear()
+    _COUNTERS.clear()
+    _state["flusher"] = None
+
+
+os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def _labels(values) -> Labels:
+    return tuple(sorted((name, str(value)) for name, value in values.items()))
+
+
+def observe(metric: str, seconds: float, **labels):
+    if not METRICS_ENABLED:
+        return
+    key = (metric, _labels(labels))
+    index = bisect.bisect_left(BUCKETS, seconds)
+    with _lock:
+        buckets = _HISTOGRAMS.get(key)
+        if buckets is None:
+            buckets = _HISTOGRAMS[key] = [0] * (len(BUCKETS) + 1) + [0.0]
+        buckets[index] += 1
+        buckets[-1] += seconds
+
+
+def inc(metric: str, amount: float = 1, **labels):
+    if not METRICS_ENABLED:
+        return
+    key = (metric, _labels(labels))
+    with _lock:
+        _COUNTERS[key] = _COUNTERS.get(key, 0) + amount
+
+
+def count_cache(cache: str, hit: bool):
+    inc("admin_cache_requests_total", cache=cache, result="hit" if hit else "miss")
+    results = g.get("_cache_results") if has_request_context() else None
+    if results is not None:
+        results.setdefault(cache, set()).add(hit)
+
+
+def _route() -> str:
+    if not has_request_context():
+        return "-"
+    rule = request.url_rule
+    return rule.rule if rule is not None else "<unmatched>"
+
+
+@contextmanager
+def stage(name: str):
+    # Times a block as one pipeline stage of the current request.
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        observe("admin_stage_duration_seconds", elapsed, stage=name, route=_route())
+        timings = g.get("_stage_timings") if has_request_context() else None
+        if timings is not None:
+            timings[name] = timings.get(name, 0.0) + elapsed
+
+
+def _path_label(path: str) -> str:
+    # Ids in backend paths would give every user and request its own series.
+    segments = path.split("?", 1)[0].strip("/").split("/")
+    return "/" + "/".join(
+        ":id" if segment.isdigit() or (len(segment) >= 16 and any(c.isdigit() for c in segment)) else segment
+        for segment in segments
+    )
+
+
+class BackendCall:
+    __slots__ = ("error",)
+
+    def __init__(self):
+        self.error = None
+
+    def fail(self, reason):
+        self.error = str(reason)
+
+
+@contextmanager
+def backend_call(service: str, method: str, path: str):
+    # Times one outgoing call. Exceptions, and error statuses passed to call.fail(), also
+    # count as errors:
+    #
+    #     with backend_call("backend", "GET", "/users/by-username") as call:
+    #         resp = requests.get(...)
+    #         if not resp.ok:
+    #             call.fail(resp.status_code)
+    call = BackendCall()
+    labels = {"service": service, "method": method, "path": _path_label(path)}
+    started = time.perf_counter()
+    try:
+        yield call
+    except Exception as exc:
+        call.fail(getattr(exc, "code", None) or type(exc).__name__)
+        raise
+    finally:
+        observe("admin_backend_request_duration_seconds", time.perf_counter() - started, **labels)
+        if call.error is not None:
+            inc("admin_backend_errors_total", reason=call.error, **labels)
+
+
+def _snapshot() -> Dict[str, list]:
+    with _lock:
+        return {
+            "histograms": [[metric, labels, list(values)] for (metric, labels), values in _HISTOGRAMS.items()],
+            "counters": [[metric, labels, value] for (metric, labels), value in _COUNTERS.items()],
+        }
+
+
+def _snapshot_path(pid: int) -> str:
+    return os.path.join(METRICS_DIR, f"metrics-{pid}.json")
+
+
+def flush():
+    if not METRICS_DIR:
+        return
+    path = _snapshot_path(os.getpid())
+    tmp_path = f"{path}.tmp"
+    try:
+        with open(tmp_path, "wb") as f:
+            f.write(dumpb(_snapshot()))
+        os.replace(tmp_path, path)
+    except OSError:
+        pass
+
+
+def _flush_periodically():
+    while True:
+        time.sleep(METRICS_FLUSH_SECONDS)
+        flush()
+
+
+def _ensure_flusher():
+    # Started on the first request a process serves, i.e. in each worker after the fork.
+    if not METRICS_DIR or _state["flusher"] is not None:
+        return
+    with _lock:
+        if _state["flusher"] is not None:
+            return
+        _state["flusher"] = threading.Thread(target=_flush_periodically, name="metrics-flush", daemon=True)
+    _state["flusher"].start()
+
+
+def remove_snapshot(pid: int):
+    # Called from gunicorn's child_exit: an exited worker's totals leave /metrics with it.
+    if not METRICS_DIR:
+        return
+    try:
+        os.remove(_snapshot_path(pid))
+    except OSError:
+        pass
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def _collect() -> Tuple[Dict[Tuple[str, Labels], List[float]], Dict[Tuple[str, Labels], float]]:
+    if not METRICS_DIR:
+        snapshots = [_snapshot()]
+    else:
+        flush()
+        snapshots = []
+        for path in glob.glob(os.path.join(METRICS_DIR, "metrics-*.json")):
+            pid = os.path.basename(path)[len("metrics-"):-len(".json")]
+            # Left behind by workers that exited without child_exit, e.g. under an earlier master
+            # sharing a configured METRICS_DIR; a reused PID would otherwise add them back in.
+            if pid.isdigit() and not _pid_alive(int(pid)):
+                remove_snapshot(int(pid))
+                continue
+            try:
+                with open(path, "rb") as f:
+                    snapshots.append(loads(f.read()))
+            except (OSError, ValueError):
+                continue
+    histograms: Dict[Tuple[str, Labels], List[float]] = {}
+    counters: Dict[Tuple[str, Labels], float] = {}
+    for snapshot in snapshots:
+        for metric, labels, values in snapshot.get("histograms", []):
+            key = (metric, tuple(tuple(pair) for pair in labels))
+            total = histograms.get(key)
+            histograms[key] = list(values) if total is None else [a + b for a, b in zip(total, values)]
+        for metric, labels, value in snapshot.get("counters", []):
+            key = (metric, tuple(tuple(pair) for pair in labels))
+            counters[key] = counters.get(key, 0) + value
+    return histograms, counters
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: Labels, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = list(labels) + ([extra] if extra else [])
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def _format_number(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+def render_metrics() -> str:
+    histograms, counters = _collect()
+    lines = []
+    for metric, (kind, help_text) in METRICS.items():
+        lines.append(f"# HELP {metric} {help_text}")
+        lines.append(f"# TYPE {metric} {kind}")
+        if kind == "histogram":
+            for (name, labels), values in sorted(histograms.items()):
+                if name != metric:
+                    continue
+                cumulative = 0
+                for bound, count in zip(BUCKETS + (None,), values[:-1]):
+                    cumulative += count
+                    le = "+Inf" if bound is None else repr(bound)
+                    lines.append(f"{metric}_bucket{_format_labels(labels, ('le', le))} {_format_number(cumulative)}")
+                lines.append(f"{metric}_sum{_format_labels(labels)} {repr(float(values[-1]))}")
+                lines.append(f"{metric}_count{_format_labels(labels)} {_format_number(cumulative)}")
+        else:
+            for (name, labels), value in sorted(counters.items()):
+                if name == metric:
+                    lines.append(f"{metric}{_format_labels(labels)} {_format_number(value)}")
+    return "\n".join(lines) + "\n"
+
+
+def _start_timer():
+    g._metrics_started = time.perf_counter()
+
+
+def _record_request(response):
+    started = g.pop("_metrics_started", None)
+    if started is not None:
+        observe(
+            "admin_http_request_duration_seconds",
+            time.perf_counter() - started,
+            method=request.method,
+            route=_route(),
+            status=response.status_code,
+        )
+        _ensure_flusher()
+    return response
+
+
+def _start_server_timing():
+    if request.blueprint == "api":
+        g._stage_timings = {}
+        g._cache_results = {}
+        g._server_timing_started = time.perf_counter()
+
+
+def _server_timing_header(timings: Dict[str, float], caches: Dict[str, set], total: float) -> str:
+    names = [name for name in SERVER_TIMING_STAGES if name in timings]
+    names += sorted(name for name in timings if name not in SERVER_TIMING_STAGES)
+    parts = [f"{name};dur={timings[name] * 1000:.3f}" for name in names]
+    outcomes = caches.get("dataset")
+    if outcomes:
+        desc = "partial" if len(outcomes) > 1 else ("hit" if True in outcomes else "miss")
+        parts.append(f"cache;desc={desc}")
+    parts.append(f"total;dur={total * 1000:.3f}")
+    return ", ".join(parts)
+
+
+def _add_server_timing(response):
+    started = g.pop("_server_timing_started", None)
+    if started is None:
+        return response
+    header = _server_timing_header(g.pop("_stage_timings"), g.pop("_cache_results"), time.perf_counter() - started)
+    existing = response.headers.get("Server-Timing")
+    response.headers["Server-Timing"] = f"{existing}, {header}" if existing else header
+    if SERVER_TIMING_ALLOW_ORIGIN:
+        response.headers["Timing-Allow-Origin"] = SERVER_TIMING_ALLOW_ORIGIN
+    return response
+
+
+def metrics_endpoint():
+    authorization = request.headers.get("Authorization", "")
+    if not METRICS_TOKEN or not hmac.compare_digest(authorization, f"Bearer {METRICS_TOKEN}"):
+        return Response("Forbidden\n", status=403, mimetype="text/plain")
+    return Response(render_metrics(), mimetype="text/plain; version=0.0.4")
+
+
+def init_metrics(app):
+    # Registered before compression, so these run after it and their timings include it.
+    if SERVER_TIMING:
+        app.before_request(_start_server_timing)
+        app.after_request(_add_server_timing)
+    if not METRICS_ENABLED:
+        return
+    app.before_request(_start_timer)
+    app.after_request(_record_request)
+    app.add_url_rule("/metrics", "metrics", metrics_endpoint, methods=["GET"])
+    atexit.register(flush)
@@ -1,11 +1,62 @@
-import json
+import gzip
 import os
-from datetime import datetime
+import zlib
+from datetime import datetime, timedelta
 
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import event, func, inspect, text
+from sqlalchemy.orm import Session
+
+from codec import dumps, loads
+from listing_dates import normalize_payload_dates
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
 
 db = SQLAlchemy()
 
+# "json" keeps plain text in datasets.payload; "gzip"/"zstd" store compressed UTF-8 JSON in
+# datasets.payload_blob. Rows in any format stay readable whatever the current setting is.
+PAYLOAD_FORMATS = ("json", "gzip", "zstd")
+DATASET_STORAGE_FORMAT = os.getenv("DATASET_STORAGE_FORMAT", "json").strip().lower()
+if DATASET_STORAGE_FORMAT not in PAYLOAD_FORMATS:
+    DATASET_STORAGE_FORMAT = "json"
+if DATASET_STORAGE_FORMAT == "zstd" and zstandard is None:
+    DATASET_STORAGE_FORMAT = "gzip"
+
+
+# What decode_payload (plus a JSON parse) raises for a corrupt row: truncated gzip streams
+# end in EOFError, bad deflate data in zlib.error, bad zstd frames in ZstdError.
+PAYLOAD_ERRORS = (OSError, ValueError, EOFError, zlib.error) + (
+    (zstandard.ZstdError,) if zstandard is not None else ()
+)
+
+
+def encode_payload(payload_json, fmt):
+    if fmt == "gzip":
+        return "", gzip.compress(payload_json.encode("utf-8"), compresslevel=6, mtime=0)
+    if fmt == "zstd":
+        if zstandard is None:
+            raise ValueError("zstandard is required for zstd dataset storage")
+        return "", zstandard.ZstdCompressor(level=10).compress(payload_json.encode("utf-8"))
+    return payload_json, None
+
+
+def decode_payload(payload_text, payload_blob, fmt):
+    if fmt in (None, "json"):
+        return payload_text
+    if payload_blob is None:
+        return None
+    if fmt == "gzip":
+        return gzip.decompress(payload_blob).decode("utf-8")
+    if fmt == "zstd":
+        if zstandard is None:
+            raise ValueError("zstandard is required to read zstd dataset payloads")
+        return zstandard.ZstdDecompressor().decompress(payload_blob).decode("utf-8")
+    raise ValueError(f"Unknown dataset payload format: {fmt}")
+
 
 class AppState(db.Model):
     __tablename__ = "app_state"
@@ -22,12 +73,73 @@ class Dataset(db.Model):
 
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), unique=True, nullable=False, index=True)
-    payload = db.Column(db.Text, nullable=False)
+    payload_text = db.Column("payload", db.Text, nullable=False, default="")
+    payload_blob = db.Column(db.LargeBinary, nullable=True)
+    payload_format = db.Column(db.String(10), nullable=False, default="json", server_default="json")
     created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
     updated_at = db.Column(
         db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False
     )
 
+    @property
+    def payload(self):
+        return decode_payload(self.payload_text, self.payload_blob, self.payload_format)
+
+    @payload.setter
+    def payload(self, payload_json):
+        self.store_payload(payload_json, DATASET_STORAGE_FORMAT)
+
+    def store_payload(self, payload_json, fmt):
+        self.payload_text, self.payload_blob = encode_payload(payload_json, fmt)
+        self.payload_format = fmt
+
+
+# Datasets whose items are listings with publishedAt/expiresAt; their epoch fields are
+# refreshed on every write.
+LISTING_DATASETS = ("ads", "buyAds", "jobs", "services", "currency", "sellChannels", "buyChannels", "other")
+_PAYLOAD_ATTRS = ("payload_text", "payload_blob", "payload_format")
+
+
+@event.listens_for(Session, "before_flush")
+def _normalize_listing_dates(session, flush_context, instances):
+    for obj in list(session.new) + list(session.dirty):
+        if not isinstance(obj, Dataset) or obj.name not in LISTING_DATASETS:
+            continue
+        state = inspect(obj)
+        if obj not in session.new and not any(
+            state.attrs[attr].history.has_changes() for attr in _PAYLOAD_ATTRS
+        ):
+            continue
+        try:
+            normalized = normalize_payload_dates(obj.payload)
+        except PAYLOAD_ERRORS:
+            continue
+        if normalized is not None:
+            # Keep the row's format: a row converted by convert_dataset_storage stays converted.
+            obj.store_payload(normalized, obj.payload_format or DATASET_STORAGE_FORMAT)
+
+
+class DatasetChange(db.Model):
+    __tablename__ = "dataset_changes"
+    __table_args__ = {"sqlite_autoincrement": True}
+
+    id = db.Column(db.Integer, primary_key=True)
+    dataset_name = db.Column(db.String(100), nullable=False, index=True)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+
+
+class DatasetItemChange(db.Model):
+    __tablename__ = "dataset_item_changes"
+
+    id = db.Column(db.Integer, primary_key=True)
+    change_id = db.Column(db.Integer, db.ForeignKey("dataset_changes.id"), nullable=False, index=True)
+    dataset_name = db.Column(db.String(100), nullable=False, index=True)
+    item_id = db.Column(db.String(100), nullable=True)
+    # insert | update | remove | reset (item-level diff unavailable, clients must refetch)
+    op = db.Column(db.String(10), nullable=False)
+
+    change = db.relationship(DatasetChange)
+
 
 class Moderator(db.Model):
     __tablename__ = "moderators"
@@ -161,7 +273,7 @@ DEFAULT_DATASETS = {
 
 def _load_json_file(path):
     with open(path, "r", encoding="utf-8") as f:
-        return json.load(f)
+        return loads(f.read())
 
 
 def _upsert_state(key, value):
@@ -198,7 +310,7 @@ def migrate_datasets_from_frontend(project_root, overwrite_existing=False):
             continue
 
         payload = _load_json_file(file_path)
-        payload_json = json.dumps(payload, ensure_ascii=False)
+        payload_json = dumps(payload)
         if existing:
             existing.payload = payload_json
         else:
@@ -210,7 +322,7 @@ def migrate_datasets_from_frontend(project_root, overwrite_existing=False):
         if existing and not overwrite_existing:
             skipped.append(dataset_name)
             continue
-        payload_json = json.dumps(payload, ensure_ascii=False)
+        payload_json = dumps(payload)
         if existing:
             existing.payload = payload_json
         else:
@@ -233,6 +345,92 @@ def seed_datasets_once(project_root):
     return {"status": "seeded", **result}
 
 
+ITEM_CHANGE_LOG_START_KEY = "item_change_log_start"
+DATASET_CHANGE_RETENTION_DAYS = int(os.getenv("DATASET_CHANGE_RETENTION_DAYS", "30"))
+
+
+def get_item_change_log_start():
+    row = AppState.query.filter_by(key=ITEM_CHANGE_LOG_START_KEY).first()
+    return int(row.value) if row and row.value else 0
+
+
+def prune_dataset_changes(retention_days):
+    cutoff = datetime.utcnow() - timedelta(days=retention_days)
+    pruned_max = (
+        db.session.query(func.max(DatasetChange.id))
+        .filter(DatasetChange.created_at < cutoff)
+        .scalar()
+    )
+    if not pruned_max or pruned_max <= get_item_change_log_start():
+        return 0
+    latest_ids = (
+        db.session.query(func.max(DatasetChange.id))
+        .group_by(DatasetChange.dataset_name)
+        .scalar_subquery()
+    )
+    DatasetItemChange.query.filter(DatasetItemChange.change_id <= pruned_max).delete(
+        synchronize_session=False
+    )
+    # The latest change of every dataset is kept: it is the dataset's current version.
+    DatasetChange.query.filter(
+        DatasetChange.id <= pruned_max, DatasetChange.id.notin_(latest_ids)
+    ).delete(synchronize_session=False)
+    _upsert_state(ITEM_CHANGE_LOG_START_KEY, str(pruned_max))
+    db.session.commit()
+    return pruned_max
+
+
+def _ensure_dataset_storage_columns():
+    columns = {column["name"] for column in inspect(db.engine).get_columns(Dataset.__tablename__)}
+    if "payload_blob" not in columns:
+        db.session.execute(text("ALTER TABLE datasets ADD COLUMN payload_blob BLOB"))
+    if "payload_format" not in columns:
+        db.session.execute(
+            text("ALTER TABLE datasets ADD COLUMN payload_format VARCHAR(10) NOT NULL DEFAULT 'json'")
+        )
+    db.session.commit()
+
+
+def convert_dataset_storage(fmt):
+    converted = []
+    for row in Dataset.query.order_by(Dataset.name).all():
+        if row.payload_format == fmt:
+            continue
+        row.store_payload(row.payload, fmt)
+        converted.append(row.name)
+    db.session.commit()
+    return converted
+
+
+LISTING_DATES_BACKFILL_KEY = "listing_dates_v1_done"
+
+
+def backfill_listing_dates():
+    # One-time pass over rows written before the epoch fields existed.
+    if _has_state(LISTING_DATES_BACKFILL_KEY):
+        return []
+    updated = []
+    for row in Dataset.query.filter(Dataset.name.in_(LISTING_DATASETS)).order_by(Dataset.name).all():
+        try:
+            normalized = normalize_payload_dates(row.payload)
+        except PAYLOAD_ERRORS:
+            continue
+        if normalized is not None:
+            row.store_payload(normalized, row.payload_format or DATASET_STORAGE_FORMAT)
+            updated.append(row.name)
+    _upsert_state(LISTING_DATES_BACKFILL_KEY, datetime.utcnow().isoformat())
+    db.session.commit()
+    return updated
+
+
 def init_all_models(project_root):
     db.create_all()
+    _ensure_dataset_storage_columns()
+    if not _has_state(ITEM_CHANGE_LOG_START_KEY):
+        start = db.session.query(func.max(DatasetChange.id)).scalar() or 0
+        _upsert_state(ITEM_CHANGE_LOG_START_KEY, str(start))
+        db.session.commit()
     seed_datasets_once(project_root)
+    backfill_listing_dates()
+    if DATASET_CHANGE_RETENTION_DAYS > 0:
+        prune_dataset_changes(DATASET_CHANGE_RETENTION_DAYS)
@@ -0,0 +1,218 @@
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from flask import g, request
+
+from codec import dumpb, loads
+
+# Opt-in sampling profiler for tail latency. While a request is in flight a background
+# thread samples its stack every PROFILE_INTERVAL_MS; when the view took at least
+# PROFILE_SLOW_MS (or the request was picked by PROFILE_SAMPLE_RATE) the folded stacks are
+# written to PROFILE_DIR together with the route, args and timing. Only the PROFILE_KEEP
+# slowest profiles are kept. Sampling costs nothing in the profiled threads themselves, so
+# every request can be watched and the slow ones kept after the fact.
+PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "False") == "True"
+PROFILE_SLOW_MS = float(os.getenv("PROFILE_SLOW_MS", "1000"))
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))
+PROFILE_INTERVAL_SECONDS = float(os.getenv("PROFILE_INTERVAL_MS", "5")) / 1000
+PROFILE_KEEP = int(os.getenv("PROFILE_KEEP", "20"))
+PROFILE_MAX_DEPTH = 64
+
+_ADMIN_DIR = os.path.dirname(os.path.abspath(__file__))
+_state: Dict[str, Any] = {"dir": os.getenv("PROFILE_DIR", "").strip(), "sampler": None}
+# thread ident -> profile being recorded for the request that thread is serving
+_ACTIVE: Dict[int, Dict[str, Any]] = {}
+_lock = threading.Lock()
+_wake = threading.Event()
+
+
+def _reset_after_fork():
+    global _lock, _wake
+    _lock = threading.Lock()
+    _wake = threading.Event()
+    _ACTIVE.clear()
+    _state["sampler"] = None
+
+
+os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def _frame_label(code) -> str:
+    filename = code.co_filename
+    if filename.startswith(_ADMIN_DIR + os.sep):
+        filename = filename[len(_ADMIN_DIR) + 1:]
+    else:
+        filename = os.sep.join(filename.split(os.sep)[-2:])
+    return f"{code.co_qualname} ({filename}:{code.co_firstlineno})"
+
+
+def _stack(frame) -> tuple:
+    labels = []
+    while frame is not None and len(labels) < PROFILE_MAX_DEPTH:
+        labels.append(_frame_label(frame.f_code))
+        frame = frame.f_back
+    labels.reverse()
+    return tuple(labels)
+
+
+def _sample_forever():
+    while True:
+        if not _ACTIVE:
+            _wake.wait()
+            _wake.clear()
+            continue
+        time.sleep(PROFILE_INTERVAL_SECONDS)
+        frames = sys._current_frames()
+        with _lock:
+            for ident, profile in _ACTIVE.items():
+                frame = frames.get(ident)
+                if frame is not None:
+                    profile["stacks"][_stack(frame)] += 1
+        del frames
+
+
+def _ensure_sampler():
+    if _state["sampler"] is not None:
+        return
+    with _lock:
+        if _state["sampler"] is not None:
+            return
+        _state["sampler"] = threading.Thread(target=_sample_forever, name="profile-sampler", daemon=True)
+    _state["sampler"].start()
+
+
+def _start_profile():
+    _ensure_sampler()
+    profile = {
+        "startedAt": time.time(),
+        "started": time.perf_counter(),
+        "sampled": random.random() < PROFILE_SAMPLE_RATE,
+        "stacks": Counter(),
+    }
+    with _lock:
+        _ACTIVE[threading.get_ident()] = profile
+    _wake.set()
+    g._profile = profile
+
+
+def _finish_profile(status: int):
+    profile = g.pop("_profile", None)
+    if profile is None:
+        return
+    with _lock:
+        _ACTIVE.pop(threading.get_ident(), None)
+    duration_ms = (time.perf_counter() - profile["started"]) * 1000
+    if duration_ms < PROFILE_SLOW_MS and not profile["sampled"]:
+        return
+    rule = request.url_rule
+    _save({
+        "id": uuid.uuid4().hex[:12],
+        "method": request.method,
+        "path": request.path,
+        "route": rule.rule if rule is not None else None,
+        "args": request.args.to_dict(flat=False),
+        "status": status,
+        "reason": "slow" if duration_ms >= PROFILE_SLOW_MS else "sampled",
+        "startedAt": datetime.fromtimestamp(profile["startedAt"], timezone.utc).isoformat(),
+        "durationMs": round(duration_ms, 3),
+        "intervalMs": PROFILE_INTERVAL_SECONDS * 1000,
+        "samples": sum(profile["stacks"].values()),
+        "stacks": [[";".join(stack), count] for stack, count in profile["stacks"].most_common()],
+        "pid": os.getpid(),
+    })
+
+
+def _after_request(response):
+    _finish_profile(response.status_code)
+    return response
+
+
+def _teardown_request(exc):
+    # Views that raised never reach after_request.
+    if exc is not None and "_profile" in g:
+        _finish_profile(500)
+
+
+def _profile_path(profile_id: str, duration_ms: float) -> str:
+    # Zero-padded duration first: a plain name sort puts the fastest profiles first.
+    return os.path.join(_state["dir"], f"{int(duration_ms * 1000):015d}-{profile_id}.json")
+
+
+def _profile_files() -> List[str]:
+    directory = _state["dir"]
+    if not directory or not os.path.isdir(directory):
+        return []
+    return sorted(name for name in os.listdir(directory) if name.endswith(".json"))
+
+
+def _save(profile: Dict[str, Any]):
+    if not _state["dir"]:
+        return
+    try:
+        os.makedirs(_state["dir"], exist_ok=True)
+        path = _profile_path(profile["id"], profile["durationMs"])
+        with open(f"{path}.tmp", "wb") as f:
+            f.write(dumpb(profile))
+        os.replace(f"{path}.tmp", path)
+        for name in _profile_files()[:-PROFILE_KEEP or None]:
+            os.remove(os.path.join(_state["dir"], name))
+    except OSError:
+        pass
+
+
+def list_profiles() -> List[Dict[str, Any]]:
+    # Slowest first, without the stacks.
+    summaries = []
+    for name in reversed(_profile_files()):
+        profile = _read(name)
+        if profile is not None:
+            summaries.append({key: value for key, value in profile.items() if key != "stacks"})
+    return summaries
+
+
+def _read(name: str) -> Optional[Dict[str, Any]]:
+    try:
+        with open(os.path.join(_state["dir"], name), "rb") as f:
+            return loads(f.read())
+    except (OSError, ValueError):
+        return None
+
+
+def load_profile(profile_id: str) -> Optional[Dict[str, Any]]:
+    for name in _profile_files():
+        if name.endswith(f"-{profile_id}.json"):
+            return _read(name)
+    return None
+
+
+def folded_stacks(profile: Dict[str, Any]) -> str:
+    # The input format of flamegraph.pl / speedscope / inferno.
+    return "".join(f"{stack} {count}\n" for stack, count in profile.get("stacks", []))
+
+
+def clear_profiles() -> int:
+    removed = 0
+    for name in _profile_files():
+        try:
+            os.remove(os.path.join(_state["dir"], name))
+            removed += 1
+        except OSError:
+            pass
+    return removed
+
+
+def init_profiling(app, default_dir: str):
+    if not _state["dir"]:
+        _state["dir"] = default_dir
+    if not PROFILING_ENABLED:
+        return
+    app.before_request(_start_profile)
+    app.after_request(_after_request)
+    app.teardown_request(_teardown_request)
@@ -0,0 +1,111 @@
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Tuple
+
+from codec import dumpb
+from dataset_cache import derived
+
+# Compact card fields per exchange dataset: what list views render, without descriptions
+# and other detail-only fields. "full" returns items as stored.
+CARD_FIELDS: Dict[str, Tuple[str, ...]] = {
+    "ads": (
+        "id", "adType", "username", "verified", "pinned", "price", "theme", "imageUrl",
+        "underGuarantee", "paymentMethod", "publishedAt", "expiresAt",
+    ),
+    "buyAds": (
+        "id", "username", "usernameLink", "verified", "priceMin", "priceMax", "viewsMin",
+        "viewsMax", "theme", "publishedAt", "expiresAt",
+    ),
+    "jobs": (
+        "id", "offerType", "work", "usernameLink", "employmentType", "paymentCurrency",
+        "paymentAmount", "theme", "verified", "publishedAt", "expiresAt",
+    ),
+    "services": ("id", "title", "username", "verified", "price", "theme", "publishedAt", "expiresAt"),
+    "currency": (
+        "id", "title", "subtitle", "rate", "username", "usernameLink", "verified", "publishedAt",
+        "expiresAt",
+    ),
+    "sellChannels": (
+        "id", "name", "username", "usernameLink", "imageUrl", "subscribers", "reach", "price",
+        "viaGuarantor", "theme", "verified", "publishedAt", "expiresAt",
+    ),
+    "buyChannels": (
+        "id", "username", "usernameLink", "priceMin", "priceMax", "reachMin", "reachMax",
+        "subscribersMin", "subscribersMax", "viaGuarantor", "theme", "verified", "publishedAt",
+        "expiresAt",
+    ),
+    "other": ("id", "username", "usernameLink", "price", "verified", "publishedAt", "expiresAt"),
+}
+
+PROJECTIONS = ("full", "card")
+
+# Names fields= may ask for: every field a stored listing can carry.
+LISTING_FIELDS = frozenset(name for fields in CARD_FIELDS.values() for name in fields) | {
+    "description", "channelOrChatLink", "postDuration", "publishTime", "portfolioUrl",
+    "additionalLinks", "reviewsUrl", "publishedAtEpoch", "expiresAtEpoch",
+}
+
+
+def resolve_fields(dataset_name: str, args: Mapping[str, str]) -> Optional[Tuple[str, ...]]:
+    raw = (args.get("fields") or "").strip()
+    if raw:
+        requested = [name.strip() for name in raw.split(",") if name.strip()]
+        unknown = [name for name in requested if name not in LISTING_FIELDS]
+        if unknown:
+            raise ValueError(f'Unknown fields: {", ".join(sorted(set(unknown)))}')
+        return tuple(dict.fromkeys(["id"] + requested))
+    projection = (args.get("projection") or "full").strip().lower()
+    if projection not in PROJECTIONS:
+        raise ValueError(f'Unknown projection "{projection}", expected one of: {", ".join(PROJECTIONS)}')
+    return CARD_FIELDS.get(dataset_name) if projection == "card" else None
+
+
+def project_item(item, fields: Optional[Tuple[str, ...]]):
+    if fields is None or not isinstance(item, dict):
+        return item
+    return {name: item[name] for name in fields if name in item}
+
+
+def encoded_items(entry, items: Iterable[Any], fields: Optional[Tuple[str, ...]]) -> List[bytes]:
+    # Fragments are cached per dataset version for the entry's own item objects, and only for
+    # the named projections; ad-hoc fields= lists and per-request copies (e.g. with a
+    # refreshed "verified") are encoded on the fly.
+    if fields is not None and fields != CARD_FIELDS.get(entry["name"]):
+        return [dumpb(project_item(item, fields), sort_keys=True) for item in items]
+    owned = derived(entry, "ownedItemIds", _owned_item_ids)
+    fragments = derived(entry, ("fragments", fields), lambda e: {})
+    out = []
+    for item in items:
+        key = id(item)
+        if key not in owned:
+            out.append(dumpb(project_item(item, fields), sort_keys=True))
+            continue
+        fragment = fragments.get(key)
+        if fragment is None:
+            fragment = dumpb(project_item(item, fields), sort_keys=True)
+            fragments[key] = fragment
+        out.append(fragment)
+    return out
+
+
+def _owned_item_ids(entry):
+    payload = entry["payload"]
+    if not isinstance(payload, dict):
+        return frozenset()
+    return frozenset(
+        id(item)
+        for value in payload.values()
+        if isinstance(value, list)
+        for item in value
+    )
+
+
+def encode_listing(envelope: Dict[str, Any], list_key: str, fragments: List[bytes]) -> bytes:
+    # Same layout jsonify produces (sorted keys, compact, trailing newline) with the item
+    # list spliced into payload[list_key] from pre-encoded fragments.
+    parts = []
+    for key in sorted(envelope):
+        if key == "payload":
+            value = b"{" + dumpb(list_key) + b":[" + b",".join(fragments) + b"]}"
+        else:
+            value = dumpb(envelope[key], sort_keys=True)
+        parts.append(dumpb(key) + b":" + value)
+    return b"{" + b",".join(parts) + b"}\n"
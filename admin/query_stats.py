@@ -0,0 +1,135 @@
+import os
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from typing import List
+
+from flask import current_app, g, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from metrics import SERVER_TIMING, inc, observe
+
+# Counts the SQL statements each request executes and the time spent in them. A request
+# over QUERY_BUDGET statements, or running one statement QUERY_REPEAT_WARN times or more
+# (the usual shape of an N+1 loop), logs a warning naming the route and the statements.
+QUERY_TRACKING = os.getenv("QUERY_TRACKING", "True") == "True"
+QUERY_BUDGET = int(os.getenv("QUERY_BUDGET", "20"))
+QUERY_REPEAT_WARN = int(os.getenv("QUERY_REPEAT_WARN", "5"))
+
+_local = threading.local()
+
+
+class QueryLog:
+    __slots__ = ("count", "seconds", "statements")
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+        self.statements: Counter = Counter()
+
+    def record(self, statement: str, seconds: float):
+        self.count += 1
+        self.seconds += seconds
+        self.statements[statement] += 1
+
+    def repeated(self, times: int):
+        return [(statement, count) for statement, count in self.statements.most_common() if count >= times]
+
+    def describe(self, limit: int = 10) -> str:
+        return "\n".join(
+            f"  {count}x {' '.join(statement.split())[:200]}"
+            for statement, count in self.statements.most_common(limit)
+        )
+
+
+def _active_logs() -> List[QueryLog]:
+    logs = getattr(_local, "logs", None)
+    if logs is None:
+        logs = _local.logs = []
+    return logs
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("queryStarted", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info["queryStarted"].pop()
+    logs = getattr(_local, "logs", None)
+    if logs:
+        elapsed = time.perf_counter() - started
+        for log in logs:
+            log.record(statement, elapsed)
+
+
+@contextmanager
+def count_queries():
+    # Collects the statements this thread executes inside the block.
+    log = QueryLog()
+    logs = _active_logs()
+    logs.append(log)
+    try:
+        yield log
+    finally:
+        logs.remove(log)
+
+
+@contextmanager
+def assert_max_queries(limit: int):
+    with count_queries() as log:
+        yield log
+    if log.count > limit:
+        raise AssertionError(f"Expected at most {limit} queries, got {log.count}:\n{log.describe()}")
+
+
+def _start_request_log():
+    log = QueryLog()
+    _active_logs().append(log)
+    g._query_log = log
+
+
+def _add_server_timing(response):
+    log = g.get("_query_log")
+    if log is not None and request.blueprint == "api":
+        queries = "1 query" if log.count == 1 else f"{log.count} queries"
+        entry = f'sql;dur={log.seconds * 1000:.3f};desc="{queries}"'
+        existing = response.headers.get("Server-Timing")
+        response.headers["Server-Timing"] = f"{existing}, {entry}" if existing else entry
+    return response
+
+
+def _finish_request_log(exc):
+    log = g.pop("_query_log", None)
+    if log is None:
+        return
+    logs = _active_logs()
+    if log in logs:
+        logs.remove(log)
+    rule = request.url_rule
+    route = rule.rule if rule is not None else "<unmatched>"
+    inc("admin_db_queries_total", log.count, route=route)
+    observe("admin_request_db_seconds", log.seconds, route=route)
+    if log.count > QUERY_BUDGET:
+        current_app.logger.warning(
+            "%s %s ran %d queries (budget %d, %.1f ms):\n%s",
+            request.method, route, log.count, QUERY_BUDGET, log.seconds * 1000, log.describe(),
+        )
+    elif QUERY_REPEAT_WARN and log.repeated(QUERY_REPEAT_WARN):
+        current_app.logger.warning(
+            "%s %s repeated a query %d+ times, possible N+1:\n%s",
+            request.method, route, QUERY_REPEAT_WARN, log.describe(),
+        )
+
+
+def init_query_stats(app):
+    if not QUERY_TRACKING:
+        return
+    app.before_request(_start_request_log)
+    # Registered after init_metrics, so this runs first and its entry leads the header.
+    if SERVER_TIMING:
+        app.after_request(_add_server_timing)
+    app.teardown_request(_finish_request_log)
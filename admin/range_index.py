@@ -0,0 +1,49 @@
+import bisect
+from typing import Any, Callable, FrozenSet, Iterable, List, Optional, Set, Tuple
+
+
+class BoundIndex:
+    # Positions sorted by a numeric value; items without a value match every bound, which is
+    # what the linear filters did for missing or unparsable prices.
+    __slots__ = ("values", "positions", "always")
+
+    def __init__(self, pairs: List[Tuple[float, int]], always: FrozenSet[int]):
+        pairs.sort()
+        self.values = [value for value, _ in pairs]
+        self.positions = [pos for _, pos in pairs]
+        self.always = always
+
+    def at_least(self, bound: float) -> Set[int]:
+        start = bisect.bisect_left(self.values, bound)
+        return self.always.union(self.positions[start:])
+
+    def at_most(self, bound: float) -> Set[int]:
+        end = bisect.bisect_right(self.values, bound)
+        return self.always.union(self.positions[:end])
+
+    def below(self, bound: float) -> Set[int]:
+        end = bisect.bisect_left(self.values, bound)
+        return self.always.union(self.positions[:end])
+
+
+def build_bound_index(items: Iterable[Any], value_of: Callable[[dict], Optional[float]]) -> BoundIndex:
+    pairs: List[Tuple[float, int]] = []
+    always = set()
+    for pos, item in enumerate(items):
+        value = value_of(item) if isinstance(item, dict) else None
+        if value is None or value != value:
+            always.add(pos)
+        else:
+            pairs.append((value, pos))
+    return BoundIndex(pairs, frozenset(always))
+
+
+def parse_bound(raw) -> Optional[float]:
+    raw = (raw or "").strip()
+    if not raw:
+        return None
+    try:
+        value = float(raw)
+    except ValueError:
+        return None
+    return None if value != value else value
@@ -0,0 +1,45 @@
+import sys
+from typing import Dict, Type
+
+# Fixed-layout view of one stored listing with the values the filter/sort pipeline reads,
+# precomputed once per dataset version. `raw` references the stored item (it is not a copy)
+# and stays the only thing serialized, so pages are materialized from it untouched. Records
+# add to the decoded payload rather than replace it; what they save is the per-request work
+# and copies of the old dict-based pipeline, not resident memory. Long text (jobs
+# descriptions) is matched against the stored item on demand rather than kept twice.
+_BASE_FIELDS = (
+    "raw", "position", "loose", "id", "pinned", "verified", "date", "expires_at", "search",
+    "username", "username_keys",
+)
+
+
+class ListingRecord:
+    __slots__ = ()
+
+    def __init__(self, **values):
+        for name in self.__slots__:
+            setattr(self, name, values.get(name))
+
+
+_RECORD_TYPES: Dict[str, Type[ListingRecord]] = {}
+
+
+def record_type(dataset_name: str) -> Type[ListingRecord]:
+    cls = _RECORD_TYPES.get(dataset_name)
+    if cls is None:
+        cls = type(
+            f"{dataset_name[:1].upper()}{dataset_name[1:]}Record",
+            (ListingRecord,),
+            {"__slots__": _BASE_FIELDS},
+        )
+        _RECORD_TYPES[dataset_name] = cls
+    return cls
+
+
+def intern_lower(value) -> str:
+    # Themes and usernames repeat across listings; one shared lowercase string per distinct
+    # value. Values that are already lowercase share the stored string itself.
+    if not isinstance(value, str):
+        return ""
+    lowered = value.lower()
+    return sys.intern(value if lowered == value else lowered)
@@ -0,0 +1,200 @@
+from datetime import datetime, timezone
+
+from bench.stub_backend import is_verified
+
+# The listing pipeline as it was before the indexes: a linear filter over the stored list,
+# the verified refresh, a full sort and a slice. The equivalence tests run the same queries
+# through this and through the endpoints.
+
+EXCHANGE_DATASETS = ["ads", "buyAds", "jobs", "services", "currency", "sellChannels", "buyChannels", "other"]
+VERIFIED_DATASETS = ("ads", "buyAds", "other", "services", "currency", "sellChannels", "buyChannels")
+
+
+def username_match(item, username_arg):
+    if not username_arg:
+        return True
+    q = str(username_arg).strip().lstrip("@").lower()
+    if not q:
+        return True
+    uname = str(item.get("username") or "").strip().lstrip("@").lower()
+    ulink = str(item.get("usernameLink") or "").lower()
+    uname_from_link = ""
+    if ulink and "t.me/" in ulink:
+        parts = ulink.rstrip("/").split("t.me/")
+        if len(parts) > 1:
+            uname_from_link = (parts[-1] or "").split("/")[0].split("?")[0].lower()
+    return q == uname or q in ulink or q == uname_from_link
+
+
+def _contains(args, param, text):
+    wanted = args.get(param, "").strip().lower()
+    return not wanted or wanted in text
+
+
+def filter_items(dataset_name, items, args):
+    result = []
+    now = datetime.now(timezone.utc)
+    for item in items:
+        if not isinstance(item, dict):
+            result.append(item)
+            continue
+        if dataset_name != "currency" and item.get("expiresAt"):
+            try:
+                if now > datetime.fromisoformat(str(item["expiresAt"]).replace("Z", "+00:00")):
+                    continue
+            except (TypeError, ValueError):
+                pass
+        theme = (item.get("theme") or "").lower()
+        if dataset_name == "ads":
+            try:
+                price = float(item.get("price") or 0)
+            except (TypeError, ValueError):
+                price = 0
+            p_from = args.get("priceFrom", "").strip()
+            p_to = args.get("priceTo", "").strip()
+            if p_from and float(p_from) > price:
+                continue
+            if p_to and float(p_to) < price:
+                continue
+            if not _contains(args, "theme", theme):
+                continue
+        elif dataset_name == "buyAds":
+            try:
+                p_min = float(item["priceMin"]) if item.get("priceMin") is not None else None
+                p_max = float(item["priceMax"]) if item.get("priceMax") is not None else None
+            except (TypeError, ValueError):
+                p_min = p_max = None
+            p_from = args.get("priceFrom", "").strip()
+            p_to = args.get("priceTo", "").strip()
+            try:
+                if p_from and p_max is not None and float(p_from) > p_max:
+                    continue
+            except ValueError:
+                pass
+            try:
+                if p_to and p_min is not None and float(p_to) < p_min:
+                    continue
+            except ValueError:
+                pass
+            if not _contains(args, "theme", theme):
+                continue
+        elif dataset_name == "jobs":
+            if any(
+                args.get(field, "").strip() and item.get(field) != args.get(field)
+                for field in ("offerType", "work", "employmentType", "paymentCurrency")
+            ):
+                continue
+            if args.get("hasPortfolio") == "yes" and not item.get("portfolioUrl"):
+                continue
+            if args.get("hasPortfolio") == "no" and item.get("portfolioUrl"):
+                continue
+            if not _contains(args, "themeSearch", theme):
+                continue
+            if not _contains(args, "descriptionSearch", (item.get("description") or "").lower()):
+                continue
+        elif dataset_name in ("services", "other"):
+            if not _contains(args, "theme", theme):
+                continue
+            if dataset_name == "other":
+                date_from = args.get("dateFrom", "").strip()
+                date_to = args.get("dateTo", "").strip()
+                pub = item.get("publishedAt") or item.get("createdAt") or ""
+                if date_to and pub > date_to:
+                    continue
+                if date_from and pub < date_from:
+                    continue
+        else:
+            if not _contains(args, "theme", (item.get("theme") or item.get("description") or "").lower()):
+                continue
+        if args.get("username", "").strip() and not username_match(item, args.get("username")):
+            continue
+        result.append(item)
+    return result
+
+
+def item_username(item):
+    username = str(item.get("username") or "").strip().lstrip("@")
+    if username:
+        return username
+    link = str(item.get("usernameLink") or "").strip()
+    if link and "t.me/" in link:
+        username = link.rstrip("/").split("t.me/")[-1].split("/")[0].split("?")[0].strip()
+    return username.lstrip("@")
+
+
+def refresh_verified(dataset_name, items):
+    # The stub backend answers every lookup with is_verified(username).
+    if dataset_name not in VERIFIED_DATASETS:
+        return list(items)
+    result = []
+    for item in items:
+        if isinstance(item, dict):
+            username = item_username(item).lower()
+            if username:
+                item = dict(item, verified=is_verified(username))
+        result.append(item)
+    return result
+
+
+def sort_items(dataset_name, items):
+    has_pinned = dataset_name == "ads"
+    has_verified = dataset_name in VERIFIED_DATASETS
+
+    def key(item):
+        if not isinstance(item, dict):
+            return (False, False, "", "")
+        return (
+            bool(item.get("pinned")) if has_pinned else False,
+            bool(item.get("verified")) if has_verified else False,
+            item.get("publishedAt") or item.get("createdAt") or "",
+            str(item.get("id") or ""),
+        )
+
+    return sorted(items, key=key, reverse=True)
+
+
+def page(items, cursor, limit):
+    try:
+        offset = int(cursor or 0)
+    except (TypeError, ValueError):
+        offset = 0
+    limit = min(int(limit or 20), 100)
+    if limit < 1:
+        limit = 20
+    slice_list = items[offset:offset + limit]
+    next_offset = offset + len(slice_list)
+    return slice_list, str(next_offset) if next_offset < len(items) else None
+
+
+def listing(dataset_name, items, args):
+    return sort_items(dataset_name, refresh_verified(dataset_name, filter_items(dataset_name, items, args)))
+
+
+def snippet(dataset_name, section, item):
+    title_fields = {
+        "services": ("title", "theme", "description"),
+        "sellChannels": ("name", "theme", "description"),
+    }.get(dataset_name, ("theme", "description"))
+    title = ""
+    for field in title_fields:
+        title = item.get(field)
+        if title:
+            break
+    published_at = item.get("publishedAt") or item.get("createdAt") or ""
+    return {
+        "section": section,
+        "id": item.get("id"),
+        "title": (title or "")[:200].strip() or None,
+        "publishedAt": published_at or None,
+        "username": item.get("username"),
+    }
+
+
+def user_listings_page(payloads, sections, username, cursor=None, limit=None):
+    merged = []
+    for dataset_name in EXCHANGE_DATASETS:
+        for item in filter_items(dataset_name, payloads.get(dataset_name, []), {"username": username}):
+            if isinstance(item, dict):
+                merged.append(snippet(dataset_name, sections[dataset_name], item))
+    merged.sort(key=lambda x: x.get("publishedAt") or "", reverse=True)
+    return page(merged, cursor, limit)
@@ -0,0 +1,67 @@
+import os
+import sys
+import tempfile
+
+import pytest
+
+ADMIN_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ADMIN_DIR not in sys.path:
+    sys.path.insert(0, ADMIN_DIR)
+
+from bench.__main__ import _configure_environment, _seed  # noqa: E402
+from bench.stub_backend import StubBackend  # noqa: E402
+
+# The app modules read their settings at import, so the stub backend and the throwaway
+# database are set up before any test module imports them.
+_stub = StubBackend().start()
+_configure_environment(tempfile.mkdtemp(prefix="admin-tests-"), _stub.url)
+
+
+@pytest.fixture(scope="session")
+def stub():
+    return _stub
+
+
+@pytest.fixture(scope="session")
+def app():
+    from app import app, init_db
+
+    init_db()
+    _seed(app, 50, 1)
+    return app
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+def _payload_replacer(app):
+    # Stores payloads for the tests and puts the seeded ones back afterwards.
+    from codec import dumps
+    from models import Dataset, db
+
+    originals = {}
+
+    def replace(name, payload):
+        with app.app_context():
+            row = Dataset.query.filter_by(name=name).first()
+            originals.setdefault(name, row.payload)
+            row.payload = dumps(payload)
+            db.session.commit()
+
+    yield replace
+    with app.app_context():
+        for name, original in originals.items():
+            Dataset.query.filter_by(name=name).first().payload = original
+        db.session.commit()
+
+
+@pytest.fixture
+def replace_payload(app):
+    yield from _payload_replacer(app)
+
+
+@pytest.fixture(scope="module")
+def replace_module_payload(app):
+    yield from _payload_replacer(app)
@@ -0,0 +1,17 @@
+import uuid
+from datetime import date, datetime, timezone
+from decimal import Decimal
+
+from flask.json.provider import DefaultJSONProvider
+
+
+def test_provider_dumps_matches_flask_for_non_json_types(app):
+    value = {
+        "at": datetime(2026, 1, 2, 3, 4, 5, tzinfo=timezone.utc),
+        "day": date(2026, 1, 2),
+        "id": uuid.UUID(int=1),
+        "price": Decimal("9.50"),
+    }
+    assert app.json.loads(app.json.dumps(value)) == DefaultJSONProvider(app).loads(
+        DefaultJSONProvider(app).dumps(value)
+    )
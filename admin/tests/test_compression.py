@@ -0,0 +1,61 @@
+import gzip
+
+import brotli
+import pytest
+
+import compression
+
+
+@pytest.fixture(autouse=True)
+def empty_cache(monkeypatch):
+    monkeypatch.setattr(compression, "_COMPRESSED_CACHE", {})
+    monkeypatch.setattr(compression, "_cache_state", {"bytes": 0})
+
+
+@pytest.mark.parametrize("accept,expected", [
+    ("br, gzip", "br"),
+    ("br;q=0, gzip", "gzip"),
+    ("gzip;q=0.5, br;q=0.2", "gzip"),
+    ("*", "br"),
+    ("*;q=0, gzip;q=0.1", "gzip"),
+    ("br;q=0", None),
+    ("identity", None),
+])
+def test_encoding_follows_q_values(client, accept, expected):
+    response = client.get("/api/datasets/ads/payload", headers={"Accept-Encoding": accept})
+    assert response.headers.get("Content-Encoding") == expected
+    body = response.get_data()
+    decoded = {"br": brotli.decompress, "gzip": gzip.decompress}.get(expected, bytes)(body)
+    assert decoded.startswith(b"{")
+
+
+def test_query_strings_share_one_cache_entry(client):
+    for query in ("", "?a=1", "?b=2&a=1", "?projection=full"):
+        assert client.get(f"/api/datasets/ads{query}", headers={"Accept-Encoding": "br"}).status_code == 200
+    assert [key[:2] for key in compression._COMPRESSED_CACHE] == [("/api/datasets/ads", "full")]
+
+
+def test_cache_is_capped_in_bytes(client, monkeypatch):
+    client.get("/api/datasets/ads", headers={"Accept-Encoding": "br"})
+    size = compression._cache_state["bytes"]
+    monkeypatch.setattr(compression, "COMPRESSION_CACHE_BYTES", size * 3 // 2)
+    client.get("/api/datasets/ads/payload", headers={"Accept-Encoding": "br"})
+    assert 0 < compression._cache_state["bytes"] <= size * 3 // 2
+    assert sum(len(body) for body in compression._COMPRESSED_CACHE.values()) == compression._cache_state["bytes"]
+    assert ("/api/datasets/ads", "full") not in [key[:2] for key in compression._COMPRESSED_CACHE]
+
+
+@pytest.mark.parametrize("path", [
+    "/api/datasets/ads",
+    "/api/datasets/ads/payload",
+    "/api/datasets/ads?projection=card",
+    "/api/bundles/main-page",
+])
+@pytest.mark.parametrize("encoding,decompress", [("br", brotli.decompress), ("gzip", gzip.decompress)])
+def test_cached_bodies_decode_to_the_identity_body(client, path, encoding, decompress):
+    identity = client.get(path, headers={"Accept-Encoding": "identity"}).get_data()
+    first = client.get(path, headers={"Accept-Encoding": encoding})
+    cached = client.get(path, headers={"Accept-Encoding": encoding})
+    assert compression._COMPRESSED_CACHE
+    assert first.headers["Content-Encoding"] == cached.headers["Content-Encoding"] == encoding
+    assert decompress(first.get_data()) == decompress(cached.get_data()) == identity
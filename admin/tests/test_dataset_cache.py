@@ -0,0 +1,23 @@
+import dataset_cache
+from dataset_cache import Dataset, _build_entry, _evict, _rows_with_versions, get_dataset_entry
+
+
+def test_build_started_before_eviction_is_not_cached(app, monkeypatch):
+    monkeypatch.setattr(dataset_cache, "_LATEST", {})
+    with app.app_context():
+        get_dataset_entry("faq")
+        row, version = _rows_with_versions(Dataset.name == "faq")[0]
+        _evict([(version + 1, "faq")])
+        entry = _build_entry(row, version)
+    assert entry["version"] == version
+    assert "faq" not in dataset_cache._ENTRIES
+
+
+def test_warm_up_builds_derived_structures(app, monkeypatch):
+    from app import warm_up
+
+    monkeypatch.setenv("DATASET_WARMUP", "True")
+    warm_up()
+    with app.app_context():
+        derived = get_dataset_entry("jobs")["derived"]
+    assert {"records", "itemsById", "userListings", ("facet", "work")} <= set(derived)
@@ -0,0 +1,38 @@
+from codec import loads
+
+
+def _snapshot_diff(before, after):
+    # What a client holding `before` has to apply to reach `after`.
+    old = {str(it["id"]): it for it in before if isinstance(it, dict)}
+    new = {str(it["id"]): it for it in after if isinstance(it, dict)}
+    return (
+        sorted(key for key in new if key not in old),
+        sorted(key for key in new if key in old and new[key] != old[key]),
+        sorted(key for key in old if key not in new),
+    )
+
+
+def test_changes_match_the_difference_of_two_snapshots(client, replace_payload):
+    before = loads(client.get("/api/datasets/buyAds/payload").get_data())["buyAds"]
+    version = client.get("/api/datasets/buyAds").get_json()["version"]
+    after = [dict(before[1], theme="Edited")] + before[3:] + [dict(before[0], id="delta-new")]
+    replace_payload("buyAds", {"buyAds": after})
+
+    delta = client.get(f"/api/datasets/buyAds/changes?since={version}").get_json()
+
+    stored = {str(it["id"]): it for it in loads(client.get("/api/datasets/buyAds/payload").get_data())["buyAds"]}
+    assert not delta["reset"]
+    assert (
+        sorted(str(it["id"]) for it in delta["inserted"]),
+        sorted(str(it["id"]) for it in delta["updated"]),
+        sorted(delta["removed"]),
+    ) == _snapshot_diff(before, after)
+    assert all(it == stored[str(it["id"])] for it in delta["inserted"] + delta["updated"])
+
+
+def test_changes_at_or_ahead_of_the_current_version(client):
+    version = client.get("/api/datasets/buyAds").get_json()["version"]
+    current = client.get(f"/api/datasets/buyAds/changes?since={version}").get_json()
+    assert (current["reset"], current["inserted"], current["updated"], current["removed"]) == (False, [], [], [])
+    assert client.get(f"/api/datasets/buyAds/changes?since={version + 1}").get_json()["reset"] is True
+    assert client.get("/api/datasets/buyAds/changes?since=soon").status_code == 400
@@ -0,0 +1,63 @@
+import threading
+import time
+
+import api_routes
+from codec import dumps
+from json_patch import JSON_PATCH_MIMETYPE
+
+
+def test_concurrent_patches_with_same_etag_conflict(app, client, monkeypatch):
+    etag = client.get("/api/datasets/ads").headers["ETag"]
+    first_checked = threading.Event()
+    release_first = threading.Event()
+    apply_patch = api_routes.apply_patch
+
+    def slow_apply_patch(payload, patch, mimetype):
+        # Holds the first request between its version check and its write.
+        if not first_checked.is_set():
+            first_checked.set()
+            release_first.wait(10)
+        return apply_patch(payload, patch, mimetype)
+
+    monkeypatch.setattr(api_routes, "apply_patch", slow_apply_patch)
+    statuses = {}
+
+    def send(label, description):
+        response = app.test_client().patch(
+            "/api/datasets/ads",
+            data=dumps([{"op": "replace", "path": "/ads/0/description", "value": description}]),
+            content_type=JSON_PATCH_MIMETYPE,
+            headers={"If-Match": etag},
+        )
+        statuses[label] = response.status_code
+
+    first = threading.Thread(target=send, args=("first", "first"))
+    first.start()
+    assert first_checked.wait(10)
+    second = threading.Thread(target=send, args=("second", "second"))
+    second.start()
+    time.sleep(0.3)
+    release_first.set()
+    first.join(10)
+    second.join(10)
+
+    assert statuses == {"first": 200, "second": 412}
+    payload = client.get("/api/datasets/ads/payload").get_json()
+    assert payload["ads"][0]["description"] == "first"
+
+
+def test_weak_if_match_is_rejected(client):
+    etag = client.get("/api/datasets/ads").headers["ETag"]
+    patch = dumps([{"op": "replace", "path": "/ads/0/description", "value": "weak"}])
+    response = client.patch(
+        "/api/datasets/ads", data=patch, content_type=JSON_PATCH_MIMETYPE, headers={"If-Match": f"W/{etag}"}
+    )
+    assert response.status_code == 412
+    assert client.get("/api/datasets/ads").headers["ETag"] == etag
+
+    assert client.post("/admin/login", data={"password": "admin123"}).status_code == 302
+    etag = client.get("/admin/api/config/banners").headers["ETag"]
+    for method in (client.put, client.patch):
+        response = method("/admin/api/config/banners", json={"payload": {"banners": []}}, headers={"If-Match": f"W/{etag}"})
+        assert response.status_code == 412
+    assert client.get("/admin/api/config/banners").headers["ETag"] == etag
@@ -0,0 +1,19 @@
+from codec import dumps
+from models import Dataset, db
+
+
+def test_stored_gzip_body_gets_a_weak_etag(app, client):
+    with app.app_context():
+        row = Dataset.query.filter_by(name="faq").first()
+        row.store_payload(dumps({"items": [{"q": "gzip?", "a": "yes"}]}), "gzip")
+        db.session.commit()
+
+    compressed = client.get("/api/datasets/faq/payload", headers={"Accept-Encoding": "gzip"})
+    assert compressed.headers["Content-Encoding"] == "gzip"
+    assert compressed.headers["ETag"].startswith('W/"')
+    assert compressed.headers["Vary"] == "Accept-Encoding"
+
+    identity = client.get("/api/datasets/faq/payload", headers={"Accept-Encoding": "identity"})
+    assert "Content-Encoding" not in identity.headers
+    assert identity.headers["ETag"] == compressed.headers["ETag"][2:]
+    assert identity.headers["Vary"] == "Accept-Encoding"
@@ -0,0 +1,16 @@
+from dataset_cache import get_dataset_entry
+
+
+def test_custom_price_buckets_are_not_cached(app, client):
+    response = client.get("/api/datasets/ads/facets?priceBuckets=0,100,250")
+    assert response.status_code == 200
+    assert [bucket["from"] for bucket in response.get_json()["priceBuckets"]] == [0, 100, 250]
+    client.get("/api/datasets/ads/facets")
+    with app.app_context():
+        keys = [key for key in get_dataset_entry("ads")["derived"] if key[0] == "priceBuckets"]
+    assert keys == [("priceBuckets", (0, 500, 1000, 2000, 5000, 10000))]
+
+
+def test_invalid_price_buckets_are_rejected(client):
+    for raw in ("nan", "inf", "-5,10", "1e13", ",".join(str(i) for i in range(21))):
+        assert client.get(f"/api/datasets/ads/facets?priceBuckets={raw}").status_code == 400, raw
@@ -0,0 +1,23 @@
+from codec import dumps
+from hot_offers import hot_offer_fields
+from models import Dataset, db
+
+
+def test_main_page_ad_offers_are_hydrated_from_live_listings(app, client):
+    listing = client.get("/api/datasets/ads?limit=1").get_json()["payload"]["ads"][0]
+    offers = [
+        {"id": "1", "type": "ad", "category": "sell-ads", "itemId": listing["id"], "title": "Old", "price": "1 ₽"},
+        {"id": "2", "type": "ad", "category": "sell-ads", "itemId": "gone", "title": "Gone", "price": "2 ₽"},
+        {"id": "3", "title": "Manual", "price": "3", "subtitle": ""},
+    ]
+    with app.app_context():
+        row = Dataset.query.filter_by(name="mainPage").first()
+        row.payload = dumps({"hotOffers": {"offers": offers}, "news": {"channelUrl": ""}})
+        db.session.commit()
+
+    resolved = client.get("/api/datasets/mainPage/payload").get_json()["hotOffers"]["offers"]
+
+    assert [offer["id"] for offer in resolved] == ["1", "3"]
+    assert resolved[0]["price"] == hot_offer_fields("ads", listing)["price"] != "1 ₽"
+    assert resolved[0]["item"]["id"] == listing["id"]
+    assert resolved[1] == offers[2]
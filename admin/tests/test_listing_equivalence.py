@@ -0,0 +1,297 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+import baseline_listings as baseline
+from api_routes import DATASET_TO_SECTION, EXCHANGE_DATASETS
+from bench.synthetic import generate_items
+from codec import loads
+
+
+def _edge_items(dataset_name):
+    # Loose entries, ties, missing or unparsable prices and dates, odd usernames and expiries.
+    return [
+        "loose",
+        42,
+        None,
+        {"id": "edge-tie", "theme": "маркетинг", "publishedAt": "2026-01-10", "username": "bench_user_1"},
+        {"id": "edge-tie", "theme": "дизайн", "publishedAt": "2026-01-10", "username": "bench_user_1"},
+        {"id": "edge-tie-b", "publishedAt": "2026-01-10", "username": "bench_user_1", "pinned": True},
+        {"id": "edge-no-price", "theme": "Маркетинг", "publishedAt": "2026-01-09", "username": "@Bench_User_3"},
+        {
+            "id": "edge-bad-price", "price": "n/a", "priceMin": "x", "priceMax": 500, "viewsMin": None,
+            "publishedAt": "2026-01-09", "usernameLink": "https://t.me/bench_user_4?start=1",
+        },
+        {"id": "edge-zero-price", "price": 0, "priceMin": 0, "priceMax": 0, "publishedAt": "2026-01-08"},
+        {"id": "edge-bounds", "price": "1000", "priceMin": 500, "priceMax": "10000", "publishedAt": "2026-01-08"},
+        {"id": "edge-created", "createdAt": "2026-01-11", "username": "bench_user_2", "theme": "игры"},
+        {"id": "edge-no-date", "username": "bench_user_2", "description": "Без даты"},
+        {"id": 7, "publishedAt": "2026-01-07", "username": "bench_user_1"},
+        {"publishedAt": "2026-01-07", "username": "bench_user_1"},
+        {"id": "edge-naive-expiry", "expiresAt": "2020-01-01T00:00:00", "publishedAt": "2026-01-06"},
+        {"id": "edge-bad-expiry", "expiresAt": "soon", "publishedAt": "2026-01-06", "username": "bench_user_3"},
+        {"id": "edge-expired", "expiresAt": "2020-01-01T00:00:00Z", "publishedAt": "2026-01-12", "username": "bench_user_1"},
+        {"id": "edge-from", "publishedAt": "2026-01-05", "username": "bench_user_5", "theme": "новости"},
+        {"id": "edge-to", "publishedAt": "2026-01-20", "username": "bench_user_5", "theme": "новости"},
+    ]
+
+
+@pytest.fixture(scope="module")
+def listings(app, replace_module_payload):
+    # Stored items per dataset, as the endpoints see them after the write-time normalization.
+    client = app.test_client()
+    for dataset_name in EXCHANGE_DATASETS:
+        items = generate_items(dataset_name, 300, seed=7)
+        replace_module_payload(dataset_name, {dataset_name: items[:150] + _edge_items(dataset_name) + items[150:]})
+    return {
+        dataset_name: loads(client.get(f"/api/datasets/{dataset_name}/payload").get_data())[dataset_name]
+        for dataset_name in EXCHANGE_DATASETS
+    }
+
+
+def _user_listings(client, username, **params):
+    query = "&".join(f"{key}={value}" for key, value in params.items())
+    body = client.get(f"/api/users/{username}/listings?{query}").get_json()
+    return body["items"], body["nextCursor"]
+
+
+@pytest.mark.parametrize("username", ["bench_user_1", "@BENCH_USER_3", "bench_user_4", "bench", "nobody"])
+@pytest.mark.parametrize("cursor,limit", [(None, None), ("0", "5"), ("3", "7"), ("-4", "3"), ("x", "0"), ("0", "500")])
+def test_user_listings_match_the_linear_merge(client, listings, username, cursor, limit):
+    params = {key: value for key, value in (("cursor", cursor), ("limit", limit)) if value is not None}
+    assert _user_listings(client, username, **params) == baseline.user_listings_page(
+        listings, DATASET_TO_SECTION, username.strip().lstrip("@"), cursor, limit
+    )
+
+
+def test_user_listings_walk_every_page(client, listings):
+    cursor, pages = "0", 0
+    while cursor is not None:
+        items, next_cursor = _user_listings(client, "bench_user_1", cursor=cursor, limit=4)
+        assert (items, next_cursor) == baseline.user_listings_page(listings, DATASET_TO_SECTION, "bench_user_1", cursor, 4)
+        cursor, pages = next_cursor, pages + 1
+    assert pages > 1
+
+
+def _listing_page(client, dataset_name, args):
+    query = "&".join(f"{key}={value}" for key, value in args.items())
+    body = client.get(f"/api/datasets/{dataset_name}?{query}").get_json()
+    return body["payload"][dataset_name], body["nextCursor"]
+
+
+def _assert_same_pages(client, listings, dataset_name, args, limit="60"):
+    # Walks every page of the query, then asks for the first page without a limit.
+    expected = baseline.listing(dataset_name, listings[dataset_name], args)
+    cursor = "0"
+    while cursor is not None:
+        query = dict(args, cursor=cursor, limit=limit)
+        expected_page = baseline.page(expected, cursor, limit)
+        assert _listing_page(client, dataset_name, query) == expected_page, query
+        cursor = expected_page[1]
+    assert _listing_page(client, dataset_name, dict(args, cursor="0")) == baseline.page(expected, "0", None)
+
+
+@pytest.mark.parametrize("dataset_name,args", [
+    ("ads", {"priceFrom": "1000"}),
+    ("ads", {"priceTo": "0"}),
+    ("ads", {"priceFrom": "5000", "priceTo": "20000"}),
+    ("ads", {"priceFrom": "20000", "priceTo": "5000"}),
+    ("ads", {"priceFrom": "0", "theme": "маркетинг"}),
+    ("buyAds", {"priceFrom": "10000"}),
+    ("buyAds", {"priceTo": "500"}),
+    ("buyAds", {"priceFrom": "500", "priceTo": "500"}),
+    ("buyAds", {"priceFrom": "abc", "priceTo": "1e4"}),
+    ("buyAds", {"priceFrom": " 2500 ", "theme": "игры"}),
+])
+def test_range_filters_match_the_linear_scan(client, listings, dataset_name, args):
+    _assert_same_pages(client, listings, dataset_name, args)
+
+
+def _bucket_value(dataset_name, item):
+    if dataset_name == "ads":
+        try:
+            return float(item.get("price") or 0)
+        except (TypeError, ValueError):
+            return 0.0
+    try:
+        return float(item["priceMin"]) if item.get("priceMin") is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+def _linear_facets(dataset_name, items, args, edges):
+    # Each count is the size of the linear result with that option selected.
+    fields = ("offerType", "work", "employmentType", "paymentCurrency", "hasPortfolio") if dataset_name == "jobs" else ()
+    price_params = ("priceFrom", "priceTo") if dataset_name in ("ads", "buyAds") else ()
+    facets = {}
+    for field in fields:
+        counts = {}
+        for value in {"yes", "no"} if field == "hasPortfolio" else {it.get(field) for it in items if isinstance(it, dict)}:
+            if isinstance(value, str) and value:
+                matched = baseline.filter_items(dataset_name, items, dict(args, **{field: value}))
+                counts[value] = sum(isinstance(it, dict) for it in matched)
+        facets[field] = counts
+    result = {"facets": facets, "total": len(baseline.filter_items(dataset_name, items, args))}
+    if price_params:
+        base_args = {key: value for key, value in args.items() if key not in price_params}
+        result["priceBuckets"] = []
+        for lo, hi in zip(edges, list(edges[1:]) + [None]):
+            kept = baseline.filter_items(dataset_name, items, dict(base_args, priceFrom=str(lo)))
+            count = sum(
+                hi is None or not isinstance(it, dict) or _bucket_value(dataset_name, it) is None
+                or _bucket_value(dataset_name, it) < hi
+                for it in kept
+            )
+            result["priceBuckets"].append({"from": lo, "to": hi, "count": count})
+    return result
+
+
+@pytest.mark.parametrize("dataset_name,query", [
+    ("jobs", ""),
+    ("jobs", "work=designer"),
+    ("jobs", "work=designer&offerType=seeking&hasPortfolio=yes"),
+    ("jobs", "employmentType=remote&themeSearch=маркетинг"),
+    ("ads", ""),
+    ("ads", "priceFrom=1000&theme=игры"),
+    ("ads", "priceBuckets=0,1000,100000"),
+    ("buyAds", "priceTo=5000"),
+    ("buyAds", "priceBuckets=500,10000"),
+])
+def test_facet_counts_match_the_linear_filter(client, listings, dataset_name, query):
+    body = client.get(f"/api/datasets/{dataset_name}/facets?{query}").get_json()
+    args = dict(part.split("=") for part in query.split("&") if part)
+    edges = [float(edge) for edge in args.pop("priceBuckets", "0,500,1000,2000,5000,10000").split(",")]
+    expected = _linear_facets(dataset_name, listings[dataset_name], args, edges)
+    assert {key: body[key] for key in expected} == expected
+
+
+@pytest.mark.parametrize("args", [
+    {"work": "designer"},
+    {"work": "designer", "offerType": "seeking"},
+    {"employmentType": "remote", "paymentCurrency": "usd", "hasPortfolio": "no"},
+    {"hasPortfolio": "yes", "themeSearch": "игры"},
+    {"hasPortfolio": "maybe"},
+    {"work": "nobody-does-this"},
+    {"work": " ", "offerType": ""},
+])
+def test_jobs_bitmap_filters_match_the_linear_scan(client, listings, args):
+    _assert_same_pages(client, listings, "jobs", args)
+
+
+@pytest.mark.parametrize("dataset_name", EXCHANGE_DATASETS)
+@pytest.mark.parametrize("args", [
+    {},
+    {"theme": "МАРКЕТИНГ"},
+    {"theme": "  новости  "},
+    {"theme": "без даты"},
+    {"username": "@Bench_User_1"},
+    {"username": "bench_user_4"},
+    {"username": "t.me/bench"},
+    {"username": "bench_user_3", "theme": "маркетинг"},
+])
+def test_record_filters_match_the_linear_scan(client, listings, dataset_name, args):
+    _assert_same_pages(client, listings, dataset_name, args)
+
+
+@pytest.mark.parametrize("args", [
+    {"descriptionSearch": "ПОРТФОЛИО"},
+    {"descriptionSearch": "опыт", "themeSearch": "дизайн"},
+    {"descriptionSearch": "никогда"},
+])
+def test_jobs_text_search_matches_the_linear_scan(client, listings, args):
+    _assert_same_pages(client, listings, "jobs", args)
+
+
+def test_verified_overlay_matches_the_refreshed_copies(client, listings):
+    stale = [
+        it for it in listings["buyAds"]
+        if isinstance(it, dict) and baseline.item_username(it)
+        and bool(it.get("verified")) != baseline.refresh_verified("buyAds", [it])[0]["verified"]
+    ]
+    assert stale
+    _assert_same_pages(client, listings, "buyAds", {})
+    item = client.get(f"/api/datasets/buyAds/items/{stale[0]['id']}").get_json()["item"]
+    assert item == baseline.refresh_verified("buyAds", [stale[0]])[0]
+    # The overlay only reaches responses: the stored items keep their own flag.
+    assert loads(client.get("/api/datasets/buyAds/payload").get_data())["buyAds"] == listings["buyAds"]
+
+
+def test_listing_sorts_by_stored_verified_while_the_backend_is_down(client, listings, stub):
+    stub.configure("backend", error_rate=1.0)
+    try:
+        args = {"theme": "маркетинг"}
+        expected = baseline.sort_items("ads", baseline.filter_items("ads", listings["ads"], args))
+        assert _listing_page(client, "ads", dict(args, limit="100")) == baseline.page(expected, "0", "100")
+    finally:
+        stub.configure("backend", error_rate=0.0)
+
+
+@pytest.mark.parametrize("dataset_name", ["ads", "other", "jobs"])
+@pytest.mark.parametrize("cursor,limit", [("0", "1"), ("0", "5"), ("4", "10"), ("0", "40"), ("-3", "2"), ("x", "-1")])
+def test_top_k_pages_match_the_full_sort(client, listings, monkeypatch, dataset_name, cursor, limit):
+    import api_routes
+
+    selections = []
+    nlargest = api_routes.heapq.nlargest
+    monkeypatch.setattr(api_routes.heapq, "nlargest", lambda *a, **kw: selections.append(a[0]) or nlargest(*a, **kw))
+    expected = baseline.listing(dataset_name, listings[dataset_name], {})
+    assert _listing_page(client, dataset_name, {"cursor": cursor, "limit": limit}) == baseline.page(expected, cursor, limit)
+    offset = int(cursor) if cursor.lstrip("-").isdigit() else 0
+    page_end = offset + (int(limit) if int(limit) > 0 else 20)
+    assert bool(selections) == (offset >= 0 and page_end <= len(expected) * api_routes._TOP_K_MAX_FRACTION)
+
+
+def test_top_k_keeps_stored_order_among_equal_keys(client, replace_payload):
+    tied = [{"id": "same", "publishedAt": "2026-02-01", "theme": str(i)} for i in range(30)]
+    tied += ["loose", {"id": "same", "theme": "undated"}, {"theme": "no id"}, "loose-2"]
+    replace_payload("services", {"services": tied})
+    stored = loads(client.get("/api/datasets/services/payload").get_data())["services"]
+    expected = baseline.listing("services", stored, {})
+    for cursor, limit in (("0", "3"), ("0", "34"), ("30", "4")):
+        assert _listing_page(client, "services", {"cursor": cursor, "limit": limit}) == baseline.page(expected, cursor, limit)
+
+
+@pytest.mark.parametrize("args", [
+    {"dateFrom": "2026-01-05"},
+    {"dateTo": "2026-01-20"},
+    {"dateFrom": "2026-01-05", "dateTo": "2026-01-05"},
+    {"dateFrom": "2026-01-20", "dateTo": "2026-01-05"},
+    {"dateFrom": "2026-01-06", "dateTo": "2026-01-11", "username": "bench_user_1"},
+    {"dateTo": "2026-01-11"},
+])
+def test_other_date_filters_match_the_string_comparison(client, listings, args):
+    _assert_same_pages(client, listings, "other", args)
+
+
+def test_expiry_boundaries_match_the_parsed_comparison(client, replace_payload):
+    now = datetime.now(timezone.utc)
+    expiries = {
+        "past-minute": (now - timedelta(minutes=1)).isoformat().replace("+00:00", "Z"),
+        "next-minute": (now + timedelta(minutes=1)).isoformat().replace("+00:00", "Z"),
+        "offset-past": (now - timedelta(minutes=1)).astimezone(timezone(timedelta(hours=3))).isoformat(),
+        "offset-future": (now + timedelta(minutes=1)).astimezone(timezone(timedelta(hours=-5))).isoformat(),
+        "naive-past": "2020-01-01T00:00:00",
+        "date-only-past": "2020-01-01",
+        "unparsable": "tomorrow",
+        "empty": "",
+    }
+    replace_payload("sellChannels", {"sellChannels": [
+        {"id": name, "expiresAt": value, "publishedAt": "2026-03-01"} for name, value in expiries.items()
+    ]})
+    stored = loads(client.get("/api/datasets/sellChannels/payload").get_data())["sellChannels"]
+    listed, _ = _listing_page(client, "sellChannels", {"limit": "100"})
+    assert [it["id"] for it in listed] == [it["id"] for it in baseline.listing("sellChannels", stored, {})]
+    assert {it["id"] for it in listed} == set(expiries) - {"past-minute", "offset-past"}
+
+
+def test_mixed_date_formats_sort_chronologically(client, replace_payload):
+    # The string sort put "2026-03-01T..." above "2026-03-01" and compared offsets as text.
+    replace_payload("services", {"services": [
+        {"id": "a", "publishedAt": "2026-03-01"},
+        {"id": "b", "publishedAt": "2026-03-01T12:00:00Z"},
+        {"id": "c", "publishedAt": "2026-03-01T23:00:00-05:00"},
+        {"id": "d", "createdAt": "2026-02-28T23:59:59Z"},
+        {"id": "e"},
+    ]})
+    listed, _ = _listing_page(client, "services", {"limit": "10"})
+    assert [it["id"] for it in listed] == ["c", "b", "a", "d", "e"]
@@ -0,0 +1,22 @@
+import live_events
+
+
+def test_event_streams_over_the_limit_get_503(client, monkeypatch):
+    monkeypatch.setattr(live_events, "SSE_MAX_SUBSCRIBERS", 0)
+    response = client.get("/api/datasets/ads/events")
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == str(live_events.SSE_RETRY_AFTER_SECONDS)
+
+
+def test_idle_event_stream_returns_its_connection(app, client):
+    from models import db
+
+    with app.app_context():
+        pool = db.engine.pool
+        response = client.get("/api/datasets/ads/events")
+        try:
+            assert response.status_code == 200
+            assert next(response.response).startswith(b"retry:")
+            assert pool.checkedout() == 0
+        finally:
+            response.close()
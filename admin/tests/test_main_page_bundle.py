@@ -0,0 +1,23 @@
+from api_routes import MAIN_PAGE_BUNDLE_DATASETS
+
+
+def test_bundle_matches_the_separate_requests(client):
+    bundle = client.get("/api/bundles/main-page").get_json()
+    for name in MAIN_PAGE_BUNDLE_DATASETS:
+        assert bundle["datasets"][name] == client.get(f"/api/datasets/{name}").get_json(), name
+    assert bundle["stats"] == client.get("/api/stats/active-ads-total").get_json()
+
+
+def test_bundle_etag_revalidates_until_a_dataset_changes(client, replace_payload):
+    first = client.get("/api/bundles/main-page")
+    etag = first.headers["ETag"]
+    assert client.get("/api/bundles/main-page", headers={"If-None-Match": etag}).status_code == 304
+    assert client.get("/api/bundles/main-page", headers={"If-None-Match": f"W/{etag}"}).status_code == 304
+
+    replace_payload("faq", {"items": [{"question": "Changed?", "answer": "Yes"}]})
+
+    second = client.get("/api/bundles/main-page", headers={"If-None-Match": etag})
+    assert second.status_code == 200
+    assert second.headers["ETag"] != etag
+    assert second.get_json()["datasets"]["faq"] == client.get("/api/datasets/faq").get_json()
+    assert second.get_json()["version"] > first.get_json()["version"]
@@ -0,0 +1,43 @@
+import os
+import subprocess
+import sys
+
+import metrics
+from codec import dumpb
+
+
+def test_metrics_is_closed_without_a_token(client, monkeypatch):
+    monkeypatch.setattr(metrics, "METRICS_TOKEN", "")
+    assert client.get("/metrics").status_code == 403
+
+
+def test_metrics_requires_the_configured_token(client, monkeypatch):
+    monkeypatch.setattr(metrics, "METRICS_TOKEN", "scrape-token")
+    assert client.get("/metrics", headers={"Authorization": "Bearer wrong"}).status_code == 403
+    response = client.get("/metrics", headers={"Authorization": "Bearer scrape-token"})
+    assert response.status_code == 200
+    assert "admin_http_request_duration_seconds" in response.get_data(as_text=True)
+
+
+def test_timing_is_not_exposed_cross_origin_by_default(client, monkeypatch):
+    response = client.get("/api/datasets/ads?limit=1")
+    assert "Server-Timing" in response.headers
+    assert "Timing-Allow-Origin" not in response.headers
+    monkeypatch.setattr(metrics, "SERVER_TIMING_ALLOW_ORIGIN", "https://app.example")
+    assert client.get("/api/datasets/ads?limit=1").headers["Timing-Allow-Origin"] == "https://app.example"
+
+
+def test_snapshots_of_exited_workers_are_dropped(client, monkeypatch, tmp_path):
+    monkeypatch.setattr(metrics, "METRICS_TOKEN", "scrape-token")
+    monkeypatch.setattr(metrics, "METRICS_DIR", str(tmp_path))
+    exited = subprocess.run([sys.executable, "-c", "import os; print(os.getpid())"], capture_output=True, text=True)
+    stale = {"histograms": [], "counters": [["admin_cache_requests_total", [["cache", "stale"], ["result", "hit"]], 7]]}
+    for pid in (int(exited.stdout), "notapid"):
+        (tmp_path / f"metrics-{pid}.json").write_bytes(dumpb(stale))
+
+    body = client.get("/metrics", headers={"Authorization": "Bearer scrape-token"}).get_data(as_text=True)
+
+    assert 'admin_cache_requests_total{cache="stale",result="hit"} 7\n' in body
+    assert {path.name for path in tmp_path.iterdir()} == {"metrics-notapid.json", f"metrics-{os.getpid()}.json"}
+    metrics.remove_snapshot(os.getpid())
+    assert [path.name for path in tmp_path.iterdir()] == ["metrics-notapid.json"]
@@ -0,0 +1,55 @@
+import time
+
+import pytest
+from flask import Flask
+
+import profiling
+
+
+@pytest.fixture
+def profiled_app(tmp_path, monkeypatch):
+    monkeypatch.setattr(profiling, "PROFILING_ENABLED", True)
+    monkeypatch.setattr(profiling, "PROFILE_SLOW_MS", 30.0)
+    monkeypatch.setattr(profiling, "PROFILE_KEEP", 2)
+    monkeypatch.setattr(profiling, "_state", {"dir": str(tmp_path), "sampler": None})
+    app = Flask(__name__)
+
+    @app.route("/wait/<int:ms>")
+    def wait(ms):
+        time.sleep(ms / 1000)
+        return "ok"
+
+    @app.route("/boom")
+    def boom():
+        time.sleep(0.05)
+        raise RuntimeError("boom")
+
+    profiling.init_profiling(app, str(tmp_path))
+    return app
+
+
+def test_only_slow_requests_are_kept_slowest_first(profiled_app):
+    client = profiled_app.test_client()
+    for ms in (0, 60, 120, 90, 1):
+        assert client.get(f"/wait/{ms}?x=1").status_code == 200
+
+    profiles = profiling.list_profiles()
+    assert [p["path"] for p in profiles] == ["/wait/120", "/wait/90"]
+    assert profiles[0]["route"] == "/wait/<int:ms>"
+    assert profiles[0]["args"] == {"x": ["1"]}
+    assert (profiles[0]["status"], profiles[0]["reason"]) == (200, "slow")
+    assert profiles[0]["durationMs"] >= profiles[1]["durationMs"] >= 90
+
+    profile = profiling.load_profile(profiles[0]["id"])
+    assert profile["samples"] == sum(count for _, count in profile["stacks"]) > 0
+    assert any("wait (" in stack for stack, _ in profile["stacks"])
+    folded = profiling.folded_stacks(profile).splitlines()
+    assert [line.rsplit(" ", 1) for line in folded] == [[stack, str(count)] for stack, count in profile["stacks"]]
+
+
+def test_failed_views_are_recorded_with_a_500(profiled_app):
+    profiled_app.config["PROPAGATE_EXCEPTIONS"] = False
+    assert profiled_app.test_client().get("/boom").status_code == 500
+    assert [(p["path"], p["status"]) for p in profiling.list_profiles()] == [("/boom", 500)]
+    assert profiling.clear_profiles() == 1
+    assert profiling.list_profiles() == []
@@ -0,0 +1,40 @@
+from flask import jsonify
+
+from dataset_cache import get_dataset_entry
+from projections import CARD_FIELDS
+
+
+def test_ad_hoc_fields_are_encoded_per_request(app, client):
+    response = client.get("/api/datasets/ads?limit=5&fields=price,theme")
+    assert response.status_code == 200
+    assert set(response.get_json()["payload"]["ads"][0]) <= {"id", "price", "theme"}
+    client.get("/api/datasets/ads?limit=5&projection=card")
+    with app.app_context():
+        keys = [key for key in get_dataset_entry("ads")["derived"] if key[0] == "fragments"]
+    assert all(fields is None or "adType" in fields for _, fields in keys)
+    assert ("fragments", ("id", "price", "theme")) not in keys
+
+
+def test_unknown_fields_are_rejected(client):
+    response = client.get("/api/datasets/ads?limit=5&fields=price,__class__")
+    assert response.status_code == 400
+    assert "__class__" in response.get_json()["error"]
+
+
+def test_spliced_pages_match_jsonify_of_the_projected_items(app, client, replace_payload):
+    replace_payload("ads", {"ads": [
+        {"id": "a1", "price": 10, "theme": "Cats", "description": "long", "publishedAt": "2026-01-02"},
+        {"id": "a2", "theme": "No price", "username": "bench_user_3"},
+        "loose",
+        {"id": "a3", "price": "n/a", "pinned": True, "publishedAt": "2026-01-01"},
+    ]})
+    full = client.get("/api/datasets/ads?limit=10").get_json()
+    for query in ("limit=10&projection=card", "limit=10&projection=card", "limit=10&fields=price,theme"):
+        response = client.get(f"/api/datasets/ads?{query}")
+        fields = CARD_FIELDS["ads"] if "card" in query else ("id", "price", "theme")
+        expected = dict(full, payload={"ads": [
+            {name: it[name] for name in fields if name in it} if isinstance(it, dict) else it
+            for it in full["payload"]["ads"]
+        ]})
+        with app.app_context():
+            assert response.get_data() == jsonify(expected).get_data(), query
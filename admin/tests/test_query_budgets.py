@@ -0,0 +1,29 @@
+import pytest
+
+from bench.admin_flows import add_pending_requests
+from query_stats import assert_max_queries
+
+# Cold-cache budgets: one change-feed poll plus one dataset read. Warm requests run fewer.
+READ_BUDGETS = [
+    ("/api/users/bench_user_6/listings", 2),
+    ("/api/datasets/ads?limit=20", 2),
+    ("/api/datasets/jobs?work=design", 2),
+    ("/api/bundles/main-page", 2),
+]
+
+
+@pytest.mark.parametrize("path,limit", READ_BUDGETS)
+def test_read_endpoints_stay_within_query_budget(client, path, limit):
+    for _ in range(2):
+        with assert_max_queries(limit):
+            assert client.get(path).status_code == 200
+
+
+def test_moderation_approve_stays_within_query_budget(client, stub):
+    stub.add_users(["bench_user_1"])
+    assert client.post("/admin/login", data={"password": "admin123"}).status_code == 302
+    request_id = add_pending_requests(stub, 1, seed=1)[0]
+    # Read the dataset row, update it and record one change with its item diff.
+    with assert_max_queries(4):
+        response = client.patch(f"/admin/api/moderation/requests/{request_id}/approve", json={})
+    assert response.status_code == 200
@@ -0,0 +1,36 @@
+import gzip
+
+from codec import dumps, loads
+from models import Dataset, db
+
+
+def test_truncated_gzip_row_is_served_as_invalid(app, client):
+    with app.app_context():
+        blob = gzip.compress(dumps({"items": []}).encode("utf-8"))
+        db.session.add(Dataset(name="corruptGzip", payload_text="", payload_blob=blob[:10], payload_format="gzip"))
+        db.session.commit()
+    try:
+        response = client.get("/api/datasets/corruptGzip/payload")
+        assert response.status_code == 500
+        assert "invalid JSON" in response.get_json()["error"]
+    finally:
+        with app.app_context():
+            Dataset.query.filter_by(name="corruptGzip").delete()
+            db.session.commit()
+
+
+def test_date_normalization_keeps_a_converted_rows_format(app):
+    with app.app_context():
+        row = Dataset.query.filter_by(name="other").first()
+        original = row.payload
+        items = loads(original)["other"]
+        stale = dict(items[0], publishedAt="2026-01-02T03:04:05Z")
+        stale.pop("publishedAtEpoch", None)
+        try:
+            row.store_payload(dumps({"other": [stale] + items[1:]}), "gzip")
+            db.session.commit()
+            assert row.payload_format == "gzip"
+            assert loads(row.payload)["other"][0]["publishedAtEpoch"] is not None
+        finally:
+            row.payload = original
+            db.session.commit()
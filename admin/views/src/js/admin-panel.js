@@ -1763,6 +1763,15 @@ async function loadModerationRequests() {
   renderModerationRequestsTable();
 }
 
+function subscribeModerationEvents() {
+  if (typeof EventSource !== "function") return;
+  const source = new EventSource("/admin/api/moderation/events");
+  source.addEventListener("moderation", () => {
+    if (activeTab !== "moderation" || selectedModerationRequestId) return;
+    loadModerationRequests().catch(() => {});
+  });
+}
+
 async function openModerationRequest(requestId) {
   selectedModerationRequestId = requestId;
   const data = await apiGet(`/admin/api/moderation/requests/${encodeURIComponent(requestId)}`);
@@ -2812,6 +2821,7 @@ document.addEventListener("DOMContentLoaded", async () => {
       await approveModerationRequest();
     }
   });
+  subscribeModerationEvents();
   if (adminRole === "moderator") {
     applyModeratorLayout();
     await switchTab("moderation");
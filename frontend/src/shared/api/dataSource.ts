@@ -8,6 +8,30 @@ export function getContentApiBase(): string | null {
   return CONTENT_API_BASE;
 }
 
+// Datasets served together by /bundles/main-page: one request instead of one per dataset.
+const BUNDLE_DATASETS = new Set(["mainPage", "banners", "faq", "exchangeOptions", "guarantConfig"]);
+const BUNDLE_TTL_MS = 5_000;
+
+type BundleDatasets = Record<string, { payload?: unknown } | null>;
+
+let bundleRequest: { promise: Promise<BundleDatasets | null>; at: number } | null = null;
+
+function fetchMainPageBundle(base: string): Promise<BundleDatasets | null> {
+  const now = Date.now();
+  if (bundleRequest && now - bundleRequest.at < BUNDLE_TTL_MS) {
+    return bundleRequest.promise;
+  }
+  const promise = fetch(`${base}/bundles/main-page`, { method: "GET", cache: "no-cache" })
+    .then(async (res) => {
+      if (!res.ok) return null;
+      const json = (await res.json()) as { datasets?: BundleDatasets };
+      return json?.datasets ?? null;
+    })
+    .catch(() => null);
+  bundleRequest = { promise, at: now };
+  return promise;
+}
+
 export async function fetchDatasetFromApi<T>(
   datasetName: string
 ): Promise<T | null> {
@@ -22,6 +46,14 @@ export async function fetchDatasetFromApi<T>(
     return null;
   }
 
+  if (BUNDLE_DATASETS.has(datasetName)) {
+    const datasets = await fetchMainPageBundle(CONTENT_API_BASE);
+    const bundled = datasets?.[datasetName]?.payload;
+    if (bundled != null) {
+      return bundled as T;
+    }
+  }
+
   try {
     const res = await fetch(`${CONTENT_API_BASE}/datasets/${datasetName}`, {
       method: "GET",
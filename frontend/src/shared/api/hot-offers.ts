@@ -9,6 +9,8 @@ export type HotOffer = {
   category?: string;
   itemId?: string;
   linkUrl?: string;
+  /** Live listing behind a type "ad" offer, filled in by the content API. */
+  item?: Record<string, unknown>;
 };
 
 export type HotOffersResponse = {